@@ -0,0 +1,7 @@
+"""
+Throughput benchmarks for the market simulator and the seeder.
+"""
+
+from .suite import run_benchmarks
+
+__all__ = ["run_benchmarks"]
@@ -0,0 +1,132 @@
+"""
+CLI entrypoint for the throughput benchmarks.
+
+Usage:
+    python -m app.bench
+    python -m app.bench --output bench.json
+    python -m app.bench --only update_all_sectors --tick-scales 10,1000,10000
+    python -m app.bench --only seed --seed-scales 6:30,1000:7 --workers 4
+    python -m app.bench --database-url postgresql://localhost/max_bench
+
+Runs every benchmark against a temporary SQLite file unless
+--database-url is given; that database is wiped. Results are written as
+JSON so runs can be compared to catch regressions.
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Add backend directory to path
+backend_path = Path(__file__).parent.parent.parent
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from app.bench.suite import BENCHMARKS, DEFAULT_SEED_SCALES, DEFAULT_TICK_SCALES, run_benchmarks
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def _seed_scales(value: str) -> list[tuple[int, int]]:
+    """Parse "sectors:days,..." pairs."""
+    scales = []
+    for item in value.split(","):
+        sectors, _, days = item.partition(":")
+        scales.append((int(sectors), int(days or 1)))
+    return scales
+
+
+def main():
+    """Main entrypoint for the benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmark MAX simulator and seeder throughput")
+    parser.add_argument(
+        "--only",
+        type=lambda value: value.split(","),
+        default=list(BENCHMARKS),
+        help=f"Comma-separated benchmarks to run (default: {','.join(BENCHMARKS)})"
+    )
+    parser.add_argument(
+        "--tick-scales",
+        type=_int_list,
+        default=list(DEFAULT_TICK_SCALES),
+        help=f"Sector counts for update_all_sectors (default: {','.join(map(str, DEFAULT_TICK_SCALES))})"
+    )
+    parser.add_argument(
+        "--ticks",
+        type=int,
+        default=10,
+        help="Timed ticks per update_all_sectors scale (default: 10)"
+    )
+    parser.add_argument(
+        "--backfill-sectors",
+        type=int,
+        default=100,
+        help="Sectors for the backfill benchmark (default: 100)"
+    )
+    parser.add_argument(
+        "--backfill-days",
+        type=int,
+        default=1,
+        help="Days for the backfill benchmark (default: 1)"
+    )
+    parser.add_argument(
+        "--seed-scales",
+        type=_seed_scales,
+        default=list(DEFAULT_SEED_SCALES),
+        help="sectors:days pairs for the seed benchmark (default: "
+             f"{','.join(f'{sectors}:{days}' for sectors, days in DEFAULT_SEED_SCALES)})"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for the seed benchmark (default: 1)"
+    )
+    parser.add_argument(
+        "--database-url",
+        default=None,
+        help="Database to benchmark against; it is WIPED (default: temporary SQLite file)"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Write JSON results to this file (default: stdout)"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show progress output of the code under benchmark"
+    )
+
+    args = parser.parse_args()
+    unknown = [name for name in args.only if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    report = run_benchmarks(
+        benchmarks=args.only,
+        tick_scales=args.tick_scales,
+        seed_scales=args.seed_scales,
+        ticks=args.ticks,
+        backfill_sectors=args.backfill_sectors,
+        backfill_days=args.backfill_days,
+        workers=args.workers,
+        database_url=args.database_url,
+        verbose=args.verbose,
+    )
+    report["argv"] = sys.argv[1:]
+
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        args.output.write_text(output + "\n")
+        print(f"Wrote benchmark results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
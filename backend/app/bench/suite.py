@@ -0,0 +1,330 @@
+"""
+Throughput benchmarks for the market simulator and the seeder.
+
+Every benchmark runs against a fresh database: a temporary SQLite file by
+default, or the database at `database_url`, whose simulator tables are
+dropped and recreated. Results are plain dicts so they can be written as
+JSON and compared between runs.
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import sqlalchemy
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models.base import Base
+from app.seed.seed_data import run_seed, seed_sectors
+from app.services import market_simulator
+from app.services.simulator_metrics import PHASES, InMemoryMetrics
+from app.services.tick_publisher import InMemoryRedis, TickPublisher
+
+
+DEFAULT_TICK_SCALES = (10, 1_000, 10_000)
+
+# (sectors, days of candles) per run_seed benchmark
+DEFAULT_SEED_SCALES = ((6, 7), (100, 7), (1_000, 1))
+
+BENCHMARKS = ("price_change", "update_all_sectors", "backfill", "seed")
+
+
+def _load_models() -> None:
+    """Import every model so Base.metadata knows all tables."""
+    from app.models import (  # noqa: F401
+        agent,
+        discussion,
+        sector,
+        sector_candle,
+        sector_ohlcv,
+        sector_sim_state,
+        seed_checkpoint,
+        simulator_lease,
+    )
+
+
+@contextlib.contextmanager
+def fresh_database(database_url: Optional[str] = None) -> Iterator[Callable[[], Session]]:
+    """
+    Yield a session factory bound to an empty database.
+
+    Args:
+        database_url: Database to use; its tables are dropped and
+            recreated (default: a temporary SQLite file)
+    """
+    _load_models()
+    with tempfile.TemporaryDirectory(prefix="max-bench-") as directory:
+        url = database_url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine = create_engine(url)
+        try:
+            Base.metadata.drop_all(engine)
+            Base.metadata.create_all(engine)
+            yield sessionmaker(bind=engine)
+        finally:
+            engine.dispose()
+
+
+@contextlib.contextmanager
+def _quiet(verbose: bool) -> Iterator[None]:
+    """Silence progress prints of the code under benchmark."""
+    if verbose:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _timings(samples: List[float]) -> dict:
+    return {
+        "mean": statistics.fmean(samples),
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+    }
+
+
+def _row_count(db: Session) -> int:
+    """Rows in all data tables (seed bookkeeping excluded)."""
+    return sum(
+        db.execute(select(func.count()).select_from(table)).scalar_one()
+        for table in Base.metadata.sorted_tables
+        if table.name != "seed_checkpoints"
+    )
+
+
+def bench_price_change(calls: int = 20_000, sectors: int = 100, seed: int = 42) -> dict:
+    """
+    Single-sector ticks per second through `_generate_price_change`, and
+    sector-ticks per second of one vectorized engine step for comparison.
+    """
+    market_simulator.set_simulator_seed(seed)
+    sector_ids = [f"bench-{i}" for i in range(sectors)]
+    price = 100.0
+    started = time.perf_counter()
+    for i in range(calls):
+        price = market_simulator._generate_price_change(price, sector_ids[i % sectors])
+    single = time.perf_counter() - started
+
+    engine = market_simulator._tick_engine
+    steps = max(1, calls // sectors)
+    prices = np.full(sectors, 100.0)
+    started = time.perf_counter()
+    for _ in range(steps):
+        prices = engine.step(sector_ids, prices)
+    vectorized = time.perf_counter() - started
+
+    return {
+        "calls": calls,
+        "sectors": sectors,
+        "seconds": single,
+        "ticksPerSecond": calls / single,
+        "vectorizedTicksPerSecond": steps * sectors / vectorized,
+    }
+
+
+async def _timed_ticks(ticks: int) -> List[float]:
+    """Wall time of consecutive `_update_all_sectors` calls on a virtual clock."""
+    now = datetime.now(timezone.utc)
+    samples = []
+    for tick in range(ticks):
+        started = time.perf_counter()
+        await market_simulator._update_all_sectors(now + timedelta(seconds=tick * market_simulator.TICK_SECONDS))
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_update_all_sectors(
+    sectors: int,
+    ticks: int = 10,
+    database_url: Optional[str] = None,
+    seed: int = 42,
+    verbose: bool = False,
+) -> dict:
+    """
+    Wall time of `_update_all_sectors` for one tick of every sector.
+
+    The first tick warms the price cache and is reported separately. Ticks
+    advance a virtual clock by TICK_SECONDS, so buckets close and roll up
+    as in production. Sector events are collected in memory and the
+    snapshot goes to an in-memory Redis.
+    """
+    with fresh_database(database_url) as factory:
+        db = factory()
+        try:
+            seed_sectors(db, sectors, seed)
+        finally:
+            db.close()
+
+        market_simulator.set_session_factory(factory)
+        market_simulator.set_simulator_seed(seed)
+        previous_publisher = market_simulator._tick_publisher
+        published = []
+
+        async def collect(event: dict) -> None:
+            published.append(event)
+
+        market_simulator.set_tick_publisher(TickPublisher(InMemoryRedis(), event_publisher=collect))
+        metrics = InMemoryMetrics()
+        market_simulator.add_metrics_hook(metrics)
+        try:
+            with _quiet(verbose):
+                samples = asyncio.run(_timed_ticks(ticks + 1))
+        finally:
+            market_simulator.remove_metrics_hook(metrics)
+            market_simulator.set_tick_publisher(previous_publisher)
+
+    warm = samples[1:]
+    warm_ticks = list(metrics.ticks)[1:]
+    return {
+        "sectors": sectors,
+        "ticks": ticks,
+        "coldSeconds": samples[0],
+        "seconds": _timings(warm),
+        "sectorTicksPerSecond": sectors / statistics.fmean(warm),
+        "rowsPerTick": statistics.fmean(tick.rows_written for tick in warm_ticks),
+        "phases": {
+            phase: statistics.fmean(tick.phases.get(phase, 0.0) for tick in warm_ticks)
+            for phase in PHASES
+        },
+    }
+
+
+def bench_backfill(
+    sectors: int = 100,
+    days: int = 1,
+    database_url: Optional[str] = None,
+    seed: int = 42,
+    verbose: bool = False,
+) -> dict:
+    """Time to backfill `days` of candles, bars and rollups for every sector."""
+    with fresh_database(database_url) as factory:
+        db = factory()
+        try:
+            seed_sectors(db, sectors, seed)
+            seeded = _row_count(db)
+        finally:
+            db.close()
+
+        market_simulator.set_session_factory(factory)
+        market_simulator.set_simulator_seed(seed)
+        with _quiet(verbose):
+            started = time.perf_counter()
+            market_simulator._backfill_candles(days, False)
+            elapsed = time.perf_counter() - started
+
+        db = factory()
+        try:
+            rows = _row_count(db) - seeded
+        finally:
+            db.close()
+
+    return {
+        "sectors": sectors,
+        "days": days,
+        "seconds": elapsed,
+        "rows": rows,
+        "rowsPerSecond": rows / elapsed,
+    }
+
+
+def bench_seed(
+    sectors: int,
+    days: int,
+    workers: int = 1,
+    database_url: Optional[str] = None,
+    seed: int = 42,
+    verbose: bool = False,
+) -> dict:
+    """Rows per second of a full `run_seed` into an empty database."""
+    with fresh_database(database_url) as factory:
+        db = factory()
+        try:
+            with _quiet(verbose):
+                started = time.perf_counter()
+                run_seed(db, force=True, sectors=sectors, days=days, workers=workers, seed=seed)
+                elapsed = time.perf_counter() - started
+            rows = _row_count(db)
+        finally:
+            db.close()
+
+    return {
+        "sectors": sectors,
+        "days": days,
+        "workers": workers,
+        "seconds": elapsed,
+        "rows": rows,
+        "rowsPerSecond": rows / elapsed,
+    }
+
+
+def run_benchmarks(
+    benchmarks: Sequence[str] = BENCHMARKS,
+    tick_scales: Sequence[int] = DEFAULT_TICK_SCALES,
+    seed_scales: Sequence[tuple[int, int]] = DEFAULT_SEED_SCALES,
+    ticks: int = 10,
+    backfill_sectors: int = 100,
+    backfill_days: int = 1,
+    workers: int = 1,
+    database_url: Optional[str] = None,
+    verbose: bool = False,
+) -> dict:
+    """
+    Run the selected benchmarks.
+
+    Args:
+        benchmarks: Names from BENCHMARKS to run
+        tick_scales: Sector counts for the `_update_all_sectors` benchmark
+        seed_scales: (sectors, days) pairs for the `run_seed` benchmark
+        ticks: Timed ticks per `_update_all_sectors` scale
+        backfill_sectors: Sectors for the backfill benchmark
+        backfill_days: Days for the backfill benchmark
+        workers: Worker processes for the `run_seed` benchmark
+        database_url: Database to benchmark against; it is wiped
+            (default: a temporary SQLite file per benchmark)
+        verbose: Keep progress output of the code under benchmark
+
+    Returns:
+        Dict with run metadata and one result list per benchmark
+    """
+    results = {}
+    for name in benchmarks:
+        print(f"Running {name} benchmark...", file=sys.stderr)
+        if name == "price_change":
+            results[name] = [bench_price_change()]
+        elif name == "update_all_sectors":
+            results[name] = [
+                bench_update_all_sectors(sectors, ticks, database_url, verbose=verbose)
+                for sectors in tick_scales
+            ]
+        elif name == "backfill":
+            results[name] = [bench_backfill(backfill_sectors, backfill_days, database_url, verbose=verbose)]
+        elif name == "seed":
+            results[name] = [
+                bench_seed(sectors, days, workers, database_url, verbose=verbose)
+                for sectors, days in seed_scales
+            ]
+        else:
+            raise ValueError(f"Unknown benchmark: {name}")
+
+    return {
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "sqlalchemy": sqlalchemy.__version__,
+            "database": sqlalchemy.engine.make_url(database_url).get_backend_name() if database_url else "sqlite",
+            "tickSeconds": market_simulator.TICK_SECONDS,
+        },
+        "results": results,
+    }
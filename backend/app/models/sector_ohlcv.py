@@ -0,0 +1,28 @@
+"""
+SQLAlchemy ORM model for SectorOHLCV.
+"""
+
+from sqlalchemy import Column, String, DateTime, Float, BigInteger, ForeignKey
+
+from .base import Base
+
+
+class SectorOHLCV(Base):
+    """
+    Open/high/low/close/volume bar of a sector at one resolution.
+
+    Bars are keyed by the timestamp that closes their bucket, like
+    SectorCandle. 5m bars are written by the market simulator on every
+    tick; 15m, 1h, 4h and 1d bars are rolled up from closed 5m bars.
+    """
+
+    __tablename__ = "sector_ohlcv"
+
+    sectorId = Column(String, ForeignKey("sectors.id", ondelete="CASCADE"), primary_key=True)
+    resolution = Column(String, primary_key=True)  # "5m", "15m", "1h", "4h", "1d"
+    timestamp = Column(DateTime(timezone=True), primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,25 @@
+"""
+SQLAlchemy ORM model for SectorSimState.
+"""
+
+from sqlalchemy import Column, String, DateTime, Float, SmallInteger, BigInteger, ForeignKey
+
+from .base import Base
+
+
+class SectorSimState(Base):
+    """
+    Market simulator trend state of a sector.
+
+    Lets a sector continue its trend, wave and momentum when it moves to
+    another simulator worker or the simulator restarts.
+    """
+
+    __tablename__ = "sector_sim_state"
+
+    sectorId = Column(String, ForeignKey("sectors.id", ondelete="CASCADE"), primary_key=True)
+    trend = Column(SmallInteger, nullable=False)  # 0 = up, 1 = down, 2 = volatile
+    wavePhase = Column(Float, nullable=False)
+    momentum = Column(Float, nullable=False)
+    ticks = Column(BigInteger, nullable=False)  # Ticks advanced, position in the random stream
+    updatedAt = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,26 @@
+"""
+SQLAlchemy ORM model for SeedCheckpoint.
+"""
+
+from sqlalchemy import Column, String, DateTime, BigInteger
+
+from .base import Base
+
+
+class SeedCheckpoint(Base):
+    """
+    A seeding phase completed for one sector.
+
+    Checkpoints are committed together with the rows they cover, so an
+    interrupted seed resumes with the first sector that has none. Rows
+    with sectorId "*" mark an operation in progress for all sectors
+    (e.g. a candle append and the timestamp it extends history to).
+    """
+
+    __tablename__ = "seed_checkpoints"
+
+    phase = Column(String, primary_key=True)  # sectors, agents, discussions, candles, history, append
+    sectorId = Column(String, primary_key=True)  # No foreign key: "*" marks whole-run state
+    rows = Column(BigInteger, nullable=False, default=0)
+    target = Column(DateTime(timezone=True), nullable=True)
+    completedAt = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,36 @@
+"""
+SQLAlchemy ORM models for market simulator workers and shard leases.
+"""
+
+from sqlalchemy import Column, String, DateTime, Integer
+
+from .base import Base
+
+
+class SimulatorWorker(Base):
+    """
+    Heartbeat of a running market simulator worker.
+
+    Workers whose heartbeat has not expired count as live when shards are
+    divided between workers.
+    """
+
+    __tablename__ = "simulator_workers"
+
+    id = Column(String, primary_key=True)
+    expiresAt = Column(DateTime(timezone=True), nullable=False)
+
+
+class SimulatorShardLease(Base):
+    """
+    Lease of one sector shard by a market simulator worker.
+
+    A shard whose lease has expired (or has no owner) can be claimed by
+    any live worker.
+    """
+
+    __tablename__ = "simulator_shard_leases"
+
+    shard = Column(Integer, primary_key=True)
+    owner = Column(String, nullable=True, index=True)
+    expiresAt = Column(DateTime(timezone=True), nullable=True)
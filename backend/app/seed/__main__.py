@@ -4,6 +4,14 @@ CLI entrypoint for running the seed script.
 Usage:
     python -m app.seed
     python -m app.seed --force
+    python -m app.seed --force --sectors 10000 --days 90 --workers 8
+    python -m app.seed --force --seed 42
+    python -m app.seed --append-days 30
+    python -m app.seed dump fixtures/large.npz
+    python -m app.seed load fixtures/large.npz --force
+
+Seeding resumes where an interrupted run stopped; run the same command
+again to continue it.
 """
 
 import sys
@@ -16,16 +24,118 @@ if str(backend_path) not in sys.path:
     sys.path.insert(0, str(backend_path))
 
 from app.core.db import SessionLocal
-from app.seed.seed_data import run_seed
+from app.seed.seed_data import (
+    DEFAULT_AGENTS_PER_SECTOR,
+    DEFAULT_DAYS,
+    DEFAULT_DISCUSSIONS_PER_SECTOR,
+    DEFAULT_POINTS_PER_DAY,
+    SECTORS,
+    run_seed,
+)
+from app.services.candle_persistence import BULK_CHUNK_ROWS
+
+
+def snapshot_main(argv):
+    """Entrypoint for the `dump` and `load` snapshot commands."""
+    from app.seed.snapshot import dump_snapshot, load_snapshot
+    
+    parser = argparse.ArgumentParser(
+        prog="python -m app.seed",
+        description="Dump the seeded dataset to a snapshot file or load one"
+    )
+    parser.add_argument("command", choices=["dump", "load"])
+    parser.add_argument("path", type=Path, help="Snapshot file (.npz)")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="load: replace the seeded data of the snapshot's sectors"
+    )
+    
+    args = parser.parse_args(argv)
+    
+    db = SessionLocal()
+    
+    try:
+        if args.command == "dump":
+            counts = dump_snapshot(db, args.path)
+        else:
+            counts = load_snapshot(db, args.path, force=args.force)
+        for table, count in counts.items():
+            print(f"  {table}: {count}")
+        print(f"{'Dumped' if args.command == 'dump' else 'Loaded'} snapshot {args.path}")
+    except Exception as e:
+        print(f"Error during snapshot {args.command}: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
 
 
 def main():
     """Main entrypoint for seed script."""
+    if len(sys.argv) > 1 and sys.argv[1] in ("dump", "load"):
+        snapshot_main(sys.argv[1:])
+        return
+    
     parser = argparse.ArgumentParser(description="Seed MAX database with synthetic data")
     parser.add_argument(
         "--force",
         action="store_true",
-        help="Force seeding even if sectors already exist"
+        help="Clear previously seeded data and seed from scratch"
+    )
+    parser.add_argument(
+        "--sectors",
+        type=int,
+        default=len(SECTORS),
+        help=f"Number of sectors to create (default: {len(SECTORS)})"
+    )
+    parser.add_argument(
+        "--agents-per-sector",
+        type=int,
+        default=DEFAULT_AGENTS_PER_SECTOR,
+        help=f"Number of agents per sector (default: {DEFAULT_AGENTS_PER_SECTOR})"
+    )
+    parser.add_argument(
+        "--discussions-per-sector",
+        type=int,
+        default=DEFAULT_DISCUSSIONS_PER_SECTOR,
+        help=f"Number of discussions per sector (default: {DEFAULT_DISCUSSIONS_PER_SECTOR})"
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=DEFAULT_DAYS,
+        help=f"Days of candle history per sector (default: {DEFAULT_DAYS})"
+    )
+    parser.add_argument(
+        "--points-per-day",
+        type=int,
+        default=DEFAULT_POINTS_PER_DAY,
+        help=f"Candles per day (default: {DEFAULT_POINTS_PER_DAY} = 5-minute intervals)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BULK_CHUNK_ROWS,
+        help=f"Maximum rows per bulk INSERT (default: {BULK_CHUNK_ROWS})"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for generating records, candles and history bars (default: 1, in-process)"
+    )
+    parser.add_argument(
+        "--append-days",
+        type=int,
+        default=0,
+        help="Add this many days of older candle history to every sector (default: 0)"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed; the same seed reproduces the same dataset (default: random)"
     )
     
     args = parser.parse_args()
@@ -34,7 +144,19 @@ def main():
     db = SessionLocal()
     
     try:
-        run_seed(db, force=args.force)
+        run_seed(
+            db,
+            force=args.force,
+            sectors=args.sectors,
+            agents_per_sector=args.agents_per_sector,
+            discussions_per_sector=args.discussions_per_sector,
+            days=args.days,
+            points_per_day=args.points_per_day,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            append_days=args.append_days,
+            seed=args.seed,
+        )
     except Exception as e:
         print(f"Error during seeding: {e}")
         db.rollback()
@@ -0,0 +1,176 @@
+"""
+Per-phase, per-sector checkpoints for resumable seeding.
+
+Every seeding phase commits its rows together with a checkpoint for each
+sector they cover. A seed that stops halfway is resumed by running it
+again: sectors with a checkpoint for a phase are skipped.
+"""
+
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import Table, delete, select
+from sqlalchemy.orm import Session
+
+from app.models.seed_checkpoint import SeedCheckpoint
+from app.services.candle_persistence import BULK_CHUNK_ROWS, as_utc, dialect_insert, insert_rows
+
+
+# Seeding phases, in order
+PHASES = ("sectors", "agents", "discussions", "candles", "history")
+
+# sectorId of checkpoints that describe the whole run
+RUN_MARKER = "*"
+
+
+def has_checkpoints(db: Session) -> bool:
+    """Whether any seed has recorded checkpoints in this database."""
+    return db.execute(select(SeedCheckpoint.phase).limit(1)).first() is not None
+
+
+def completed_sectors(db: Session, phase: str) -> set[str]:
+    """Sectors with a checkpoint for `phase`."""
+    return set(db.execute(
+        select(SeedCheckpoint.sectorId).where(
+            SeedCheckpoint.phase == phase,
+            SeedCheckpoint.sectorId != RUN_MARKER,
+        )
+    ).scalars().all())
+
+
+def mark_completed(
+    db: Session,
+    phase: str,
+    rows_by_sector: dict[str, int],
+    target: Optional[datetime] = None,
+) -> None:
+    """
+    Record (or replace) checkpoints for sectors. The caller commits, in
+    the same transaction as the rows the checkpoints cover.
+
+    Args:
+        db: Database session (not committed here)
+        phase: Seeding phase
+        rows_by_sector: Rows written per sector
+        target: Timestamp stored with the checkpoints (optional)
+    """
+    if not rows_by_sector:
+        return
+
+    now = datetime.now(timezone.utc)
+    rows = [
+        {"phase": phase, "sectorId": sector_id, "rows": count, "target": target, "completedAt": now}
+        for sector_id, count in rows_by_sector.items()
+    ]
+    table = SeedCheckpoint.__table__
+    insert = dialect_insert(db)
+
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.phase, table.c.sectorId],
+            set_={
+                "rows": stmt.excluded.rows,
+                "target": stmt.excluded.target,
+                "completedAt": stmt.excluded.completedAt,
+            },
+        )
+        db.execute(stmt, rows)
+        return
+
+    clear_checkpoints(db, list(rows_by_sector), [phase])
+    db.execute(table.insert(), rows)
+
+
+def clear_checkpoints(
+    db: Session,
+    sector_ids: Optional[Iterable[str]] = None,
+    phases: Optional[Iterable[str]] = None,
+) -> None:
+    """
+    Delete checkpoints so their phases run again. The caller commits.
+
+    Args:
+        db: Database session (not committed here)
+        sector_ids: Sectors to clear (default: all, including run markers)
+        phases: Phases to clear (default: all)
+    """
+    stmt = delete(SeedCheckpoint)
+    if sector_ids is not None:
+        stmt = stmt.where(SeedCheckpoint.sectorId.in_(list(sector_ids)))
+    if phases is not None:
+        stmt = stmt.where(SeedCheckpoint.phase.in_(list(phases)))
+    db.execute(stmt)
+
+
+def run_marker(db: Session, phase: str) -> Optional[datetime]:
+    """Target of an unfinished whole-run operation, or None."""
+    target = db.execute(
+        select(SeedCheckpoint.target).where(
+            SeedCheckpoint.phase == phase,
+            SeedCheckpoint.sectorId == RUN_MARKER,
+        )
+    ).scalar_one_or_none()
+    return as_utc(target) if target is not None else None
+
+
+class CheckpointedWriter:
+    """
+    Buffers the rows of whole sectors and writes them with their checkpoints.
+
+    Once `batch_size` rows are buffered, each table is bulk inserted in
+    order (so foreign keys are satisfied) and committed together with a
+    checkpoint per sector for every phase in `phases`. A sector is thus
+    either fully written and checkpointed or absent. Rows whose primary
+    key already exists are skipped, so rewriting a sector is harmless.
+
+    Args:
+        db: Database session
+        phases: Phases to checkpoint for every written sector
+        tables: Tables that `add` receives rows for, in insert order
+        batch_size: Buffered rows (over all tables) that trigger a write
+        invalidates: Phases whose checkpoints are cleared for written
+            sectors (e.g. history after new candles)
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        phases: Sequence[str],
+        tables: Sequence[Table],
+        batch_size: int = BULK_CHUNK_ROWS,
+        invalidates: Sequence[str] = (),
+    ):
+        self.db = db
+        self.phases = list(phases)
+        self.tables = list(tables)
+        self.batch_size = batch_size
+        self.invalidates = list(invalidates)
+        self.totals = [0 for _ in self.tables]
+        self._buffers: List[List[dict]] = [[] for _ in self.tables]
+        self._counts: dict[str, int] = {}
+
+    def add(self, sector_id: str, *table_rows: Iterable[dict]) -> None:
+        """Buffer all rows of one sector, one iterable per table."""
+        count = 0
+        for buffer, rows in zip(self._buffers, table_rows):
+            before = len(buffer)
+            buffer.extend(rows)
+            count += len(buffer) - before
+        self._counts[sector_id] = self._counts.get(sector_id, 0) + count
+        if sum(len(buffer) for buffer in self._buffers) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered sectors and their checkpoints in one transaction."""
+        if not self._counts:
+            return
+        for i, (table, rows) in enumerate(zip(self.tables, self._buffers)):
+            self.totals[i] += insert_rows(self.db, table, rows, self.batch_size, skip_existing=True)
+            rows.clear()
+        if self.invalidates:
+            clear_checkpoints(self.db, list(self._counts), self.invalidates)
+        for phase in self.phases:
+            mark_completed(self.db, phase, self._counts)
+        self.db.commit()
+        self._counts = {}
@@ -0,0 +1,171 @@
+"""
+Process-pool seeding for large datasets.
+
+Generating agent/discussion records and candle series (with the history
+bars derived from them) is pure CPU work with no dependencies between
+sectors. Each sector is generated in a
+worker process and the results are streamed back to the parent process,
+which is the only database writer.
+"""
+
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.agent import Agent
+from app.models.discussion import Discussion, DiscussionMessage
+from app.models.sector import Sector
+from app.models.sector_candle import SectorCandle
+from app.models.sector_ohlcv import SectorOHLCV
+from app.seed.checkpoints import CheckpointedWriter
+from app.seed.seed_data import (
+    discussion_agents_table,
+    generate_agent_rows,
+    generate_discussion_rows,
+    generate_sector_series,
+)
+from app.services.candle_persistence import BULK_CHUNK_ROWS
+from app.services.random_streams import stream_rng
+
+
+# Tasks kept in flight per worker, bounds memory held by finished results
+TASKS_PER_WORKER = 4
+
+
+def _generate_sector_records(spec: tuple) -> tuple:
+    """
+    Worker task: agents, discussions, messages and links of one sector.
+
+    Uses the same per-sector streams as the in-process seeder, so a seeded
+    run produces the same records with any number of workers.
+    """
+    sector_id, agents_per_sector, discussions_per_sector, seed = spec
+    agents = generate_agent_rows(sector_id, agents_per_sector, stream_rng(seed, sector_id, "agents"))
+    discussions, messages, links = generate_discussion_rows(
+        sector_id, agents, discussions_per_sector, stream_rng(seed, sector_id, "discussions")
+    )
+    return agents, discussions, messages, links
+
+
+def _generate_sector_candles(spec: tuple) -> tuple[List[dict], List[dict]]:
+    """Worker task: the full candle series of one sector and its history bars."""
+    sector_id, base_price, change_percent, start_time, days, points_per_day, seed = spec
+    rng = stream_rng(seed, sector_id, "candles")
+    return generate_sector_series(sector_id, base_price, change_percent, start_time, days, points_per_day, rng)
+
+
+def imap_bounded(executor: Executor, fn: Callable, items: Iterable, window: int) -> Iterator:
+    """
+    Map `fn` over `items` on an executor, yielding results in order.
+
+    Unlike `Executor.map`, at most `window` tasks are submitted ahead of
+    the consumer, so a slow writer does not let results pile up in memory.
+    """
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def seed_records_parallel(
+    db: Session,
+    sector_ids: List[str],
+    agents_per_sector: int,
+    discussions_per_sector: int,
+    workers: int,
+    batch_size: int = BULK_CHUNK_ROWS,
+    seed: Optional[int] = None
+) -> tuple[int, int]:
+    """
+    Generate agents and discussions in a process pool and bulk insert them.
+
+    Each sector is committed with "agents" and "discussions" checkpoints.
+
+    Args:
+        db: Database session
+        sector_ids: Sectors to generate records for
+        agents_per_sector: Number of agents per sector
+        discussions_per_sector: Number of discussions per sector
+        workers: Number of worker processes
+        batch_size: Buffered rows (over all tables) that trigger a write
+        seed: Run seed for reproducible records (optional)
+
+    Returns:
+        Tuple of (agents created, discussions created)
+    """
+    link_table, discussion_key, agent_key = discussion_agents_table()
+    # Insert order respects foreign keys between the tables; both phases
+    # are checkpointed together since they are generated together
+    writer = CheckpointedWriter(
+        db,
+        ["agents", "discussions"],
+        [Agent.__table__, Discussion.__table__, DiscussionMessage.__table__, link_table],
+        batch_size,
+    )
+
+    specs = ((sector_id, agents_per_sector, discussions_per_sector, seed) for sector_id in sector_ids)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = imap_bounded(executor, _generate_sector_records, specs, workers * TASKS_PER_WORKER)
+        for sector_id, (agents, discussions, messages, links) in zip(sector_ids, results):
+            writer.add(
+                sector_id,
+                agents,
+                discussions,
+                messages,
+                ({discussion_key: discussion_id, agent_key: agent_id} for discussion_id, agent_id in links),
+            )
+
+    writer.flush()
+    return writer.totals[0], writer.totals[1]
+
+
+def seed_candles_parallel(
+    db: Session,
+    sectors_dict: dict[str, Sector],
+    days: int,
+    points_per_day: int,
+    workers: int,
+    batch_size: int = BULK_CHUNK_ROWS,
+    seed: Optional[int] = None
+) -> tuple[int, int]:
+    """
+    Generate candle series and their history bars in a process pool and
+    stream them into the database.
+
+    Each sector is committed with "candles" and "history" checkpoints.
+
+    Args:
+        db: Database session
+        sectors_dict: Dictionary of sector IDs to Sector objects
+        days: Number of days of data to generate
+        points_per_day: Number of data points per day
+        workers: Number of worker processes
+        batch_size: Maximum number of rows per INSERT
+        seed: Run seed for reproducible candles (optional)
+
+    Returns:
+        Tuple of (candles written, bars written)
+    """
+    start_time = datetime.now(timezone.utc) - timedelta(days=days)
+    specs = (
+        (sector_id, sector.currentPrice, sector.changePercent, start_time, days, points_per_day, seed)
+        for sector_id, sector in sectors_dict.items()
+    )
+    writer = CheckpointedWriter(
+        db, ["candles", "history"], [SectorCandle.__table__, SectorOHLCV.__table__], batch_size
+    )
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        series = imap_bounded(executor, _generate_sector_candles, specs, workers * TASKS_PER_WORKER)
+        for sector_id, (candles, bars) in zip(sectors_dict, series):
+            writer.add(sector_id, candles, bars)
+
+    writer.flush()
+    return writer.totals[0], writer.totals[1]
@@ -5,20 +5,55 @@ Replicates the frontend mock data structure:
 - 6 sectors (tech, healthcare, finance, energy, consumer, industrial)
 - Agents with personality, status, performance, trades
 - Discussions with messages and statuses
-- Candle data (288 points per day)
+- Candle data (288 points per day) and its downsampled history bars
+
+Dataset size is configurable through `run_seed` (and the CLI) so the same
+code seeds both the demo dataset and large load-test databases. With a
+seed, every sector draws from its own random streams, so the generated
+data does not depend on sector order or on how work is split across
+worker processes.
+
+Seeding is resumable: every phase commits with per-sector checkpoints
+(see `app.seed.checkpoints`), and rows are upserted or skipped by key.
 """
 
-import random
+import math
 import uuid
 from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import Collection, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+from sqlalchemy import Table, bindparam, delete, func, select, update
 from sqlalchemy.orm import Session
 
 from app.models.sector import Sector
 from app.models.agent import Agent
 from app.models.discussion import Discussion, DiscussionMessage
 from app.models.sector_candle import SectorCandle
+from app.models.sector_ohlcv import SectorOHLCV
 from app.models.base import Base
+from app.seed.checkpoints import (
+    PHASES,
+    RUN_MARKER,
+    CheckpointedWriter,
+    clear_checkpoints,
+    completed_sectors,
+    has_checkpoints,
+    mark_completed,
+    run_marker,
+)
+from app.services.candle_aggregation import RESOLUTIONS, bucket_end, from_epoch, to_epoch
+from app.services.candle_history import iter_history_rows, rebuild_history
+from app.services.candle_persistence import (
+    BULK_CHUNK_ROWS,
+    as_utc,
+    dialect_insert,
+    insert_candles,
+    insert_ohlcv,
+    iter_chunks,
+    merge_ohlcv,
+)
+from app.services.random_streams import stream_rng
 
 
 # Sector definitions matching frontend
@@ -31,6 +66,12 @@ SECTORS = [
     {"id": "industrial", "name": "Industrial", "symbol": "INDU"},
 ]
 
+# Default dataset scale
+DEFAULT_AGENTS_PER_SECTOR = 5
+DEFAULT_DISCUSSIONS_PER_SECTOR = 3
+DEFAULT_DAYS = 7
+DEFAULT_POINTS_PER_DAY = 288
+
 # Agent configuration
 AGENT_STATUSES = ["active", "idle", "processing"]
 RISK_LEVELS = ["Low", "Medium", "High", "Aggressive"]
@@ -62,316 +103,870 @@ MESSAGE_TEMPLATES = [
 ]
 
 
-def generate_line_data(base_price: float, points: int = 288, trend: str = "neutral") -> List[float]:
+# Per-point drift of each candle trend
+TREND_MULTIPLIERS = {
+    "up": 1.001,
+    "down": 0.999,
+    "neutral": 1.0
+}
+
+
+def generate_line_paths(
+    base_prices: Union[float, Sequence[float], np.ndarray],
+    points: int = 288,
+    trends: Union[str, Sequence[str]] = "neutral",
+    rng: Optional[np.random.Generator] = None
+) -> np.ndarray:
+    """
+    Generate many synthetic candle series at once.
+    
+    Each series is a random walk with slight trend: every step multiplies
+    the running price by (trend multiplier + U(-0.02, 0.02)). Emitted values
+    are floored at half the starting price to prevent negative prices; the
+    floor does not feed back into the walk.
+    
+    Args:
+        base_prices: Starting price of each series
+        points: Number of points per series (default 288 for one day)
+        trends: "up", "down" or "neutral", for all series or per series
+        rng: NumPy random generator (pass a seeded one for reproducible output)
+    
+    Returns:
+        Array of shape (len(base_prices), points)
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    base = np.atleast_1d(np.asarray(base_prices, dtype=np.float64))
+    if isinstance(trends, str):
+        trends = [trends] * len(base)
+    multipliers = np.array([TREND_MULTIPLIERS.get(trend, 1.0) for trend in trends])
+    
+    paths = np.empty((len(base), points))
+    if points == 0:
+        return paths
+    paths[:, 0] = base
+    
+    if points > 1:
+        step_factors = rng.uniform(-0.02, 0.02, size=(len(base), points - 1))
+        step_factors += multipliers[:, None]
+        walk = base[:, None] * np.cumprod(step_factors, axis=1)
+        paths[:, 1:] = np.maximum(walk, base[:, None] * 0.5)
+    
+    return paths
+
+
+def generate_line_data(
+    base_price: float,
+    points: int = 288,
+    trend: str = "neutral",
+    rng: Optional[np.random.Generator] = None
+) -> List[float]:
     """
     Generate synthetic candle data points.
     
+    Single-series wrapper around `generate_line_paths`.
+    
     Args:
         base_price: Starting price
         points: Number of points to generate (default 288 for one day)
         trend: "up", "down", or "neutral"
+        rng: NumPy random generator (optional, for reproducible output)
     
     Returns:
         List of price values
     """
-    values = [base_price]
-    current = base_price
-    
-    # Trend multipliers
-    trend_multiplier = {
-        "up": 1.001,
-        "down": 0.999,
-        "neutral": 1.0
-    }.get(trend, 1.0)
-    
-    for _ in range(points - 1):
-        # Random walk with slight trend
-        change = random.uniform(-0.02, 0.02) * current
-        current = current * trend_multiplier + change
-        values.append(max(current, base_price * 0.5))  # Prevent negative prices
-    
-    return values
+    return generate_line_paths(base_price, points, trend, rng)[0].tolist()
+
+
+def _choice(rng: np.random.Generator, options: Sequence):
+    """Pick one element of a sequence with a NumPy generator."""
+    return options[int(rng.integers(len(options)))]
+
 
+def _uuid(rng: np.random.Generator) -> str:
+    """Random (version 4) UUID drawn from a NumPy generator."""
+    return str(uuid.UUID(bytes=rng.bytes(16), version=4))
 
-def generate_agent_personality(role: str) -> dict:
+
+def generate_agent_personality(role: str, rng: Optional[np.random.Generator] = None) -> dict:
     """
     Generate agent personality based on role.
     
     Args:
         role: Agent role
+        rng: NumPy random generator (optional, for reproducible output)
     
     Returns:
         Personality dictionary
     """
-    # Role-based personality templates
+    rng = rng if rng is not None else np.random.default_rng()
+    
+    # Role-based personality templates; only the selected one draws randomness
     templates = {
-        "trader": {
-            "riskTolerance": random.choice(["Medium", "High", "Aggressive"]),
-            "decisionStyle": random.choice(["Analytical", "Intuitive"]),
+        "trader": lambda: {
+            "riskTolerance": _choice(rng, ["Medium", "High", "Aggressive"]),
+            "decisionStyle": _choice(rng, ["Analytical", "Intuitive"]),
             "communicationStyle": "direct",
         },
-        "analyst": {
-            "riskTolerance": random.choice(["Low", "Medium"]),
+        "analyst": lambda: {
+            "riskTolerance": _choice(rng, ["Low", "Medium"]),
             "decisionStyle": "Analytical",
             "communicationStyle": "detailed",
         },
-        "manager": {
+        "manager": lambda: {
             "riskTolerance": "Medium",
             "decisionStyle": "Balanced",
             "communicationStyle": "authoritative",
         },
-        "advisor": {
-            "riskTolerance": random.choice(["Low", "Medium"]),
+        "advisor": lambda: {
+            "riskTolerance": _choice(rng, ["Low", "Medium"]),
             "decisionStyle": "Conservative",
             "communicationStyle": "persuasive",
         },
-        "arbitrage": {
+        "arbitrage": lambda: {
             "riskTolerance": "Low",
             "decisionStyle": "Analytical",
             "communicationStyle": "technical",
         },
-        "general": {
-            "riskTolerance": random.choice(RISK_LEVELS),
-            "decisionStyle": random.choice(DECISION_STYLES),
+        "general": lambda: {
+            "riskTolerance": _choice(rng, RISK_LEVELS),
+            "decisionStyle": _choice(rng, DECISION_STYLES),
             "communicationStyle": "neutral",
         },
     }
     
-    return templates.get(role, templates["general"])
+    return templates.get(role, templates["general"])()
 
 
-def seed_sectors(db: Session) -> dict[str, Sector]:
+def build_sector_definitions(count: int = len(SECTORS)) -> List[dict]:
     """
-    Seed sectors table with 6 predefined sectors.
+    Build sector definitions for the requested number of sectors.
+    
+    The 6 predefined sectors come first; any additional sectors are
+    synthetic ones with sequential IDs.
+    
+    Args:
+        count: Total number of sectors
+    
+    Returns:
+        List of sector definition dicts (id, name, symbol)
+    """
+    definitions = SECTORS[:count]
+    for i in range(len(definitions), count):
+        definitions.append({
+            "id": f"sector-{i + 1:05d}",
+            "name": f"Synthetic Sector {i + 1}",
+            "symbol": f"S{i + 1:05d}",
+        })
+    return definitions
+
+
+def seed_sectors(
+    db: Session,
+    sector_count: int = len(SECTORS),
+    seed: Optional[int] = None,
+    skip: Collection[str] = ()
+) -> dict[str, Sector]:
+    """
+    Seed sectors table with the predefined sectors, plus synthetic ones
+    when more than 6 are requested.
+    
+    Sectors are upserted by ID, so seeding over existing sectors updates
+    them instead of failing.
     
     Args:
         db: Database session
+        sector_count: Number of sectors to create
+        seed: Run seed for reproducible prices (optional)
+        skip: Sector IDs that are already seeded and left untouched
     
     Returns:
-        Dictionary mapping sector IDs to Sector objects
+        Dictionary mapping sector IDs to Sector objects, for all
+        `sector_count` sectors
     """
-    sectors_dict = {}
+    definitions = build_sector_definitions(sector_count)
+    rows = []
     
-    for sector_data in SECTORS:
+    for sector_data in definitions:
+        if sector_data["id"] in skip:
+            continue
+        rng = stream_rng(seed, sector_data["id"], "sector")
+        
         # Generate random price data
-        base_price = random.uniform(100, 1000)
-        change = random.uniform(-50, 50)
+        base_price = rng.uniform(100, 1000)
+        change = rng.uniform(-50, 50)
         change_percent = (change / base_price) * 100
-        volume = random.randint(100000, 10000000)
+        volume = int(rng.integers(100000, 10000000, endpoint=True))
         
-        sector = Sector(
-            id=sector_data["id"],
-            name=sector_data["name"],
-            symbol=sector_data["symbol"],
-            currentPrice=base_price,
-            change=change,
-            changePercent=change_percent,
-            volume=volume,
-            createdAt=datetime.now(timezone.utc),
-        )
-        db.add(sector)
-        sectors_dict[sector_data["id"]] = sector
+        rows.append({
+            "id": sector_data["id"],
+            "name": sector_data["name"],
+            "symbol": sector_data["symbol"],
+            "currentPrice": base_price,
+            "change": change,
+            "changePercent": change_percent,
+            "volume": volume,
+            "createdAt": datetime.now(timezone.utc),
+        })
     
+    for chunk in iter_chunks(rows):
+        _upsert_sectors(db, chunk)
+        mark_completed(db, "sectors", {row["id"]: 1 for row in chunk})
     db.commit()
-    return sectors_dict
+    
+    loaded = {}
+    for chunk in iter_chunks([sector_data["id"] for sector_data in definitions]):
+        loaded.update((sector.id, sector) for sector in db.query(Sector).filter(Sector.id.in_(chunk)))
+    return {sector_data["id"]: loaded[sector_data["id"]] for sector_data in definitions}
+
+
+def _upsert_sectors(db: Session, rows: List[dict]) -> None:
+    """Insert sectors, updating the generated columns of existing ones."""
+    table = Sector.__table__
+    columns = ("name", "symbol", "currentPrice", "change", "changePercent", "volume")
+    insert = dialect_insert(db)
+    
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={column: stmt.excluded[column] for column in columns},
+        )
+        db.execute(stmt, rows)
+        return
+    
+    existing = set(db.execute(select(table.c.id).where(table.c.id.in_([row["id"] for row in rows]))).scalars())
+    updates = [row for row in rows if row["id"] in existing]
+    if updates:
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values({column: bindparam(f"b_{column}") for column in columns})
+        )
+        db.execute(stmt, [{f"b_{key}": row[key] for key in ["id", *columns]} for row in updates])
+    new_rows = [row for row in rows if row["id"] not in existing]
+    if new_rows:
+        db.execute(table.insert(), new_rows)
+
+
+def generate_agent_rows(
+    sector_id: str,
+    agents_per_sector: int = DEFAULT_AGENTS_PER_SECTOR,
+    rng: Optional[np.random.Generator] = None
+) -> List[dict]:
+    """
+    Generate agent records for one sector as plain dicts.
+    
+    Args:
+        sector_id: Sector the agents belong to
+        agents_per_sector: Number of agents to generate
+        rng: NumPy random generator (optional, for reproducible output)
+    
+    Returns:
+        List of agent column dicts
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    rows = []
+    
+    for i in range(agents_per_sector):
+        role = _choice(rng, AGENT_ROLES)
+        rows.append({
+            "id": _uuid(rng),
+            "name": f"{role.capitalize()} Agent {i+1}",
+            "role": role,
+            "status": _choice(rng, AGENT_STATUSES),
+            "performance": float(rng.uniform(-10.0, 15.0)),  # Performance percentage
+            "trades": int(rng.integers(0, 100, endpoint=True)),
+            "sectorId": sector_id,
+            "personality": generate_agent_personality(role, rng),
+            "createdAt": datetime.now(timezone.utc) - timedelta(days=int(rng.integers(0, 30, endpoint=True))),
+        })
+    
+    return rows
+
+
+def generate_discussion_rows(
+    sector_id: str,
+    sector_agents: List[dict],
+    discussions_per_sector: int = DEFAULT_DISCUSSIONS_PER_SECTOR,
+    rng: Optional[np.random.Generator] = None
+) -> tuple[List[dict], List[dict], List[tuple[str, str]]]:
+    """
+    Generate discussions, their messages and agent links for one sector.
+    
+    Args:
+        sector_id: Sector the discussions belong to
+        sector_agents: Agent dicts (at least `id` and `name`) of the sector
+        discussions_per_sector: Number of discussions to generate
+        rng: NumPy random generator (optional, for reproducible output)
+    
+    Returns:
+        Tuple of (discussion dicts, message dicts, (discussion_id, agent_id) links)
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    discussions = []
+    messages = []
+    links = []
+    
+    if not sector_agents:
+        return discussions, messages, links
+    
+    # Pick agents in ID order, so the same agents give the same
+    # discussions whether they were just generated or read back
+    sector_agents = sorted(sector_agents, key=lambda agent: agent["id"])
+    
+    for i in range(discussions_per_sector):
+        discussion_id = _uuid(rng)
+        
+        # Random creation time within last 7 days
+        days_ago = int(rng.integers(0, 7, endpoint=True))
+        created_at = datetime.now(timezone.utc) - timedelta(days=days_ago)
+        updated_at = created_at + timedelta(hours=int(rng.integers(1, 48, endpoint=True)))
+        
+        discussions.append({
+            "id": discussion_id,
+            "sectorId": sector_id,
+            "title": _choice(rng, DISCUSSION_TITLES),
+            "status": _choice(rng, DISCUSSION_STATUSES),
+            "createdAt": created_at,
+            "updatedAt": updated_at,
+        })
+        
+        # Add 3-8 messages per discussion
+        num_messages = int(rng.integers(3, 8, endpoint=True))
+        picks = rng.choice(len(sector_agents), size=min(num_messages, len(sector_agents)), replace=False)
+        selected_agents = [sector_agents[k] for k in picks.tolist()]
+        
+        for j, agent in enumerate(selected_agents):
+            messages.append({
+                "id": _uuid(rng),
+                "discussionId": discussion_id,
+                "agentId": agent["id"],
+                "agentName": agent["name"],
+                "content": _choice(rng, MESSAGE_TEMPLATES),
+                "timestamp": created_at + timedelta(minutes=int(rng.integers(5, 60 * (j + 1), endpoint=True))),
+            })
+            links.append((discussion_id, agent["id"]))
+    
+    return discussions, messages, links
 
 
-def seed_agents(db: Session, sectors_dict: dict[str, Sector], agents_per_sector: int = 5) -> dict[str, Agent]:
+def seed_agents(
+    db: Session,
+    sectors_dict: dict[str, Sector],
+    agents_per_sector: int = DEFAULT_AGENTS_PER_SECTOR,
+    batch_size: int = BULK_CHUNK_ROWS,
+    seed: Optional[int] = None
+) -> int:
     """
     Seed agents table with synthetic agents.
     
+    Agents are bulk inserted and committed with an "agents" checkpoint
+    per sector.
+    
     Args:
         db: Database session
         sectors_dict: Dictionary of sector IDs to Sector objects
         agents_per_sector: Number of agents per sector
+        batch_size: Buffered rows that trigger a write
+        seed: Run seed for reproducible agents (optional)
     
     Returns:
-        Dictionary mapping agent IDs to Agent objects
+        Number of agents created
     """
-    agents_dict = {}
+    writer = CheckpointedWriter(db, ["agents"], [Agent.__table__], batch_size)
     
-    for sector_id, sector in sectors_dict.items():
-        for i in range(agents_per_sector):
-            agent_id = str(uuid.uuid4())
-            role = random.choice(AGENT_ROLES)
-            personality = generate_agent_personality(role)
-            
-            agent = Agent(
-                id=agent_id,
-                name=f"{role.capitalize()} Agent {i+1}",
-                role=role,
-                status=random.choice(AGENT_STATUSES),
-                performance=random.uniform(-10.0, 15.0),  # Performance percentage
-                trades=random.randint(0, 100),
-                sectorId=sector_id,
-                personality=personality,
-                createdAt=datetime.now(timezone.utc) - timedelta(days=random.randint(0, 30)),
-            )
-            db.add(agent)
-            agents_dict[agent_id] = agent
+    for sector_id in sectors_dict:
+        rng = stream_rng(seed, sector_id, "agents")
+        writer.add(sector_id, generate_agent_rows(sector_id, agents_per_sector, rng))
     
-    db.commit()
-    return agents_dict
+    writer.flush()
+    return writer.totals[0]
+
+
+def discussion_agents_table() -> tuple[Table, str, str]:
+    """
+    Return the discussion/agent association table and its two key columns.
+    
+    Returns:
+        Tuple of (table, discussion column key, agent column key)
+    """
+    table = Base.metadata.tables["discussion_agents"]
+    
+    def column_for(target: str) -> str:
+        for column in table.c:
+            if any(fk.column.table.name == target for fk in column.foreign_keys):
+                return column.key
+        raise LookupError(f"discussion_agents has no foreign key to {target}")
+    
+    return table, column_for("discussions"), column_for("agents")
 
 
 def seed_discussions(
     db: Session,
     sectors_dict: dict[str, Sector],
-    agents_dict: dict[str, Agent],
-    discussions_per_sector: int = 3
-) -> dict[str, Discussion]:
+    discussions_per_sector: int = DEFAULT_DISCUSSIONS_PER_SECTOR,
+    batch_size: int = BULK_CHUNK_ROWS,
+    seed: Optional[int] = None
+) -> int:
     """
     Seed discussions table with synthetic discussions and messages.
     
+    Discussions, messages and agent links are generated as plain rows and
+    bulk inserted with chunked Core INSERTs, committed with a
+    "discussions" checkpoint per sector. IDs are generated up front, so
+    nothing is flushed and no ORM objects are created. Participants are
+    the sector's agents in the database.
+    
     Args:
         db: Database session
         sectors_dict: Dictionary of sector IDs to Sector objects
-        agents_dict: Dictionary of agent IDs to Agent objects
         discussions_per_sector: Number of discussions per sector
+        batch_size: Buffered rows (over all tables) that trigger a write
+        seed: Run seed for reproducible discussions (optional)
     
     Returns:
-        Dictionary mapping discussion IDs to Discussion objects
+        Number of discussions created
     """
-    discussions_dict = {}
-    
     # Get agents grouped by sector
     agents_by_sector = {}
-    for agent_id, agent in agents_dict.items():
-        if agent.sectorId not in agents_by_sector:
-            agents_by_sector[agent.sectorId] = []
-        agents_by_sector[agent.sectorId].append(agent)
+    for chunk in iter_chunks(list(sectors_dict)):
+        for sector_id, agent_id, name in db.execute(
+            select(Agent.sectorId, Agent.id, Agent.name).where(Agent.sectorId.in_(chunk))
+        ):
+            agents_by_sector.setdefault(sector_id, []).append({"id": agent_id, "name": name})
     
-    for sector_id, sector in sectors_dict.items():
-        sector_agents = agents_by_sector.get(sector_id, [])
-        if not sector_agents:
-            continue
+    link_table, discussion_key, agent_key = discussion_agents_table()
+    # Insert order respects foreign keys between the tables
+    writer = CheckpointedWriter(
+        db, ["discussions"], [Discussion.__table__, DiscussionMessage.__table__, link_table], batch_size
+    )
+    
+    for sector_id in sectors_dict:
+        discussions, messages, links = generate_discussion_rows(
+            sector_id,
+            agents_by_sector.get(sector_id, []),
+            discussions_per_sector,
+            stream_rng(seed, sector_id, "discussions"),
+        )
+        writer.add(
+            sector_id,
+            discussions,
+            messages,
+            ({discussion_key: discussion_id, agent_key: agent_id} for discussion_id, agent_id in links),
+        )
+    
+    writer.flush()
+    return writer.totals[0]
+
+
+def _candle_trend(change_percent: float) -> str:
+    """Determine the candle trend from a sector's change percentage."""
+    if change_percent > 2:
+        return "up"
+    if change_percent < -2:
+        return "down"
+    return "neutral"
+
+
+def iter_sector_candle_rows(
+    sector_id: str,
+    base_price: float,
+    change_percent: float,
+    start_time: datetime,
+    days: int = DEFAULT_DAYS,
+    points_per_day: int = DEFAULT_POINTS_PER_DAY,
+    rng: Optional[np.random.Generator] = None
+) -> Iterator[dict]:
+    """
+    Lazily generate the candle rows of one sector.
+    
+    All days are generated as one array; every day restarts from the
+    base price.
+    
+    Args:
+        sector_id: Sector ID
+        base_price: Starting price of every day
+        change_percent: Sector change percentage (selects the trend)
+        start_time: Timestamp of the first candle
+        days: Number of days of data to generate
+        points_per_day: Number of data points per day (default 288 = 5-minute intervals)
+        rng: NumPy random generator (optional, for reproducible output)
+    
+    Yields:
+        Candle dicts with `timestamp`, `sectorId` and `value`
+    """
+    trend = _candle_trend(change_percent)
+    paths = generate_line_paths(np.full(days, base_price), points_per_day, trend, rng)
+    
+    # Create candle entries (one per 5 minutes = 288 per day)
+    interval_minutes = (24 * 60) / points_per_day
+    
+    for day in range(days):
+        day_start = start_time + timedelta(days=day)
         
-        for i in range(discussions_per_sector):
-            discussion_id = str(uuid.uuid4())
-            
-            # Random creation time within last 7 days
-            days_ago = random.randint(0, 7)
-            created_at = datetime.now(timezone.utc) - timedelta(days=days_ago)
-            updated_at = created_at + timedelta(hours=random.randint(1, 48))
-            
-            discussion = Discussion(
-                id=discussion_id,
-                sectorId=sector_id,
-                title=random.choice(DISCUSSION_TITLES),
-                status=random.choice(DISCUSSION_STATUSES),
-                createdAt=created_at,
-                updatedAt=updated_at,
-            )
-            db.add(discussion)
-            db.flush()  # Flush to get the ID
-            
-            # Add 3-8 messages per discussion
-            num_messages = random.randint(3, 8)
-            selected_agents = random.sample(sector_agents, min(num_messages, len(sector_agents)))
-            
-            for j, agent in enumerate(selected_agents):
-                message_id = str(uuid.uuid4())
-                message_time = created_at + timedelta(minutes=random.randint(5, 60 * (j + 1)))
-                
-                message = DiscussionMessage(
-                    id=message_id,
-                    discussionId=discussion_id,
-                    agentId=agent.id,
-                    agentName=agent.name,
-                    content=random.choice(MESSAGE_TEMPLATES),
-                    timestamp=message_time,
-                )
-                db.add(message)
-            
-            # Link agents to discussion
-            discussion.agents = selected_agents
-            discussions_dict[discussion_id] = discussion
+        for i, price in enumerate(paths[day].tolist()):
+            yield {
+                "timestamp": day_start + timedelta(minutes=i * interval_minutes),
+                "sectorId": sector_id,
+                "value": price,
+            }
+
+
+def generate_sector_series(
+    sector_id: str,
+    base_price: float,
+    change_percent: float,
+    start_time: datetime,
+    days: int = DEFAULT_DAYS,
+    points_per_day: int = DEFAULT_POINTS_PER_DAY,
+    rng: Optional[np.random.Generator] = None,
+    until: Optional[datetime] = None
+) -> tuple[List[dict], List[dict]]:
+    """
+    Generate the candle rows of one sector and their history bars.
     
-    db.commit()
-    return discussions_dict
+    Bars are derived from the generated values with `iter_history_rows`,
+    as `rebuild_history` would derive them from the stored candles, so
+    they are written together with the candles instead of being read back.
+    
+    Args:
+        sector_id: Sector ID
+        base_price: Starting price of every day
+        change_percent: Sector change percentage (selects the trend)
+        start_time: Timestamp of the first candle
+        days: Number of days of data to generate
+        points_per_day: Number of data points per day (default 288 = 5-minute intervals)
+        rng: NumPy random generator (optional, for reproducible output)
+        until: Drop candles at or after this time (optional)
+    
+    Returns:
+        Tuple of (candle dicts, bar dicts with all SectorOHLCV columns)
+    """
+    candles = [
+        row for row in iter_sector_candle_rows(
+            sector_id, base_price, change_percent, start_time, days, points_per_day, rng
+        )
+        if until is None or row["timestamp"] < until
+    ]
+    timestamps = np.fromiter((to_epoch(row["timestamp"]) for row in candles), dtype=np.int64, count=len(candles))
+    values = np.fromiter((row["value"] for row in candles), dtype=np.float64, count=len(candles))
+    return candles, list(iter_history_rows(sector_id, timestamps, values))
 
 
 def seed_candles(
     db: Session,
     sectors_dict: dict[str, Sector],
-    days: int = 7,
-    points_per_day: int = 288
-) -> None:
+    days: int = DEFAULT_DAYS,
+    points_per_day: int = DEFAULT_POINTS_PER_DAY,
+    batch_size: int = BULK_CHUNK_ROWS,
+    seed: Optional[int] = None
+) -> tuple[int, int]:
     """
-    Seed sector_candles table with synthetic candle data.
+    Seed sector_candles table with synthetic candle data and its history bars.
+    
+    Candles and bars are written with Core multi-row INSERTs of at most
+    `batch_size` rows and committed with "candles" and "history"
+    checkpoints per sector, so memory use is bounded by the history of a
+    few sectors.
     
     Args:
         db: Database session
         sectors_dict: Dictionary of sector IDs to Sector objects
         days: Number of days of data to generate
         points_per_day: Number of data points per day (default 288 = 5-minute intervals)
+        batch_size: Maximum number of rows per INSERT
+        seed: Run seed for reproducible candles (optional)
+    
+    Returns:
+        Tuple of (candles written, bars written)
     """
+    start_time = datetime.now(timezone.utc) - timedelta(days=days)
+    writer = CheckpointedWriter(
+        db, ["candles", "history"], [SectorCandle.__table__, SectorOHLCV.__table__], batch_size
+    )
+    
     for sector_id, sector in sectors_dict.items():
-        base_price = sector.currentPrice
-        current_time = datetime.now(timezone.utc) - timedelta(days=days)
-        
-        # Determine trend based on sector change
-        if sector.changePercent > 2:
-            trend = "up"
-        elif sector.changePercent < -2:
-            trend = "down"
-        else:
-            trend = "neutral"
-        
-        for day in range(days):
-            # Generate points for this day
-            day_start = current_time + timedelta(days=day)
-            prices = generate_line_data(base_price, points_per_day, trend)
-            
-            # Create candle entries (one per 5 minutes = 288 per day)
-            interval_minutes = (24 * 60) / points_per_day
-            
-            for i, price in enumerate(prices):
-                timestamp = day_start + timedelta(minutes=i * interval_minutes)
-                
-                candle = SectorCandle(
-                    timestamp=timestamp,
-                    sectorId=sector_id,
-                    value=price,
-                )
-                db.add(candle)
+        writer.add(sector_id, *generate_sector_series(
+            sector_id,
+            sector.currentPrice,
+            sector.changePercent,
+            start_time,
+            days,
+            points_per_day,
+            stream_rng(seed, sector_id, "candles"),
+        ))
+    
+    writer.flush()
+    return writer.totals[0], writer.totals[1]
+
+
+def append_candles(
+    db: Session,
+    days: int,
+    points_per_day: int = DEFAULT_POINTS_PER_DAY,
+    batch_size: int = BULK_CHUNK_ROWS,
+    seed: Optional[int] = None
+) -> tuple[int, int, List[str]]:
+    """
+    Add `days` of older candle history, with its bars, to every sector in
+    the database.
+    
+    Candles are generated before each sector's earliest candle, so no
+    existing data is regenerated. Their bars are inserted without touching
+    stored ones (bars of live ticks or compacted by retention may have no
+    raw candles to rebuild them from); only the bucket of each resolution
+    holding the earliest candle is merged with the new bar before it. The
+    new start of history is recorded before any candle is written and each
+    sector is committed as a whole, so running an interrupted append again
+    completes it to the same start.
+    
+    Args:
+        db: Database session
+        days: Days of history to add
+        points_per_day: Candles per day (288 = 5-minute intervals)
+        batch_size: Maximum number of rows per INSERT
+        seed: Run seed for reproducible candles (optional)
+    
+    Returns:
+        Tuple of (candles written, bars written, IDs of the extended sectors)
+    """
+    now = datetime.now(timezone.utc)
+    sectors = db.query(Sector).order_by(Sector.id).all()
+    earliest = {
+        sector_id: as_utc(timestamp)
+        for sector_id, timestamp in db.execute(
+            select(SectorCandle.sectorId, func.min(SectorCandle.timestamp)).group_by(SectorCandle.sectorId)
+        )
+    }
+    
+    target = run_marker(db, "append")
+    if target is None:
+        target = min(earliest.values(), default=now) - timedelta(days=days)
+        mark_completed(db, "append", {RUN_MARKER: 0}, target)
+        db.commit()
+    else:
+        print(f"Resuming unfinished candle append to {target}")
+    
+    interval = timedelta(days=1) / points_per_day
+    candles: List[dict] = []
+    bars: List[dict] = []
+    boundary: List[dict] = []
+    totals = [0, 0]
+    extended = []
+    
+    def flush() -> None:
+        totals[0] += insert_candles(db, candles, batch_size, skip_existing=True)
+        totals[1] += insert_ohlcv(db, bars, batch_size, skip_existing=True)
+        merge_ohlcv(db, boundary, earlier=True)
+        totals[1] += len(boundary)
+        db.commit()
+        for rows in (candles, bars, boundary):
+            rows.clear()
+    
+    for sector in sectors:
+        until = earliest.get(sector.id, now)
+        if until - target < interval:
+            continue
+        span_days = math.ceil((until - target) / timedelta(days=1))
+        sector_candles, sector_bars = generate_sector_series(
+            sector.id,
+            sector.currentPrice,
+            sector.changePercent,
+            target,
+            span_days,
+            points_per_day,
+            stream_rng(seed, sector.id, f"candles-before-{int(target.timestamp())}"),
+            until=until,
+        )
+        boundary_buckets = {
+            resolution: from_epoch(int(bucket_end(to_epoch(until), seconds)))
+            for resolution, seconds in RESOLUTIONS.items()
+        }
+        candles.extend(sector_candles)
+        for bar in sector_bars:
+            (boundary if bar["timestamp"] == boundary_buckets[bar["resolution"]] else bars).append(bar)
+        extended.append(sector.id)
+        if len(candles) + len(bars) >= batch_size:
+            flush()
+    
+    flush()
+    clear_checkpoints(db, [RUN_MARKER], ["append"])
+    db.commit()
+    return totals[0], totals[1], extended
+
+
+def seed_history(db: Session, sector_ids: Sequence[str], batch_size: int = BULK_CHUNK_ROWS) -> int:
+    """
+    Rebuild the downsampled history bars of sectors from their stored candles.
+    
+    Only needed for sectors whose candles were written without bars;
+    seeded candles come with their bars. Each sector is committed with a
+    "history" checkpoint.
+    
+    Args:
+        db: Database session
+        sector_ids: Sectors to build bars for
+        batch_size: Maximum rows per INSERT
+    
+    Returns:
+        Number of bars written
+    """
+    total = 0
+    for sector_id in sector_ids:
+        count = rebuild_history(db, [sector_id], batch_size)
+        mark_completed(db, "history", {sector_id: count})
+        db.commit()
+        total += count
+    return total
+
+
+def clear_seed_data(db: Session, sector_ids: Sequence[str]) -> None:
+    """
+    Delete seeded agents, discussions, candles and bars of sectors, and
+    all seed checkpoints, so they are seeded from scratch. Sector rows are
+    kept and upserted by the next seed.
     
+    Args:
+        db: Database session
+        sector_ids: Sectors to clear
+    """
+    link_table, discussion_key, _ = discussion_agents_table()
+    
+    for chunk in iter_chunks(list(sector_ids)):
+        discussions = select(Discussion.id).where(Discussion.sectorId.in_(chunk))
+        db.execute(delete(link_table).where(link_table.c[discussion_key].in_(discussions)))
+        db.execute(delete(DiscussionMessage).where(DiscussionMessage.discussionId.in_(discussions)))
+        db.execute(delete(Discussion).where(Discussion.sectorId.in_(chunk)))
+        db.execute(delete(Agent).where(Agent.sectorId.in_(chunk)))
+        db.execute(delete(SectorOHLCV).where(SectorOHLCV.sectorId.in_(chunk)))
+        db.execute(delete(SectorCandle).where(SectorCandle.sectorId.in_(chunk)))
+    clear_checkpoints(db)
     db.commit()
 
 
-def run_seed(db: Session, force: bool = False) -> None:
+def run_seed(
+    db: Session,
+    force: bool = False,
+    sectors: int = len(SECTORS),
+    agents_per_sector: int = DEFAULT_AGENTS_PER_SECTOR,
+    discussions_per_sector: int = DEFAULT_DISCUSSIONS_PER_SECTOR,
+    days: int = DEFAULT_DAYS,
+    points_per_day: int = DEFAULT_POINTS_PER_DAY,
+    batch_size: int = BULK_CHUNK_ROWS,
+    workers: int = 1,
+    append_days: int = 0,
+    seed: Optional[int] = None
+) -> None:
     """
     Main seed function that orchestrates all seeding operations.
     
+    Every phase commits its rows with per-sector checkpoints, so running
+    the seed again after an interruption resumes where it stopped, and
+    running it on a completely seeded database does nothing. Databases
+    seeded before checkpoints existed are left alone unless forced.
+    
     Args:
         db: Database session
-        force: If True, skip idempotency check and seed anyway
+        force: If True, clear previously seeded data and seed from scratch
+        sectors: Number of sectors (the first 6 are the predefined ones)
+        agents_per_sector: Number of agents per sector
+        discussions_per_sector: Number of discussions per sector
+        days: Days of candle history per sector
+        points_per_day: Candles per day (288 = 5-minute intervals)
+        batch_size: Maximum rows per bulk INSERT
+        workers: Worker processes for generating records and candles;
+            1 generates everything in-process
+        append_days: Days of older candle history to add to every sector
+            after seeding (see `append_candles`)
+        seed: Run seed; the same seed reproduces the same dataset
     """
-    # Idempotency check: if sectors exist, skip seeding
-    existing_sectors = db.query(Sector).first()
-    if existing_sectors and not force:
+    sector_ids = [sector_data["id"] for sector_data in build_sector_definitions(sectors)]
+    
+    if force:
+        print("Clearing previously seeded data...")
+        clear_seed_data(db, sector_ids)
+    elif not has_checkpoints(db) and db.query(Sector).first() is not None:
         print("Sectors already exist in database. Skipping seed.")
         print("To force re-seeding, use force=True or delete existing data first.")
+        if append_days:
+            _append_history(db, append_days, points_per_day, batch_size, seed)
         return
     
-    print("Starting seed process...")
+    pending = {phase: set(sector_ids) - completed_sectors(db, phase) for phase in PHASES}
+    # Discussions reference agents and bars are built from candles
+    pending["discussions"] |= pending["agents"]
+    pending["history"] |= pending["candles"]
     
-    # Seed in order: sectors -> agents -> discussions -> candles
-    print("Seeding sectors...")
-    sectors_dict = seed_sectors(db)
-    print(f"Created {len(sectors_dict)} sectors")
-    
-    print("Seeding agents...")
-    agents_dict = seed_agents(db, sectors_dict)
-    print(f"Created {len(agents_dict)} agents")
+    if not any(pending.values()):
+        print("Seed already complete.")
+    else:
+        done = len(sector_ids) - len(set().union(*pending.values()))
+        if done or len(pending["sectors"]) < len(sector_ids):
+            print(f"Resuming seed process ({done} of {len(sector_ids)} sectors complete)...")
+        else:
+            print("Starting seed process...")
+        
+        # Seed in order: sectors -> agents -> discussions -> candles with history bars
+        print("Seeding sectors...")
+        sectors_dict = seed_sectors(db, sectors, seed, skip=set(sector_ids) - pending["sectors"])
+        print(f"Created {len(pending['sectors'])} sectors")
+        
+        def pending_sectors(phase: str) -> dict[str, Sector]:
+            return {sector_id: sector for sector_id, sector in sectors_dict.items() if sector_id in pending[phase]}
+        
+        if workers > 1:
+            # Imported here: parallel_seed builds on the generators in this module
+            from app.seed.parallel_seed import seed_candles_parallel, seed_records_parallel
+            
+            print(f"Seeding agents and discussions with {workers} workers...")
+            agent_count, discussion_count = seed_records_parallel(
+                db, list(pending_sectors("agents")), agents_per_sector, discussions_per_sector, workers, batch_size, seed
+            )
+            # Sectors whose agents exist from an earlier run
+            remaining = {
+                sector_id: sector for sector_id, sector in pending_sectors("discussions").items()
+                if sector_id not in pending["agents"]
+            }
+            discussion_count += seed_discussions(db, remaining, discussions_per_sector, batch_size, seed)
+            print(f"Created {agent_count} agents and {discussion_count} discussions")
+            
+            print(f"Seeding candles with {workers} workers...")
+            candle_count, bar_count = seed_candles_parallel(
+                db, pending_sectors("candles"), days, points_per_day, workers, batch_size, seed
+            )
+            print(f"Created {candle_count} candles and {bar_count} history bars for {len(pending['candles'])} sectors")
+        else:
+            print("Seeding agents...")
+            agent_count = seed_agents(db, pending_sectors("agents"), agents_per_sector, batch_size, seed)
+            print(f"Created {agent_count} agents")
+            
+            print("Seeding discussions...")
+            discussion_count = seed_discussions(
+                db, pending_sectors("discussions"), discussions_per_sector, batch_size, seed
+            )
+            print(f"Created {discussion_count} discussions")
+            
+            print("Seeding candles...")
+            candle_count, bar_count = seed_candles(
+                db, pending_sectors("candles"), days, points_per_day, batch_size, seed
+            )
+            print(f"Created {candle_count} candles and {bar_count} history bars for {len(pending['candles'])} sectors")
     
-    print("Seeding discussions...")
-    discussions_dict = seed_discussions(db, sectors_dict, agents_dict)
-    print(f"Created {len(discussions_dict)} discussions")
+    if append_days:
+        _append_history(db, append_days, points_per_day, batch_size, seed)
     
-    print("Seeding candles...")
-    seed_candles(db, sectors_dict)
-    print("Created candle data for all sectors")
+    # Sectors whose candles were written without bars (e.g. by an older seeder)
+    history_pending = sorted(set(sector_ids) - completed_sectors(db, "history"))
+    if history_pending:
+        print("Building candle history...")
+        bar_count = seed_history(db, history_pending, batch_size)
+        print(f"Created {bar_count} history bars")
     
     print("Seed process completed successfully!")
 
+
+def _append_history(db: Session, days: int, points_per_day: int, batch_size: int, seed: Optional[int]) -> None:
+    """Add older candles and their bars to every sector."""
+    print(f"Appending {days} days of candle history...")
+    candle_count, bar_count, extended = append_candles(db, days, points_per_day, batch_size, seed)
+    print(f"Created {candle_count} candles and {bar_count} history bars for {len(extended)} sectors")
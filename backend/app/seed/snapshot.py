@@ -0,0 +1,341 @@
+"""
+Snapshot fixtures: dump a seeded dataset to one file and load it back.
+
+A snapshot is a compressed NumPy archive (`.npz`). Candles and history
+bars are stored column by column (sector index, epoch microseconds,
+values), so loading them needs no per-row Python objects until the
+database driver: PostgreSQL loads them with COPY, SQLite with a raw
+executemany, other databases with chunked Core INSERTs. Sectors, agents,
+discussions, messages and agent links are small and stored as JSON.
+
+Loading a snapshot is much faster than generating the dataset again,
+which makes it the quickest way to reset a development or CI database.
+"""
+
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator, List
+
+import numpy as np
+from sqlalchemy import DateTime, Table, delete, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.agent import Agent
+from app.models.discussion import Discussion, DiscussionMessage
+from app.models.sector import Sector
+from app.models.sector_candle import SectorCandle
+from app.models.sector_ohlcv import SectorOHLCV
+from app.seed.checkpoints import PHASES, has_checkpoints, mark_completed
+from app.seed.seed_data import clear_seed_data, discussion_agents_table
+from app.services.candle_persistence import as_utc, dialect_insert, insert_rows, iter_chunks
+
+
+SNAPSHOT_VERSION = 1
+
+# Rows read or written per round trip when streaming candles and bars
+SNAPSHOT_CHUNK_ROWS = 200_000
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _record_tables() -> List[Table]:
+    """Tables stored as JSON records, in insert order."""
+    link_table, _, _ = discussion_agents_table()
+    return [Sector.__table__, Agent.__table__, Discussion.__table__, DiscussionMessage.__table__, link_table]
+
+
+def _epoch_us(timestamp: datetime) -> int:
+    return (as_utc(timestamp) - _EPOCH) // _MICROSECOND
+
+
+def _encode_record(row: dict) -> dict:
+    return {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()}
+
+
+def _decode_records(table: Table, rows: List[dict]) -> List[dict]:
+    date_columns = [column.key for column in table.c if isinstance(column.type, DateTime)]
+    for row in rows:
+        for key in date_columns:
+            if row.get(key) is not None:
+                row[key] = datetime.fromisoformat(row[key])
+    return rows
+
+
+def dump_snapshot(db: Session, path: Path) -> dict[str, int]:
+    """
+    Write every sector, agent, discussion, candle and history bar to a snapshot.
+
+    Args:
+        db: Database session
+        path: Snapshot file to write (conventionally `.npz`)
+
+    Returns:
+        Rows dumped per table
+    """
+    counts = {}
+    records = {}
+    for table in _record_tables():
+        rows = [_encode_record(dict(row)) for row in db.execute(select(table)).mappings()]
+        records[table.name] = rows
+        counts[table.name] = len(rows)
+
+    sector_ids = [row["id"] for row in records[Sector.__tablename__]]
+    sector_index = {sector_id: i for i, sector_id in enumerate(sector_ids)}
+    arrays = {}
+
+    candles = _read_columns(
+        db,
+        select(SectorCandle.sectorId, SectorCandle.timestamp, SectorCandle.value),
+        sector_index,
+        1,
+    )
+    arrays.update({"candle_" + name: values for name, values in zip(("sector", "time", "value"), candles)})
+    counts[SectorCandle.__tablename__] = len(candles[0])
+
+    resolutions = sorted({
+        resolution for (resolution,) in db.execute(select(SectorOHLCV.resolution).distinct())
+    })
+    resolution_index = {resolution: i for i, resolution in enumerate(resolutions)}
+    bars = _read_columns(
+        db,
+        select(
+            SectorOHLCV.sectorId,
+            SectorOHLCV.timestamp,
+            SectorOHLCV.resolution,
+            SectorOHLCV.open,
+            SectorOHLCV.high,
+            SectorOHLCV.low,
+            SectorOHLCV.close,
+            SectorOHLCV.volume,
+        ),
+        sector_index,
+        6,
+        resolution_index,
+    )
+    names = ("sector", "time", "resolution", "open", "high", "low", "close", "volume")
+    arrays.update({"bar_" + name: values for name, values in zip(names, bars)})
+    arrays["bar_resolution"] = arrays["bar_resolution"].astype(np.int8)
+    arrays["bar_volume"] = arrays["bar_volume"].astype(np.int64)
+    counts[SectorOHLCV.__tablename__] = len(bars[0])
+
+    header = {"version": SNAPSHOT_VERSION, "createdAt": datetime.now(timezone.utc).isoformat(), "counts": counts}
+    np.savez_compressed(
+        path,
+        header=np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+        records=np.frombuffer(json.dumps(records).encode("utf-8"), dtype=np.uint8),
+        sector_ids=np.array(sector_ids, dtype=str),
+        resolutions=np.array(resolutions, dtype=str),
+        **arrays,
+    )
+    return counts
+
+
+def _read_columns(
+    db: Session,
+    query,
+    sector_index: dict[str, int],
+    value_columns: int,
+    resolution_index: dict[str, int] = None,
+) -> List[np.ndarray]:
+    """
+    Stream (sectorId, timestamp, ...) rows into column arrays.
+
+    Returns sector indexes (int32), epoch microseconds (int64) and one
+    float64 array per remaining column; a resolution column right after
+    the timestamp is mapped through `resolution_index`.
+    """
+    sectors, times = [], []
+    values = [[] for _ in range(value_columns)]
+    result = db.execute(query.execution_options(yield_per=SNAPSHOT_CHUNK_ROWS))
+    for rows in result.partitions():
+        sectors.append(np.fromiter((sector_index[row[0]] for row in rows), dtype=np.int32, count=len(rows)))
+        times.append(np.fromiter((_epoch_us(row[1]) for row in rows), dtype=np.int64, count=len(rows)))
+        for i in range(value_columns):
+            column = 2 + i
+            if i == 0 and resolution_index is not None:
+                values[i].append(np.fromiter((resolution_index[row[column]] for row in rows), dtype=np.float64, count=len(rows)))
+            else:
+                values[i].append(np.fromiter((row[column] for row in rows), dtype=np.float64, count=len(rows)))
+
+    def join(parts: List[np.ndarray], dtype) -> np.ndarray:
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    return [join(sectors, np.int32), join(times, np.int64)] + [join(parts, np.float64) for parts in values]
+
+
+def load_snapshot(db: Session, path: Path, force: bool = False) -> dict[str, int]:
+    """
+    Load a snapshot written by `dump_snapshot` into the database.
+
+    The snapshot's sectors are checkpointed as fully seeded, so a later
+    seed run leaves them alone.
+
+    Args:
+        db: Database session
+        path: Snapshot file
+        force: Clear the seeded data of the snapshot's sectors and replace
+            their sector rows; otherwise loading into a database with
+            sectors is refused
+
+    Returns:
+        Rows loaded per table
+    """
+    with np.load(path) as snapshot:
+        header = json.loads(snapshot["header"].tobytes())
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {header.get('version')}")
+        records = json.loads(snapshot["records"].tobytes())
+        sector_ids = snapshot["sector_ids"]
+        resolutions = snapshot["resolutions"]
+
+        if force:
+            clear_seed_data(db, sector_ids.tolist())
+        elif db.query(Sector).first() is not None or has_checkpoints(db):
+            raise ValueError("Database already contains sectors; load with force to replace them")
+
+        counts = {}
+        for table in _record_tables():
+            rows = _decode_records(table, records.get(table.name, []))
+            if force and table is Sector.__table__:
+                # Sector rows survive clear_seed_data; replace their names and prices
+                counts[table.name] = _upsert_records(db, table, rows)
+            else:
+                counts[table.name] = insert_rows(db, table, rows, skip_existing=force)
+        db.commit()
+
+        counts[SectorCandle.__tablename__] = _copy_columns(
+            db,
+            SectorCandle.__table__,
+            ["sectorId", "timestamp", "value"],
+            sector_ids[snapshot["candle_sector"]],
+            snapshot["candle_time"],
+            [snapshot["candle_value"]],
+        )
+        db.commit()
+
+        counts[SectorOHLCV.__tablename__] = _copy_columns(
+            db,
+            SectorOHLCV.__table__,
+            ["sectorId", "timestamp", "resolution", "open", "high", "low", "close", "volume"],
+            sector_ids[snapshot["bar_sector"]],
+            snapshot["bar_time"],
+            [
+                resolutions[snapshot["bar_resolution"]],
+                snapshot["bar_open"],
+                snapshot["bar_high"],
+                snapshot["bar_low"],
+                snapshot["bar_close"],
+                snapshot["bar_volume"],
+            ],
+        )
+
+    for phase in PHASES:
+        mark_completed(db, phase, {sector_id: 0 for sector_id in sector_ids.tolist()})
+    db.commit()
+    return counts
+
+
+def _upsert_records(db: Session, table: Table, rows: List[dict]) -> int:
+    """Insert rows, replacing every column of rows whose primary key exists. The caller commits."""
+    keys = [column.key for column in table.primary_key.columns]
+    insert = dialect_insert(db)
+    count = 0
+    for chunk in iter_chunks(rows):
+        if insert is not None:
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=keys,
+                set_={column: stmt.excluded[column] for column in chunk[0] if column not in keys},
+            )
+            db.execute(stmt, chunk)
+        else:
+            key_columns = [table.c[key] for key in keys]
+            db.execute(delete(table).where(tuple_(*key_columns).in_([tuple(row[key] for key in keys) for row in chunk])))
+            db.execute(table.insert(), chunk)
+        count += len(chunk)
+    return count
+
+
+def _copy_columns(
+    db: Session,
+    table: Table,
+    columns: List[str],
+    sector_ids: np.ndarray,
+    epoch_us: np.ndarray,
+    values: List[np.ndarray],
+) -> int:
+    """
+    Bulk load (sectorId, timestamp, *values) columns into a table.
+
+    Uses COPY on PostgreSQL and a raw executemany on SQLite; other
+    databases get chunked Core INSERTs. The caller commits.
+    """
+    dialect = db.get_bind().dialect
+    times = epoch_us.astype("datetime64[us]")
+
+    if dialect.name == "postgresql" and _copy_postgres(db, table, columns, sector_ids, times, values):
+        return len(epoch_us)
+
+    if dialect.name == "sqlite":
+        # SQLAlchemy stores SQLite datetimes as "YYYY-MM-DD HH:MM:SS.ffffff"
+        quote = dialect.identifier_preparer.quote
+        sql = (
+            f"INSERT INTO {quote(table.name)} ({', '.join(quote(column) for column in columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})"
+        )
+        connection = db.connection()
+        for start in range(0, len(epoch_us), SNAPSHOT_CHUNK_ROWS):
+            stop = start + SNAPSHOT_CHUNK_ROWS
+            stamps = np.char.replace(np.datetime_as_string(times[start:stop], unit="us"), "T", " ")
+            connection.exec_driver_sql(
+                sql,
+                list(zip(sector_ids[start:stop].tolist(), stamps.tolist(), *(v[start:stop].tolist() for v in values))),
+            )
+        return len(epoch_us)
+
+    def rows() -> Iterator[dict]:
+        for start in range(0, len(epoch_us), SNAPSHOT_CHUNK_ROWS):
+            stop = start + SNAPSHOT_CHUNK_ROWS
+            chunk = zip(
+                sector_ids[start:stop].tolist(),
+                (_EPOCH + int(us) * _MICROSECOND for us in epoch_us[start:stop].tolist()),
+                *(v[start:stop].tolist() for v in values),
+            )
+            for row in chunk:
+                yield dict(zip(columns, row))
+
+    return insert_rows(db, table, rows())
+
+
+def _copy_postgres(
+    db: Session,
+    table: Table,
+    columns: List[str],
+    sector_ids: np.ndarray,
+    times: np.ndarray,
+    values: List[np.ndarray],
+) -> bool:
+    """COPY columns as CSV through psycopg 2 or 3; False if the driver can't."""
+    quote = db.get_bind().dialect.identifier_preparer.quote
+    sql = f"COPY {quote(table.name)} ({', '.join(quote(column) for column in columns)}) FROM STDIN WITH (FORMAT csv)"
+    cursor = db.connection().connection.cursor()
+    if not hasattr(cursor, "copy_expert") and not hasattr(cursor, "copy"):
+        return False
+
+    quoted_ids = np.char.add(np.char.add('"', np.char.replace(sector_ids.astype(str), '"', '""')), '"')
+    for start in range(0, len(times), SNAPSHOT_CHUNK_ROWS):
+        stop = start + SNAPSHOT_CHUNK_ROWS
+        line = np.char.add(quoted_ids[start:stop], ",")
+        line = np.char.add(line, np.datetime_as_string(times[start:stop], unit="us", timezone="UTC"))
+        for column in values:
+            line = np.char.add(np.char.add(line, ","), column[start:stop].astype(str))
+        data = "\n".join(line.tolist()) + "\n"
+        if hasattr(cursor, "copy_expert"):
+            cursor.copy_expert(sql, io.StringIO(data))
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(data)
+    return True
@@ -0,0 +1,266 @@
+"""
+OHLCV aggregation for simulator ticks.
+
+The simulator advances prices in sub-bucket ticks. `OpenCandleAggregator`
+folds those ticks into the open 5-minute bar of every sector, and
+`rollup_bars` combines closed 5-minute bars into coarser resolutions
+(15m, 1h, 4h, 1d).
+
+All bars are keyed by the boundary that closes their bucket, the same
+convention SectorCandle uses: the 5m bar stamped T covers ticks in
+[T - 5m, T), and the 1h bar stamped T covers 5m bars stamped in (T - 1h, T].
+"""
+
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+# Bucket sizes in seconds
+RESOLUTIONS = {
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "4h": 4 * 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+BASE_RESOLUTION = "5m"
+ROLLUP_RESOLUTIONS = ("15m", "1h", "4h", "1d")
+
+_NO_BUCKET = np.int64(-1)
+
+
+def to_epoch(dt: datetime) -> int:
+    """Epoch seconds of a datetime (naive values are treated as UTC)."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+def from_epoch(seconds: int) -> datetime:
+    """UTC datetime from epoch seconds."""
+    return datetime.fromtimestamp(int(seconds), tz=timezone.utc)
+
+
+def bucket_end(epoch_seconds: np.ndarray, resolution_seconds: int) -> np.ndarray:
+    """Round bar timestamps up to the boundary closing their coarser bucket."""
+    epoch_seconds = np.asarray(epoch_seconds, dtype=np.int64)
+    return -(-epoch_seconds // resolution_seconds) * resolution_seconds
+
+
+def rollup_bars(
+    timestamps: np.ndarray,
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    resolution_seconds: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Combine consecutive bars of one sector into coarser buckets.
+
+    Args:
+        timestamps: Bar timestamps in epoch seconds, sorted ascending
+        open_, high, low, close, volume: Bar fields aligned with `timestamps`
+        resolution_seconds: Target bucket size
+
+    Returns:
+        Tuple of (bucket timestamps, open, high, low, close, volume) arrays
+    """
+    keys = bucket_end(timestamps, resolution_seconds)
+    if len(keys) == 0:
+        empty = np.empty(0)
+        return keys, empty, empty, empty, empty, np.empty(0, dtype=np.int64)
+
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    return (
+        keys[starts],
+        np.asarray(open_)[starts],
+        np.maximum.reduceat(np.asarray(high), starts),
+        np.minimum.reduceat(np.asarray(low), starts),
+        np.asarray(close)[ends],
+        np.add.reduceat(np.asarray(volume, dtype=np.int64), starts),
+    )
+
+
+class OpenCandleAggregator:
+    """
+    Open 5-minute bar of every sector, updated in place on each tick.
+
+    State is array-backed like `SectorTickEngine`: one slot per sector with
+    its open bucket and the running open/high/low/close/volume.
+
+    The open bar is also stored (rewritten every tick) as the newest 5m
+    bar of its sector, and is rolled up only once it closes. A process
+    that starts, or takes over a sector, `resume`s from that stored bar,
+    so the bar is continued rather than replaced and rolled up exactly once.
+    """
+
+    def __init__(self):
+        self._index: dict[str, int] = {}
+        self.sector_ids: list[str] = []
+        self.bucket = np.empty(0, dtype=np.int64)
+        self.open = np.empty(0)
+        self.high = np.empty(0)
+        self.low = np.empty(0)
+        self.close = np.empty(0)
+        self.volume = np.empty(0, dtype=np.int64)
+
+    def _ensure(self, sector_ids: Sequence[str]) -> np.ndarray:
+        new_ids = [sid for sid in dict.fromkeys(sector_ids) if sid not in self._index]
+        if new_ids:
+            count = len(new_ids)
+            for sid in new_ids:
+                self._index[sid] = len(self.sector_ids)
+                self.sector_ids.append(sid)
+            self.bucket = np.concatenate([self.bucket, np.full(count, _NO_BUCKET)])
+            self.open = np.concatenate([self.open, np.zeros(count)])
+            self.high = np.concatenate([self.high, np.zeros(count)])
+            self.low = np.concatenate([self.low, np.zeros(count)])
+            self.close = np.concatenate([self.close, np.zeros(count)])
+            self.volume = np.concatenate([self.volume, np.zeros(count, dtype=np.int64)])
+
+        return np.fromiter(
+            (self._index[sid] for sid in sector_ids),
+            dtype=np.intp,
+            count=len(sector_ids),
+        )
+
+    def __contains__(self, sector_id: str) -> bool:
+        return sector_id in self._index
+
+    def resume(self, bars: Sequence[dict]) -> None:
+        """
+        Reopen stored bars, e.g. the newest 5m bar of each sector.
+
+        Later ticks in the same bucket continue a resumed bar; a tick in a
+        later bucket closes it.
+
+        Args:
+            bars: Bar dicts with sectorId, timestamp (bucket), open, high,
+                low, close and volume
+        """
+        if not bars:
+            return
+        idx = self._ensure([bar["sectorId"] for bar in bars])
+        self.bucket[idx] = [to_epoch(bar["timestamp"]) for bar in bars]
+        for name in ("open", "high", "low", "close", "volume"):
+            getattr(self, name)[idx] = [bar[name] for bar in bars]
+
+    def close_before(self, bucket: datetime, sector_ids: Sequence[str]) -> list[dict]:
+        """
+        Close open bars of earlier buckets without opening new ones.
+
+        Used before writing bars of buckets after the open ones (e.g. when
+        filling a stall), so the closed bars are rolled up first.
+
+        Args:
+            bucket: Bars of buckets before this timestamp are closed
+            sector_ids: Sectors to check; unknown sectors are ignored
+
+        Returns:
+            Closed bars as dicts
+        """
+        idx = np.array([self._index[sid] for sid in sector_ids if sid in self._index], dtype=np.intp)
+        if len(idx) == 0:
+            return []
+        previous = self.bucket[idx]
+        stale = idx[(previous != _NO_BUCKET) & (previous < to_epoch(bucket))]
+        closed = [self._bar_dict(int(i), self.sector_ids[int(i)], int(self.bucket[i])) for i in stale]
+        self.bucket[stale] = _NO_BUCKET
+        return closed
+
+    def clear(self) -> None:
+        """Drop every open bar (e.g. after a failed write); they are resumed again."""
+        self.__init__()
+
+    def remove_sectors(self, sector_ids: Sequence[str]) -> None:
+        """Drop the open bars of sectors that no longer exist or moved elsewhere."""
+        drop = {sid for sid in sector_ids if sid in self._index}
+        if not drop:
+            return
+
+        keep = np.array(
+            [i for i, sid in enumerate(self.sector_ids) if sid not in drop],
+            dtype=np.intp,
+        )
+        self.sector_ids = [self.sector_ids[i] for i in keep]
+        self._index = {sid: i for i, sid in enumerate(self.sector_ids)}
+        for name in ("bucket", "open", "high", "low", "close", "volume"):
+            setattr(self, name, getattr(self, name)[keep])
+
+    def update(
+        self,
+        bucket: datetime,
+        sector_ids: Sequence[str],
+        base_prices: np.ndarray,
+        prices: np.ndarray,
+        volumes: np.ndarray,
+    ) -> tuple[dict[str, np.ndarray], list[dict]]:
+        """
+        Fold one tick into the open bar of each sector.
+
+        A sector whose open bar belongs to an earlier bucket has that bar
+        closed and a new one opened at its previous price.
+
+        Args:
+            bucket: Timestamp of the bucket this tick belongs to
+            sector_ids: Sectors that ticked
+            base_prices: Price of each sector before the tick
+            prices: Price of each sector after the tick
+            volumes: Volume traded in the tick
+
+        Returns:
+            Tuple of (current bar fields aligned with `sector_ids`,
+            bars closed by this tick as dicts)
+        """
+        idx = self._ensure(sector_ids)
+        bucket_ts = to_epoch(bucket)
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.asarray(volumes, dtype=np.int64)
+
+        previous = self.bucket[idx]
+        rolled = (previous != _NO_BUCKET) & (previous != bucket_ts)
+        closed = [
+            self._bar_dict(int(i), self.sector_ids[int(i)], int(self.bucket[i]))
+            for i in idx[rolled]
+        ]
+
+        fresh = previous != bucket_ts
+        opens = np.where(fresh, np.asarray(base_prices, dtype=np.float64), self.open[idx])
+        self.open[idx] = opens
+        self.high[idx] = np.where(fresh, np.maximum(opens, prices), np.maximum(self.high[idx], prices))
+        self.low[idx] = np.where(fresh, np.minimum(opens, prices), np.minimum(self.low[idx], prices))
+        self.close[idx] = prices
+        self.volume[idx] = np.where(fresh, volumes, self.volume[idx] + volumes)
+        self.bucket[idx] = bucket_ts
+
+        current = {
+            "open": self.open[idx],
+            "high": self.high[idx],
+            "low": self.low[idx],
+            "close": self.close[idx],
+            "volume": self.volume[idx],
+        }
+        return current, closed
+
+    def get_bar(self, sector_id: str) -> Optional[dict]:
+        """Return the open bar of a sector, if any."""
+        i = self._index.get(sector_id)
+        if i is None or self.bucket[i] == _NO_BUCKET:
+            return None
+        return self._bar_dict(i, sector_id, int(self.bucket[i]))
+
+    def _bar_dict(self, i: int, sector_id: str, bucket_ts: int) -> dict:
+        return {
+            "sectorId": sector_id,
+            "timestamp": from_epoch(bucket_ts),
+            "open": float(self.open[i]),
+            "high": float(self.high[i]),
+            "low": float(self.low[i]),
+            "close": float(self.close[i]),
+            "volume": int(self.volume[i]),
+        }
@@ -0,0 +1,232 @@
+"""
+Multi-resolution candle history.
+
+Chart history is served from the precomputed bars in `sector_ohlcv`
+instead of the raw `sector_candles` rows. A range query reads the finest
+resolution that fits a point budget, so a 30-day chart reads 180 4h bars
+rather than 8,640 5-minute candles. Each bar keeps the high and low of its
+bucket, so downsampling never hides a spike.
+
+The market simulator keeps the store current on every tick, and the
+seeder writes the bars of generated candles with `iter_history_rows`.
+Candles that were stored without bars are repaired with `rebuild_history`.
+"""
+
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.models.sector_candle import SectorCandle
+from app.models.sector_ohlcv import SectorOHLCV
+from app.services.candle_aggregation import (
+    BASE_RESOLUTION,
+    RESOLUTIONS,
+    ROLLUP_RESOLUTIONS,
+    from_epoch,
+    rollup_bars,
+    to_epoch,
+)
+from app.services.candle_persistence import BULK_CHUNK_ROWS, as_utc, insert_ohlcv, load_ohlcv
+from app.services.wire_format import encode_series, epoch_ms
+
+
+# Upper bound on bars returned by a history query
+DEFAULT_MAX_POINTS = 500
+
+# Resolutions from finest to coarsest
+_BY_SIZE = sorted(RESOLUTIONS, key=RESOLUTIONS.get)
+
+
+def choose_resolution(start: datetime, end: datetime, max_points: int = DEFAULT_MAX_POINTS) -> str:
+    """
+    Pick the finest resolution that covers a range in at most `max_points` bars.
+
+    Args:
+        start: Start of the range
+        end: End of the range
+        max_points: Maximum number of bars wanted
+
+    Returns:
+        Resolution name; the coarsest one if none fits
+    """
+    span = max(to_epoch(end) - to_epoch(start), 0)
+    for resolution in _BY_SIZE:
+        if span / RESOLUTIONS[resolution] <= max_points:
+            return resolution
+    return _BY_SIZE[-1]
+
+
+def _resolve_range(
+    start: datetime,
+    end: Optional[datetime],
+    max_points: int,
+    resolution: Optional[str],
+) -> tuple[datetime, str]:
+    if end is None:
+        end = datetime.now(timezone.utc)
+    if resolution is None:
+        resolution = choose_resolution(start, end, max_points)
+    elif resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    return end, resolution
+
+
+def load_history(
+    db: Session,
+    sector_id: str,
+    start: datetime,
+    end: Optional[datetime] = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+    resolution: Optional[str] = None,
+) -> tuple[str, List[dict]]:
+    """
+    Read the price history of a sector over a time range.
+
+    The newest bar of a coarse resolution covers the 5m bars closed so
+    far; the open 5m bar is only folded in once its bucket closes.
+
+    Args:
+        db: Database session
+        sector_id: Sector ID
+        start: Start of the range (inclusive)
+        end: End of the range (inclusive, default: now)
+        max_points: Maximum number of bars, used to pick the resolution
+        resolution: Force a resolution instead of picking one
+
+    Returns:
+        Tuple of (resolution, bar dicts oldest first)
+    """
+    end, resolution = _resolve_range(start, end, max_points, resolution)
+    bars = load_ohlcv(db, sector_id, resolution, start, end)
+    return resolution, [
+        {
+            "timestamp": as_utc(bar.timestamp).isoformat(),
+            "open": bar.open,
+            "high": bar.high,
+            "low": bar.low,
+            "close": bar.close,
+            "volume": bar.volume,
+        }
+        for bar in bars
+    ]
+
+
+def load_history_binary(
+    db: Session,
+    sector_id: str,
+    start: datetime,
+    end: Optional[datetime] = None,
+    max_points: int = DEFAULT_MAX_POINTS,
+    resolution: Optional[str] = None,
+) -> tuple[str, bytes]:
+    """
+    Like `load_history`, but encode the bars as one binary series message.
+
+    Returns:
+        Tuple of (resolution, message encoded with `wire_format.encode_series`)
+    """
+    end, resolution = _resolve_range(start, end, max_points, resolution)
+    bars = load_ohlcv(db, sector_id, resolution, start, end)
+    return resolution, encode_series(
+        sector_id,
+        [epoch_ms(bar.timestamp) for bar in bars],
+        [bar.open for bar in bars],
+        [bar.high for bar in bars],
+        [bar.low for bar in bars],
+        [bar.close for bar in bars],
+        [bar.volume for bar in bars],
+    )
+
+
+def iter_history_rows(sector_id: str, timestamps: np.ndarray, values: np.ndarray) -> Iterator[dict]:
+    """
+    Derive OHLCV rows at every resolution from a raw candle series.
+
+    Each point becomes a bar that opens at the previous value, and the
+    points are then bucketed into 5m bars and rolled up from there. Raw
+    candles carry no volume, so derived bars have zero volume.
+
+    Args:
+        sector_id: Sector the series belongs to
+        timestamps: Candle timestamps in epoch seconds, sorted ascending
+        values: Candle values aligned with `timestamps`
+
+    Yields:
+        Bar dicts with all SectorOHLCV columns
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return
+
+    opens = np.r_[values[0], values[:-1]]
+    bars = rollup_bars(
+        timestamps,
+        opens,
+        np.maximum(opens, values),
+        np.minimum(opens, values),
+        values,
+        np.zeros(len(values), dtype=np.int64),
+        RESOLUTIONS[BASE_RESOLUTION],
+    )
+
+    levels = [(BASE_RESOLUTION, bars)]
+    levels.extend(
+        (resolution, rollup_bars(*bars, RESOLUTIONS[resolution]))
+        for resolution in ROLLUP_RESOLUTIONS
+    )
+    for resolution, (ts, open_, high, low, close, volume) in levels:
+        for row in zip(ts.tolist(), open_.tolist(), high.tolist(), low.tolist(), close.tolist(), volume.tolist()):
+            yield {
+                "sectorId": sector_id,
+                "resolution": resolution,
+                "timestamp": from_epoch(row[0]),
+                "open": row[1],
+                "high": row[2],
+                "low": row[3],
+                "close": row[4],
+                "volume": row[5],
+            }
+
+
+def rebuild_history(
+    db: Session,
+    sector_ids: Optional[Iterable[str]] = None,
+    chunk_size: int = BULK_CHUNK_ROWS,
+) -> int:
+    """
+    Rebuild the bars of sectors from their raw candles, e.g. to repair
+    candles stored without bars.
+
+    Existing bars of each sector are replaced. Sectors are processed one
+    at a time and committed individually, so memory use is bounded by the
+    history of a single sector.
+
+    Args:
+        db: Database session
+        sector_ids: Sectors to rebuild (default: every sector with candles)
+        chunk_size: Maximum rows per INSERT
+
+    Returns:
+        Number of bars written
+    """
+    if sector_ids is None:
+        sector_ids = db.execute(select(SectorCandle.sectorId).distinct()).scalars().all()
+
+    total = 0
+    for sector_id in sector_ids:
+        candles = db.execute(
+            select(SectorCandle.timestamp, SectorCandle.value)
+            .where(SectorCandle.sectorId == sector_id)
+            .order_by(SectorCandle.timestamp)
+        ).all()
+        timestamps = np.fromiter((to_epoch(ts) for ts, _ in candles), dtype=np.int64, count=len(candles))
+        values = np.fromiter((value for _, value in candles), dtype=np.float64, count=len(candles))
+
+        db.execute(delete(SectorOHLCV).where(SectorOHLCV.sectorId == sector_id))
+        total += insert_ohlcv(db, iter_history_rows(sector_id, timestamps, values), chunk_size)
+        db.commit()
+
+    return total
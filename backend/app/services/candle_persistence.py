@@ -0,0 +1,508 @@
+"""
+Set-based persistence helpers for sector candles.
+
+Used by the market simulator to read and write all sectors of a tick
+with a fixed number of statements instead of several per sector.
+
+Latest-candle lookups are bounded in time: they search the newest days
+of candles first and only widen the range for sectors not found, so
+their cost does not grow with the length of the stored history.
+"""
+
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+from sqlalchemy import Index, and_, bindparam, delete, func, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.models.sector import Sector
+from app.models.sector_candle import SectorCandle
+from app.models.sector_ohlcv import SectorOHLCV
+
+
+# Rows per INSERT statement for bulk loads
+BULK_CHUNK_ROWS = 10_000
+
+# Days before the newest candle searched by latest-candle lookups, in
+# order; sectors not found in the last range are looked up without bound
+LATEST_LOOKBACK_DAYS = (1, 7, 31)
+
+# Sector IDs per IN (...) list
+_IN_CHUNK = 500
+
+# Time-ordered indexes, so time-bounded reads and retention deletes are
+# range scans (see `ensure_time_indexes` for existing databases)
+TIME_INDEXES = (
+    Index("ix_sector_candles_timestamp", SectorCandle.__table__.c.timestamp),
+    Index(
+        "ix_sector_ohlcv_resolution_timestamp",
+        SectorOHLCV.__table__.c.resolution,
+        SectorOHLCV.__table__.c.timestamp,
+    ),
+)
+
+
+def as_utc(dt: datetime) -> datetime:
+    """Treat naive datetimes read back from the database as UTC."""
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+def dialect_insert(db: Session):
+    """Return the dialect's INSERT construct if it supports ON CONFLICT, else None."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def iter_chunks(rows: Iterable[dict], chunk_size: int = BULK_CHUNK_ROWS) -> Iterator[List[dict]]:
+    """Split an iterable of rows into lists of at most `chunk_size` rows."""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ensure_time_indexes(db: Session) -> None:
+    """Create the time-ordered candle and bar indexes if they are missing."""
+    for index in TIME_INDEXES:
+        index.create(db.connection(), checkfirst=True)
+
+
+def lookback_bounds(db: Session) -> List[Optional[datetime]]:
+    """
+    Lower bounds for latest-candle searches, narrowest first.
+
+    Bounds are anchored at the newest stored candle, so history written
+    in the past (e.g. by an offline simulation) is found just as fast.
+
+    Returns:
+        Timestamps followed by None (unbounded); empty without candles
+    """
+    newest = db.execute(select(func.max(SectorCandle.timestamp))).scalar()
+    if newest is None:
+        return []
+    newest = as_utc(newest)
+    return [newest - timedelta(days=days) for days in LATEST_LOOKBACK_DAYS] + [None]
+
+
+def _latest_candles_since(
+    db: Session,
+    since: Optional[datetime],
+    sector_ids: Optional[List[str]],
+) -> dict[str, tuple[datetime, float]]:
+    """Latest candle of sectors among candles at or after `since`."""
+    latest = db.query(
+        SectorCandle.sectorId.label("sectorId"),
+        func.max(SectorCandle.timestamp).label("timestamp"),
+    )
+    if since is not None:
+        latest = latest.filter(SectorCandle.timestamp >= since)
+    if sector_ids is not None:
+        latest = latest.filter(SectorCandle.sectorId.in_(sector_ids))
+    latest = latest.group_by(SectorCandle.sectorId).subquery()
+
+    rows = (
+        db.query(SectorCandle.sectorId, SectorCandle.timestamp, SectorCandle.value)
+        .join(
+            latest,
+            and_(
+                SectorCandle.sectorId == latest.c.sectorId,
+                SectorCandle.timestamp == latest.c.timestamp,
+            ),
+        )
+        .all()
+    )
+    return {sector_id: (as_utc(timestamp), value) for sector_id, timestamp, value in rows}
+
+
+def load_latest_candles(
+    db: Session,
+    sector_ids: Optional[Iterable[str]] = None,
+) -> dict[str, tuple[datetime, float]]:
+    """
+    Load the most recent candle of every sector.
+
+    The newest day of candles is searched first, in one query for all
+    sectors; only sectors without a candle there are looked up again over
+    the wider ranges of `lookback_bounds`.
+
+    Args:
+        db: Database session
+        sector_ids: Restrict the lookup to these sectors (default: all)
+
+    Returns:
+        Dictionary mapping sector IDs to (timestamp, value) of their last candle
+    """
+    bounds = lookback_bounds(db)
+    if not bounds:
+        return {}
+
+    found = {}
+    if sector_ids is None:
+        found.update(_latest_candles_since(db, bounds[0], None))
+        sector_ids = db.execute(select(Sector.id)).scalars().all()
+        bounds = bounds[1:]
+
+    remaining = [sector_id for sector_id in dict.fromkeys(sector_ids) if sector_id not in found]
+    for since in bounds:
+        if not remaining:
+            break
+        for chunk in iter_chunks(remaining, _IN_CHUNK):
+            found.update(_latest_candles_since(db, since, chunk))
+        remaining = [sector_id for sector_id in remaining if sector_id not in found]
+    return found
+
+
+def upsert_candles(db: Session, rows: List[dict]) -> None:
+    """
+    Insert or update many candles in one statement.
+
+    Rows are keyed by (sectorId, timestamp); existing candles get their
+    value replaced. Uses ON CONFLICT on PostgreSQL and SQLite, and falls
+    back to delete + insert on other dialects.
+
+    Args:
+        db: Database session (not committed here)
+        rows: Candle dicts with `sectorId`, `timestamp` and `value`
+    """
+    if not rows:
+        return
+
+    table = SectorCandle.__table__
+    insert = dialect_insert(db)
+
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.sectorId, table.c.timestamp],
+            set_={"value": stmt.excluded.value},
+        )
+        db.execute(stmt, rows)
+        return
+
+    keys = [(row["sectorId"], row["timestamp"]) for row in rows]
+    db.execute(
+        delete(table).where(tuple_(table.c.sectorId, table.c.timestamp).in_(keys))
+    )
+    db.execute(table.insert(), rows)
+
+
+def update_sector_prices(db: Session, rows: List[dict]) -> None:
+    """
+    Update price fields of many sectors with one executemany UPDATE.
+
+    A Core UPDATE keyed by a bound sector ID, so no ORM instances are
+    loaded or synchronized.
+
+    Args:
+        db: Database session (not committed here)
+        rows: Dicts with `id` plus the Sector columns to set; every row
+            sets the same columns
+    """
+    if not rows:
+        return
+
+    table = Sector.__table__
+    columns = [key for key in rows[0] if key != "id"]
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values({column: bindparam(f"b_{column}") for column in columns})
+    )
+    db.execute(stmt, [{f"b_{key}": value for key, value in row.items()} for row in rows])
+
+
+def _bulk_insert(
+    db: Session,
+    table,
+    key_columns: list,
+    rows: Iterable[dict],
+    chunk_size: int,
+    skip_existing: bool,
+) -> int:
+    """Chunked multi-row INSERT, optionally skipping rows whose key exists."""
+    insert = dialect_insert(db)
+    stmt = table.insert()
+
+    if skip_existing and insert is not None:
+        stmt = insert(table).on_conflict_do_nothing(index_elements=key_columns)
+
+    count = 0
+    for chunk in iter_chunks(rows, chunk_size):
+        if skip_existing and insert is None:
+            keys = [tuple(row[column.key] for column in key_columns) for row in chunk]
+            existing = set(
+                tuple(row)
+                for row in db.execute(select(*key_columns).where(tuple_(*key_columns).in_(keys)))
+            )
+            chunk = [row for row, key in zip(chunk, keys) if key not in existing]
+            if not chunk:
+                continue
+        db.execute(stmt, chunk)
+        count += len(chunk)
+    return count
+
+
+def insert_rows(
+    db: Session,
+    table,
+    rows: Iterable[dict],
+    chunk_size: int = BULK_CHUNK_ROWS,
+    skip_existing: bool = False,
+) -> int:
+    """
+    Bulk insert rows of any table in bounded-size multi-row INSERTs.
+
+    Args:
+        db: Database session (not committed here)
+        table: Core table to insert into
+        rows: Column dicts
+        chunk_size: Maximum rows per statement
+        skip_existing: Leave rows whose primary key exists untouched instead of failing
+
+    Returns:
+        Number of rows submitted
+    """
+    return _bulk_insert(db, table, list(table.primary_key.columns), rows, chunk_size, skip_existing)
+
+
+def insert_candles(
+    db: Session,
+    rows: Iterable[dict],
+    chunk_size: int = BULK_CHUNK_ROWS,
+    skip_existing: bool = False,
+) -> int:
+    """
+    Bulk insert candles in bounded-size multi-row INSERT statements.
+
+    Rows are consumed lazily, so a generator keeps memory flat however
+    many candles are written.
+
+    Args:
+        db: Database session (not committed here)
+        rows: Candle dicts with `sectorId`, `timestamp` and `value`
+        chunk_size: Maximum rows per statement
+        skip_existing: Leave candles that already exist untouched instead of failing
+
+    Returns:
+        Number of rows submitted
+    """
+    table = SectorCandle.__table__
+    return _bulk_insert(
+        db, table, [table.c.sectorId, table.c.timestamp], rows, chunk_size, skip_existing
+    )
+
+
+def insert_ohlcv(
+    db: Session,
+    rows: Iterable[dict],
+    chunk_size: int = BULK_CHUNK_ROWS,
+    skip_existing: bool = False,
+) -> int:
+    """
+    Bulk insert OHLCV bars in bounded-size multi-row INSERT statements.
+
+    Args:
+        db: Database session (not committed here)
+        rows: Bar dicts with all SectorOHLCV columns
+        chunk_size: Maximum rows per statement
+        skip_existing: Leave bars that already exist untouched instead of failing
+
+    Returns:
+        Number of rows submitted
+    """
+    table = SectorOHLCV.__table__
+    return _bulk_insert(
+        db,
+        table,
+        [table.c.sectorId, table.c.resolution, table.c.timestamp],
+        rows,
+        chunk_size,
+        skip_existing,
+    )
+
+
+def upsert_ohlcv(db: Session, rows: List[dict]) -> None:
+    """
+    Insert or replace OHLCV bars, keyed by (sectorId, resolution, timestamp).
+
+    Used for bars that are rewritten in place while their bucket is open.
+
+    Args:
+        db: Database session (not committed here)
+        rows: Bar dicts with all SectorOHLCV columns
+    """
+    if not rows:
+        return
+
+    table = SectorOHLCV.__table__
+    insert = dialect_insert(db)
+
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.sectorId, table.c.resolution, table.c.timestamp],
+            set_={
+                "open": stmt.excluded.open,
+                "high": stmt.excluded.high,
+                "low": stmt.excluded.low,
+                "close": stmt.excluded.close,
+                "volume": stmt.excluded.volume,
+            },
+        )
+        db.execute(stmt, rows)
+        return
+
+    keys = [(row["sectorId"], row["resolution"], row["timestamp"]) for row in rows]
+    db.execute(
+        delete(table).where(tuple_(table.c.sectorId, table.c.resolution, table.c.timestamp).in_(keys))
+    )
+    db.execute(table.insert(), rows)
+
+
+def merge_ohlcv(db: Session, rows: List[dict], earlier: bool = False) -> None:
+    """
+    Merge closed bars into existing bars of the same bucket.
+
+    Keeps the existing open, extends high/low, takes the new close and adds
+    the volume. Each closed bar must be merged exactly once, and a call may
+    contain at most one row per bar (pre-aggregate with `rollup_bars`).
+
+    Args:
+        db: Database session (not committed here)
+        rows: Bar dicts with all SectorOHLCV columns
+        earlier: The rows cover time before the existing bars (e.g. older
+            history added later): take the new open and keep the existing close
+    """
+    if not rows:
+        return
+
+    table = SectorOHLCV.__table__
+    insert = dialect_insert(db)
+
+    if insert is not None:
+        if db.get_bind().dialect.name == "postgresql":
+            greatest, least = func.greatest, func.least
+        else:
+            # SQLite's multi-argument max()/min() are scalar functions
+            greatest, least = func.max, func.min
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.sectorId, table.c.resolution, table.c.timestamp],
+            set_={
+                **({"open": stmt.excluded.open} if earlier else {"close": stmt.excluded.close}),
+                "high": greatest(table.c.high, stmt.excluded.high),
+                "low": least(table.c.low, stmt.excluded.low),
+                "volume": table.c.volume + stmt.excluded.volume,
+            },
+        )
+        db.execute(stmt, rows)
+        return
+
+    for row in rows:
+        bar = db.get(SectorOHLCV, (row["sectorId"], row["resolution"], row["timestamp"]))
+        if bar is None:
+            db.add(SectorOHLCV(**row))
+            continue
+        if earlier:
+            bar.open = row["open"]
+        else:
+            bar.close = row["close"]
+        bar.high = max(bar.high, row["high"])
+        bar.low = min(bar.low, row["low"])
+        bar.volume += row["volume"]
+
+
+def load_ohlcv(
+    db: Session,
+    sector_id: str,
+    resolution: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[SectorOHLCV]:
+    """
+    Read precomputed bars of one sector and resolution, oldest first.
+
+    Args:
+        db: Database session
+        sector_id: Sector ID
+        resolution: "5m", "15m", "1h", "4h" or "1d"
+        start: Earliest bar timestamp (inclusive, optional)
+        end: Latest bar timestamp (inclusive, optional)
+
+    Returns:
+        List of SectorOHLCV rows
+    """
+    query = db.query(SectorOHLCV).filter(
+        SectorOHLCV.sectorId == sector_id,
+        SectorOHLCV.resolution == resolution,
+    )
+    if start is not None:
+        query = query.filter(SectorOHLCV.timestamp >= start)
+    if end is not None:
+        query = query.filter(SectorOHLCV.timestamp <= end)
+    return query.order_by(SectorOHLCV.timestamp).all()
+
+
+def load_latest_ohlcv(db: Session, resolution: str, sector_ids: Iterable[str]) -> List[dict]:
+    """
+    Read the newest bar of each sector at one resolution.
+
+    One grouped query per group of sectors, served by the primary key.
+
+    Args:
+        db: Database session
+        resolution: "5m", "15m", "1h", "4h" or "1d"
+        sector_ids: Sectors to look up; sectors without bars are skipped
+
+    Returns:
+        Bar dicts with sectorId, timestamp (UTC), open, high, low, close
+        and volume
+    """
+    bars = []
+    for chunk in iter_chunks(list(dict.fromkeys(sector_ids)), _IN_CHUNK):
+        latest = (
+            select(SectorOHLCV.sectorId, func.max(SectorOHLCV.timestamp).label("timestamp"))
+            .where(SectorOHLCV.resolution == resolution, SectorOHLCV.sectorId.in_(chunk))
+            .group_by(SectorOHLCV.sectorId)
+            .subquery()
+        )
+        rows = db.execute(
+            select(
+                SectorOHLCV.sectorId,
+                SectorOHLCV.timestamp,
+                SectorOHLCV.open,
+                SectorOHLCV.high,
+                SectorOHLCV.low,
+                SectorOHLCV.close,
+                SectorOHLCV.volume,
+            ).join(
+                latest,
+                and_(
+                    SectorOHLCV.resolution == resolution,
+                    SectorOHLCV.sectorId == latest.c.sectorId,
+                    SectorOHLCV.timestamp == latest.c.timestamp,
+                ),
+            )
+        ).all()
+        bars.extend(
+            {
+                "sectorId": sector_id,
+                "timestamp": as_utc(timestamp),
+                "open": open_,
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": volume,
+            }
+            for sector_id, timestamp, open_, high, low, close, volume in rows
+        )
+    return bars
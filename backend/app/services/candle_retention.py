@@ -0,0 +1,197 @@
+"""
+Time-partitioned retention and compaction of candle storage.
+
+`sector_candles` and `sector_ohlcv` are handled as day partitions: the
+partition stamped D holds rows with timestamps in (D - 1d, D], the same
+closing-boundary convention the bars use, so every 15m, 1h, 4h and 1d
+bucket falls into exactly one partition. Retention works one partition
+at a time with time-range predicates (served by the indexes in
+`candle_persistence.TIME_INDEXES`) and commits each one, so a pass never
+scans the whole table or holds one huge transaction.
+
+Before raw candles of an expired partition are dropped, they are
+compacted into bars of every resolution kept longer than raw candles.
+Bars written live by the simulator already exist and are left as they
+are; compaction only fills in bars that are missing (e.g. for seeded or
+backfilled history that was never rebuilt).
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.sector import Sector
+from app.models.sector_candle import SectorCandle
+from app.models.sector_ohlcv import SectorOHLCV
+from app.services.candle_aggregation import RESOLUTIONS, bucket_end, from_epoch, to_epoch
+from app.services.candle_history import iter_history_rows
+from app.services.candle_persistence import BULK_CHUNK_ROWS, as_utc, insert_ohlcv, iter_chunks
+
+
+PARTITION_SECONDS = RESOLUTIONS["1d"]
+
+# Key of raw candles (sector_candles) in retention policies
+RAW = "raw"
+
+# Days kept per series; None keeps a series forever
+DEFAULT_RETENTION_DAYS: dict[str, Optional[int]] = {
+    RAW: 30,
+    "5m": 30,
+    "15m": 90,
+    "1h": 365,
+    "4h": None,
+    "1d": None,
+}
+
+# Sectors whose candles are compacted together
+_COMPACT_SECTORS = 500
+
+
+def partition_end(timestamp: datetime) -> datetime:
+    """End (and stamp) of the day partition a timestamp belongs to."""
+    return from_epoch(int(bucket_end(to_epoch(timestamp), PARTITION_SECONDS)))
+
+
+def expired_partitions(oldest: Optional[datetime], cutoff: datetime) -> Iterator[tuple[datetime, datetime]]:
+    """
+    Partitions that lie entirely at or before `cutoff`, oldest first.
+
+    Args:
+        oldest: Oldest stored timestamp (None when the table is empty)
+        cutoff: Rows at or before this time are expired
+
+    Yields:
+        (start, end) bounds, covering timestamps in (start, end]
+    """
+    if oldest is None:
+        return
+    step = timedelta(seconds=PARTITION_SECONDS)
+    end = partition_end(as_utc(oldest))
+    while end <= cutoff:
+        yield end - step, end
+        end += step
+
+
+def _outlives_raw(days: Optional[int], raw_days: int) -> bool:
+    return days is None or days > raw_days
+
+
+def compact_partition(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    resolutions: Sequence[str],
+    chunk_size: int = BULK_CHUNK_ROWS,
+) -> int:
+    """
+    Derive missing bars from the raw candles of one partition.
+
+    Sectors are read in groups, so memory is bounded by the partition's
+    candles of one group. Existing bars are kept. The caller commits.
+
+    Args:
+        db: Database session (not committed here)
+        start: Partition start (exclusive)
+        end: Partition end (inclusive)
+        resolutions: Resolutions to write bars for
+        chunk_size: Maximum rows per INSERT
+
+    Returns:
+        Number of bars submitted
+    """
+    if not resolutions:
+        return 0
+
+    sector_ids = db.execute(select(Sector.id).order_by(Sector.id)).scalars().all()
+    written = 0
+    for group in iter_chunks(sector_ids, _COMPACT_SECTORS):
+        candles = db.execute(
+            select(SectorCandle.sectorId, SectorCandle.timestamp, SectorCandle.value)
+            .where(
+                SectorCandle.sectorId.in_(group),
+                SectorCandle.timestamp > start,
+                SectorCandle.timestamp <= end,
+            )
+            .order_by(SectorCandle.sectorId, SectorCandle.timestamp)
+        ).all()
+
+        by_sector: dict[str, list] = {}
+        for sector_id, timestamp, value in candles:
+            by_sector.setdefault(sector_id, []).append((timestamp, value))
+
+        for sector_id, series in by_sector.items():
+            timestamps = np.fromiter((to_epoch(ts) for ts, _ in series), dtype=np.int64, count=len(series))
+            values = np.fromiter((value for _, value in series), dtype=np.float64, count=len(series))
+            rows = (
+                row for row in iter_history_rows(sector_id, timestamps, values)
+                if row["resolution"] in resolutions
+            )
+            written += insert_ohlcv(db, rows, chunk_size, skip_existing=True)
+    return written
+
+
+def enforce_retention(
+    db: Session,
+    retention_days: dict[str, Optional[int]] = DEFAULT_RETENTION_DAYS,
+    now: Optional[datetime] = None,
+    chunk_size: int = BULK_CHUNK_ROWS,
+) -> dict[str, int]:
+    """
+    Compact and drop expired partitions of raw candles and bars.
+
+    Raw candle partitions are compacted into the resolutions that outlive
+    them and dropped, one committed partition at a time; bars of each
+    resolution are then dropped past their own retention. Running it
+    again is harmless, so an interrupted pass simply continues.
+
+    Args:
+        db: Database session (committed per partition)
+        retention_days: Days kept per series ("raw" and each resolution);
+            None or a missing entry keeps a series forever
+        now: Reference time (default: now)
+        chunk_size: Maximum rows per INSERT
+
+    Returns:
+        Dict with partitions compacted, bars written by compaction, and
+        candles and bars dropped
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    stats = {"partitions": 0, "compacted": 0, "candles": 0, "bars": 0}
+
+    raw_days = retention_days.get(RAW)
+    if raw_days is not None:
+        keep = [
+            resolution for resolution in RESOLUTIONS
+            if _outlives_raw(retention_days.get(resolution), raw_days)
+        ]
+        oldest = db.execute(select(func.min(SectorCandle.timestamp))).scalar()
+        for start, end in expired_partitions(oldest, now - timedelta(days=raw_days)):
+            stats["compacted"] += compact_partition(db, start, end, keep, chunk_size)
+            stats["candles"] += db.execute(
+                delete(SectorCandle).where(SectorCandle.timestamp > start, SectorCandle.timestamp <= end)
+            ).rowcount
+            db.commit()
+            stats["partitions"] += 1
+
+    for resolution in RESOLUTIONS:
+        days = retention_days.get(resolution)
+        if days is None:
+            continue
+        oldest = db.execute(
+            select(func.min(SectorOHLCV.timestamp)).where(SectorOHLCV.resolution == resolution)
+        ).scalar()
+        for start, end in expired_partitions(oldest, now - timedelta(days=days)):
+            stats["bars"] += db.execute(
+                delete(SectorOHLCV).where(
+                    SectorOHLCV.resolution == resolution,
+                    SectorOHLCV.timestamp > start,
+                    SectorOHLCV.timestamp <= end,
+                )
+            ).rowcount
+            db.commit()
+
+    return stats
@@ -0,0 +1,302 @@
+"""
+In-memory window of the most recent 5-minute candles of every sector.
+
+Clients connecting to a sector nearly always ask for the latest day of
+candles. `CandleWindow` keeps the last `capacity` 5m bars of every sector
+in preallocated arrays, one ring buffer per sector, so "last N points"
+reads and snapshot-on-subscribe are served without a query.
+
+The arrays are a slab of `rows x capacity` cells per field (timestamp,
+OHLC and volume: 48 bytes per cell), grown by doubling as sectors appear,
+so memory stays at about `sectors x capacity x 48` bytes. A day (288
+candles) of 10,000 sectors takes about 140 MB.
+
+A sector is only served once it has been loaded from the database (see
+`load`); appends for sectors that are not loaded are ignored, so the
+window never serves a shorter history than the database holds.
+"""
+
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.sector_ohlcv import SectorOHLCV
+from app.services.candle_aggregation import BASE_RESOLUTION, RESOLUTIONS, from_epoch, to_epoch
+from app.services.candle_persistence import as_utc, iter_chunks
+from app.services.wire_format import encode_series
+
+
+FIELDS = ("open", "high", "low", "close")
+
+# Rows allocated when the first sector is added
+_INITIAL_ROWS = 64
+
+# Sector IDs per IN (...) list when loading
+_LOAD_CHUNK = 500
+
+_EMPTY = np.int64(-1)
+
+
+class CandleWindow:
+    """
+    Fixed-size ring buffers of recent 5m bars, keyed by sector ID.
+
+    All methods are thread-safe: the simulator writes on its database
+    thread while readers run on the event loop.
+
+    Args:
+        capacity: Bars kept per sector (default: one day)
+    """
+
+    def __init__(self, capacity: int = 24 * 60 * 60 // RESOLUTIONS[BASE_RESOLUTION]):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._rows: dict[str, int] = {}
+        self._free: List[int] = []
+        self._allocate(0)
+
+    def _allocate(self, rows: int) -> None:
+        self._timestamps = np.full((rows, self.capacity), _EMPTY, dtype=np.int64)
+        self._values = {field: np.zeros((rows, self.capacity)) for field in FIELDS}
+        self._volume = np.zeros((rows, self.capacity), dtype=np.int64)
+        self._head = np.zeros(rows, dtype=np.intp)
+        self._count = np.zeros(rows, dtype=np.intp)
+
+    def _grow(self) -> None:
+        old = len(self._head)
+        timestamps, values, volume = self._timestamps, self._values, self._volume
+        head, count = self._head, self._count
+        self._allocate(max(_INITIAL_ROWS, old * 2))
+        self._timestamps[:old] = timestamps
+        for field in FIELDS:
+            self._values[field][:old] = values[field]
+        self._volume[:old] = volume
+        self._head[:old] = head
+        self._count[:old] = count
+        self._free.extend(range(len(self._head) - 1, old - 1, -1))
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the buffers."""
+        return (
+            self._timestamps.nbytes + self._volume.nbytes
+            + sum(values.nbytes for values in self._values.values())
+            + self._head.nbytes + self._count.nbytes
+        )
+
+    @property
+    def sector_ids(self) -> List[str]:
+        return list(self._rows)
+
+    def __contains__(self, sector_id: str) -> bool:
+        return sector_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _reset_row(self, sector_id: str) -> int:
+        row = self._rows.get(sector_id)
+        if row is None:
+            if not self._free:
+                self._grow()
+            row = self._free.pop()
+            self._rows[sector_id] = row
+        self._timestamps[row] = _EMPTY
+        self._head[row] = 0
+        self._count[row] = 0
+        return row
+
+    def load(self, db: Session, sector_ids: Sequence[str], now: Optional[datetime] = None) -> int:
+        """
+        (Re)load sectors from their stored 5m bars.
+
+        Reads only the `capacity` buckets up to `now` (or the newest bar),
+        one bounded query per group of sectors. Sectors without bars are
+        loaded empty and fill up as the simulator ticks.
+
+        Args:
+            db: Database session
+            sector_ids: Sectors to load
+            now: Bucket the window ends at (default: the newest 5m bar)
+
+        Returns:
+            Number of bars loaded
+        """
+        sector_ids = list(dict.fromkeys(sector_ids))
+        if not sector_ids:
+            return 0
+
+        bars = []
+        if now is None:
+            newest = db.execute(
+                select(SectorOHLCV.timestamp)
+                .where(SectorOHLCV.resolution == BASE_RESOLUTION)
+                .order_by(SectorOHLCV.timestamp.desc())
+                .limit(1)
+            ).scalar()
+            now = as_utc(newest) if newest is not None else None
+        if now is not None:
+            since = from_epoch(to_epoch(now) - self.capacity * RESOLUTIONS[BASE_RESOLUTION])
+            for chunk in iter_chunks(sector_ids, _LOAD_CHUNK):
+                bars.extend(db.execute(
+                    select(
+                        SectorOHLCV.sectorId,
+                        SectorOHLCV.timestamp,
+                        SectorOHLCV.open,
+                        SectorOHLCV.high,
+                        SectorOHLCV.low,
+                        SectorOHLCV.close,
+                        SectorOHLCV.volume,
+                    )
+                    .where(
+                        SectorOHLCV.resolution == BASE_RESOLUTION,
+                        SectorOHLCV.sectorId.in_(chunk),
+                        SectorOHLCV.timestamp > since,
+                    )
+                    .order_by(SectorOHLCV.sectorId, SectorOHLCV.timestamp)
+                ).all())
+
+        by_sector: dict[str, list] = {}
+        for bar in bars:
+            by_sector.setdefault(bar[0], []).append(bar[1:])
+
+        with self._lock:
+            for sector_id in sector_ids:
+                row = self._reset_row(sector_id)
+                series = by_sector.get(sector_id, [])[-self.capacity:]
+                count = len(series)
+                if not count:
+                    continue
+                self._timestamps[row, :count] = [to_epoch(bar[0]) for bar in series]
+                for i, field in enumerate(FIELDS, start=1):
+                    self._values[field][row, :count] = [bar[i] for bar in series]
+                self._volume[row, :count] = [bar[5] for bar in series]
+                self._head[row] = count % self.capacity
+                self._count[row] = count
+        return len(bars)
+
+    def append(
+        self,
+        timestamp: datetime,
+        sector_ids: Sequence[str],
+        open_: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+    ) -> None:
+        """
+        Record the bar of one bucket for many sectors in one vectorized step.
+
+        A bar for the bucket a sector's newest bar belongs to replaces it
+        (the open bar is rewritten every tick); a newer bucket is appended,
+        overwriting the oldest bar once the buffer is full. Older buckets
+        and sectors that are not loaded are ignored.
+        """
+        with self._lock:
+            known = [i for i, sector_id in enumerate(sector_ids) if sector_id in self._rows]
+            if not known:
+                return
+            rows = np.array([self._rows[sector_ids[i]] for i in known], dtype=np.intp)
+            known = np.array(known, dtype=np.intp)
+            epoch = to_epoch(timestamp)
+
+            newest = self._timestamps[rows, (self._head[rows] - 1) % self.capacity]
+            replace = (newest == epoch) & (self._count[rows] > 0)
+            newer = (newest < epoch) | (self._count[rows] == 0)
+            write = replace | newer
+            rows, known, replace, newer = rows[write], known[write], replace[write], newer[write]
+
+            positions = np.where(replace, self._head[rows] - 1, self._head[rows]) % self.capacity
+            self._timestamps[rows, positions] = epoch
+            for field, values in zip(FIELDS, (open_, high, low, close)):
+                self._values[field][rows, positions] = np.asarray(values)[known]
+            self._volume[rows, positions] = np.asarray(volume)[known]
+            self._head[rows] = (self._head[rows] + newer) % self.capacity
+            self._count[rows] = np.minimum(self._count[rows] + newer, self.capacity)
+
+    def remove_sectors(self, sector_ids: Iterable[str]) -> None:
+        """Drop sectors; they are served again only after `load`."""
+        with self._lock:
+            for sector_id in sector_ids:
+                row = self._rows.pop(sector_id, None)
+                if row is not None:
+                    self._free.append(row)
+
+    def clear(self) -> None:
+        """Drop every sector."""
+        with self._lock:
+            self._rows.clear()
+            self._allocate(0)
+            self._free = []
+
+    def last(self, sector_id: str, points: Optional[int] = None) -> Optional[dict[str, np.ndarray]]:
+        """
+        Copy the newest bars of a sector, oldest first.
+
+        Args:
+            sector_id: Sector ID
+            points: Number of bars (default: all held); capped at what is held
+
+        Returns:
+            Dict of arrays: timestamp (epoch seconds), open, high, low,
+            close and volume; None if the sector is not loaded
+        """
+        with self._lock:
+            row = self._rows.get(sector_id)
+            if row is None:
+                return None
+            count = int(self._count[row])
+            if points is not None:
+                count = min(count, max(points, 0))
+            positions = (self._head[row] - count + np.arange(count)) % self.capacity
+            bars = {"timestamp": self._timestamps[row, positions]}
+            for field in FIELDS:
+                bars[field] = self._values[field][row, positions]
+            bars["volume"] = self._volume[row, positions]
+            return bars
+
+    def rows(self, sector_id: str, points: Optional[int] = None) -> Optional[List[dict]]:
+        """Newest bars as dicts, shaped like `candle_history.load_history` bars."""
+        bars = self.last(sector_id, points)
+        if bars is None:
+            return None
+        return [
+            {
+                "timestamp": from_epoch(timestamp).isoformat(),
+                "open": open_,
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": volume,
+            }
+            for timestamp, open_, high, low, close, volume in zip(
+                bars["timestamp"].tolist(),
+                bars["open"].tolist(),
+                bars["high"].tolist(),
+                bars["low"].tolist(),
+                bars["close"].tolist(),
+                bars["volume"].tolist(),
+            )
+        ]
+
+    def encode(self, sector_id: str, points: Optional[int] = None) -> Optional[bytes]:
+        """Newest bars as one binary series message (see `wire_format.encode_series`)."""
+        bars = self.last(sector_id, points)
+        if bars is None:
+            return None
+        return encode_series(
+            sector_id,
+            bars["timestamp"] * 1000,
+            bars["open"],
+            bars["high"],
+            bars["low"],
+            bars["close"],
+            bars["volume"],
+        )
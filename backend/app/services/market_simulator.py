@@ -1,27 +1,137 @@
 """
 Market simulator service for generating synthetic market data.
 
-Generates 5-minute candle data for all sectors, updating sector prices
-and publishing realtime events via Redis.
+Advances all sectors in sub-bucket ticks, aggregates them into 5-minute
+OHLCV candles (rolled up to 15m, 1h, 4h and 1d), updates sector prices and
+publishes realtime events via Redis. Once a day, expired candle partitions
+are compacted and dropped according to the retention policy. The latest
+candles of every sector are also kept in memory (`get_recent_candles`).
+
+All database work runs on a dedicated thread so ticks never block the
+event loop shared with API handlers and websockets.
 """
 
 import asyncio
-import random
-import math
+import bisect
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional, List
+from typing import Any, Callable, Optional, List, Union
+
+import numpy as np
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
+from sqlalchemy import desc
 
 from app.core.db import SessionLocal
 from app.core.config import settings
 from app.models.sector import Sector
 from app.models.sector_candle import SectorCandle
-from app.realtime.publish import publish_market_update, publish_sector_candle
+from app.services.candle_aggregation import (
+    BASE_RESOLUTION,
+    RESOLUTIONS,
+    ROLLUP_RESOLUTIONS,
+    OpenCandleAggregator,
+    bucket_end,
+    from_epoch,
+    rollup_bars,
+    to_epoch,
+)
+from app.services.candle_persistence import (
+    ensure_time_indexes,
+    insert_candles,
+    insert_ohlcv,
+    iter_chunks,
+    load_latest_candles,
+    load_latest_ohlcv,
+    lookback_bounds,
+    merge_ohlcv,
+    update_sector_prices,
+    upsert_candles,
+    upsert_ohlcv,
+)
+from app.services.candle_window import CandleWindow
+from app.services.candle_retention import DEFAULT_RETENTION_DAYS, enforce_retention, partition_end
+from app.services.price_cache import LastPriceCache
+from app.services.sector_state import SectorRecord, load_sector_records
+from app.services.sharding import ShardLeaseManager, shard_of
+from app.services.simulator_metrics import PrometheusMetrics, TickMetrics
+from app.services.simulator_state import load_engine_state, save_engine_state
+from app.services.tick_engine import SectorTickEngine
+from app.services.tick_publisher import TickPublisher, create_tick_publisher, publish_event
+from app.services.tick_schedule import TickSchedule
+
+
+# 5-minute candles per day
+CANDLES_PER_DAY = 288
+CANDLE_SECONDS = 5 * 60
+
+# Seconds between simulator ticks (may be fractional, e.g. 0.1 for
+# accelerated runs); every candle aggregates CANDLE_SECONDS / TICK_SECONDS ticks
+TICK_SECONDS = float(getattr(settings, "MARKET_SIMULATOR_TICK_SECONDS", 60))
+
+# Most whole buckets a tick fills in after a stall (default: one day)
+MAX_CATCHUP_BUCKETS = getattr(settings, "MARKET_SIMULATOR_MAX_CATCHUP_BUCKETS", CANDLES_PER_DAY)
+
+# Synthetic volume traded per 5-minute candle
+CANDLE_VOLUME_RANGE = (1000, 10000)
+
+# Days of raw candles and bars kept per resolution (see candle_retention);
+# MARKET_SIMULATOR_RETENTION_DAYS overrides entries (None keeps a series
+# forever) and MARKET_SIMULATOR_RETENTION=false disables retention
+ENABLE_RETENTION = getattr(settings, "MARKET_SIMULATOR_RETENTION", True)
+RETENTION_DAYS = {**DEFAULT_RETENTION_DAYS, **getattr(settings, "MARKET_SIMULATOR_RETENTION_DAYS", {})}
+
+# Global trend state for all sectors (trend, wave phase, momentum).
+# MARKET_SIMULATOR_SEED makes runs reproducible.
+_tick_engine = SectorTickEngine(seed=getattr(settings, "MARKET_SIMULATOR_SEED", None))
+
+# Last candle per sector, so steady-state ticks need no base-price query
+_price_cache = LastPriceCache()
+
+# Open 5-minute OHLCV bar per sector, resumed from the newest stored 5m bar
+# of sectors it does not hold yet (see `_resume_open_bars`)
+_candle_aggregator = OpenCandleAggregator()
+
+# Ring buffer of the latest MARKET_SIMULATOR_WINDOW_CANDLES 5m bars per
+# sector (default: one day; 0 disables), served without a query
+WINDOW_CANDLES = int(getattr(settings, "MARKET_SIMULATOR_WINDOW_CANDLES", CANDLES_PER_DAY))
+_candle_window: Optional[CandleWindow] = CandleWindow(WINDOW_CANDLES) if WINDOW_CANDLES > 0 else None
+
+# Batched publisher for tick events (concurrent sector events, pipelined
+# snapshot and binary messages); None publishes event by event
+_tick_publisher: Optional[TickPublisher] = create_tick_publisher(settings)
+
+# Sector shards leased by this worker when several simulator workers share
+# the database (MARKET_SIMULATOR_SHARDS > 0); None simulates every sector
+_lease_manager: Optional[ShardLeaseManager] = None
+if getattr(settings, "MARKET_SIMULATOR_SHARDS", 0):
+    _lease_manager = ShardLeaseManager(
+        worker_id=getattr(settings, "MARKET_SIMULATOR_WORKER_ID", None) or f"{socket.gethostname()}-{os.getpid()}",
+        shard_count=settings.MARKET_SIMULATOR_SHARDS,
+        lease_seconds=getattr(settings, "MARKET_SIMULATOR_LEASE_SECONDS", max(30, 3 * TICK_SECONDS)),
+    )
+
+# Callables receiving the TickMetrics of every bulk tick. With
+# MARKET_SIMULATOR_METRICS_PORT set, a Prometheus exporter is registered
+# and served at /metrics on that port.
+_metrics_exporter: Optional[PrometheusMetrics] = None
+if getattr(settings, "MARKET_SIMULATOR_METRICS_PORT", None):
+    _metrics_exporter = PrometheusMetrics()
+_metrics_hooks: List[Callable[[TickMetrics], None]] = [_metrics_exporter] if _metrics_exporter else []
+
+# Blocking database work runs here instead of on the event loop. A single
+# thread also keeps the engine, aggregator and cache single-writer.
+_db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="market-simulator-db")
+
+# End of the day partition retention last ran for
+_retention_partition: Optional[datetime] = None
 
 
-# Global state for trend tracking per sector
-_sector_trends: dict[str, dict] = {}
+async def _run_blocking(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking function on the simulator's database thread."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, fn, *args)
 
 
 def _round_to_5_minutes(dt: datetime) -> datetime:
@@ -30,9 +140,10 @@ def _round_to_5_minutes(dt: datetime) -> datetime:
     return dt.replace(minute=minutes, second=0, microsecond=0)
 
 
-def _get_next_5min_timestamp() -> datetime:
-    """Get the next 5-minute timestamp bucket."""
-    now = datetime.now(timezone.utc)
+def _get_next_5min_timestamp(now: Optional[datetime] = None) -> datetime:
+    """Get the 5-minute bucket a time belongs to (default: now)."""
+    if now is None:
+        now = datetime.now(timezone.utc)
     rounded = _round_to_5_minutes(now)
     # If we're exactly on a 5-minute boundary, move to next
     if rounded <= now:
@@ -40,6 +151,13 @@ def _get_next_5min_timestamp() -> datetime:
     return rounded
 
 
+def _tick_volume_range() -> tuple[int, int]:
+    """Volume range of one tick, so a full candle stays within CANDLE_VOLUME_RANGE."""
+    ticks_per_candle = max(1, int(CANDLE_SECONDS // TICK_SECONDS))
+    low, high = CANDLE_VOLUME_RANGE
+    return max(1, low // ticks_per_candle), max(1, high // ticks_per_candle)
+
+
 def _generate_price_change(
     base_price: float,
     sector_id: str,
@@ -48,6 +166,9 @@ def _generate_price_change(
     """
     Generate a new price based on the previous price.
     
+    Single-sector wrapper around the shared `SectorTickEngine`; batch
+    callers should step the engine directly.
+    
     Uses a combination of:
     - Trend bias (up/down/volatile)
     - Random walk
@@ -61,247 +182,934 @@ def _generate_price_change(
     Returns:
         New price value
     """
-    global _sector_trends
-    
-    # Initialize or get sector trend state
-    if sector_id not in _sector_trends:
-        _sector_trends[sector_id] = {
-            "trend": trend_bias or random.choice(["up", "down", "volatile"]),
-            "wave_phase": random.uniform(0, 2 * math.pi),
-            "momentum": 0.0,
-        }
-    
-    trend_state = _sector_trends[sector_id]
-    
-    # Determine trend direction
-    if trend_state["trend"] == "up":
-        trend_direction = 1.0
-    elif trend_state["trend"] == "down":
-        trend_direction = -1.0
-    else:  # volatile
-        trend_direction = random.choice([-1.0, 1.0])
+    new_prices = _tick_engine.step([sector_id], np.array([base_price]), trend_bias)
+    return float(new_prices[0])
+
+
+def _get_last_candle(db: Session, sector_id: str) -> Optional[SectorCandle]:
+    """Get the most recent candle for a sector, searching the newest days first."""
+    query = (
+        db.query(SectorCandle)
+        .filter(SectorCandle.sectorId == sector_id)
+        .order_by(desc(SectorCandle.timestamp))
+    )
+    for since in lookback_bounds(db):
+        bounded = query if since is None else query.filter(SectorCandle.timestamp >= since)
+        candle = bounded.first()
+        if candle is not None:
+            return candle
+    return None
+
+
+def set_simulator_seed(seed: Optional[int]) -> None:
+    """
+    Restart the simulator's random streams from a seed.
     
-    # Update wave phase for smooth oscillations
-    trend_state["wave_phase"] += 0.1
-    if trend_state["wave_phase"] > 2 * math.pi:
-        trend_state["wave_phase"] -= 2 * math.pi
+    Drops all trend state and cached prices; with the same seed and the
+    same starting prices, subsequent ticks are reproduced exactly.
     
-    # Calculate wave influence (sine wave for smooth curves)
-    wave_influence = math.sin(trend_state["wave_phase"]) * 0.3
+    Args:
+        seed: Run seed (None for a fresh random seed)
+    """
+    global _tick_engine
+    _tick_engine = SectorTickEngine(seed=seed)
+    _price_cache.invalidate()
+
+
+def set_session_factory(factory: Callable[[], Session]) -> None:
+    """
+    Point the simulator at another database (e.g. for benchmarks).
     
-    # Momentum (tendency to continue in current direction)
-    momentum_factor = trend_state["momentum"] * 0.2
+    Drops cached prices, open bars and recent candles, which belong to the
+    old database.
     
-    # Random component
-    random_change = random.uniform(-0.5, 0.5)
+    Args:
+        factory: Callable returning a new Session, like SessionLocal
+    """
+    global SessionLocal, _candle_aggregator
+    SessionLocal = factory
+    _candle_aggregator = OpenCandleAggregator()
+    _price_cache.invalidate()
+    if _candle_window is not None:
+        _candle_window.clear()
+
+
+def set_tick_publisher(publisher: Optional[TickPublisher]) -> None:
+    """
+    Replace the publisher used for tick events.
     
-    # Combine all factors
-    change_percent = (
-        trend_direction * 0.2 +  # Trend bias
-        wave_influence +          # Wave smoothing
-        momentum_factor +         # Momentum
-        random_change * 0.3       # Randomness
-    )
+    Args:
+        publisher: Batched publisher, or None to publish event by event
+    """
+    global _tick_publisher
+    _tick_publisher = publisher
+
+
+def add_metrics_hook(hook: Callable[[TickMetrics], None]) -> None:
+    """
+    Register a callable that receives the metrics of every bulk tick.
     
-    # Update momentum (decay and add new direction)
-    trend_state["momentum"] = trend_state["momentum"] * 0.7 + change_percent * 0.3
+    Args:
+        hook: Callable taking a TickMetrics, e.g. InMemoryMetrics or
+            PrometheusMetrics
+    """
+    _metrics_hooks.append(hook)
+
+
+def remove_metrics_hook(hook: Callable[[TickMetrics], None]) -> None:
+    """Unregister a hook added with `add_metrics_hook`."""
+    if hook in _metrics_hooks:
+        _metrics_hooks.remove(hook)
+
+
+def _emit_metrics(metrics: TickMetrics) -> None:
+    """Hand tick metrics to every hook; a failing hook never fails the tick."""
+    for hook in list(_metrics_hooks):
+        try:
+            hook(metrics)
+        except Exception as e:
+            print(f"Error in market simulator metrics hook: {e}")
+
+
+def invalidate_price_cache(sector_ids: Optional[List[str]] = None) -> None:
+    """
+    Drop cached last prices and recent candles after writing candles
+    outside the simulator.
     
-    # Occasionally change trend (10% chance)
-    if random.random() < 0.1:
-        trend_state["trend"] = random.choice(["up", "down", "volatile"])
+    Args:
+        sector_ids: Sectors to reload on the next tick (default: all)
+    """
+    _price_cache.invalidate(sector_ids)
+    if _candle_window is not None:
+        if sector_ids is None:
+            _candle_window.clear()
+        else:
+            _candle_window.remove_sectors(sector_ids)
+
+
+def get_recent_candles(sector_id: str, points: Optional[int] = None) -> Optional[List[dict]]:
+    """
+    Latest 5m candles of a sector from memory, without a query.
     
-    # Calculate new price
-    new_price = base_price * (1 + change_percent / 100.0)
+    Args:
+        sector_id: Sector ID
+        points: Number of candles (default: all held, up to
+            MARKET_SIMULATOR_WINDOW_CANDLES)
     
-    # Ensure price doesn't go negative
-    return max(0.01, new_price)
+    Returns:
+        Bar dicts oldest first, shaped like `candle_history.load_history`
+        bars; None when the window is disabled or does not hold the
+        sector (read from the database instead)
+    """
+    if _candle_window is None:
+        return None
+    return _candle_window.rows(sector_id, points)
 
 
-def _get_last_candle(db: Session, sector_id: str) -> Optional[SectorCandle]:
-    """Get the most recent candle for a sector."""
-    return (
-        db.query(SectorCandle)
-        .filter(SectorCandle.sectorId == sector_id)
-        .order_by(desc(SectorCandle.timestamp))
-        .first()
-    )
+def get_recent_candles_binary(sector_id: str, points: Optional[int] = None) -> Optional[bytes]:
+    """Like `get_recent_candles`, encoded as one `wire_format.encode_series` message."""
+    if _candle_window is None:
+        return None
+    return _candle_window.encode(sector_id, points)
 
 
-def _get_base_price(db: Session, sector: Sector) -> float:
+def _get_base_price(db: Session, sector: SectorRecord) -> float:
     """
     Get the base price for generating next candle.
     Uses last candle value if available, otherwise sector's current price.
     """
+    cached_price = _price_cache.last_price(sector.id)
+    if cached_price is not None:
+        return cached_price
     last_candle = _get_last_candle(db, sector.id)
     if last_candle:
         return last_candle.value
-    return sector.currentPrice if sector.currentPrice > 0 else 100.0
+    return sector.start_price
+
+
+def _resume_open_bars(db: Session, sector_ids: List[str]) -> None:
+    """
+    Continue the stored open 5m bar of sectors the aggregator does not hold.
+    
+    The newest stored 5m bar of a sector is its open bar: it is rewritten
+    every tick and rolled up only when a later tick closes it. Picking it
+    up after a restart keeps its open, high, low and volume instead of
+    overwriting it, and rolls it up once it closes.
+    """
+    missing = [sector_id for sector_id in sector_ids if sector_id not in _candle_aggregator]
+    if missing:
+        _candle_aggregator.resume(load_latest_ohlcv(db, BASE_RESOLUTION, missing))
+
+
+def _close_stale_bars(db: Session, sector_ids: List[str], bucket: datetime) -> int:
+    """
+    Close and roll up open bars of buckets before `bucket`.
+    
+    Runs before bars of later buckets are written in bulk (catch-up and
+    gap fills), so every coarse bar is merged from its 5m bars in order.
+    
+    Returns:
+        Number of rollup rows merged
+    """
+    _resume_open_bars(db, sector_ids)
+    rollup_rows = _rollup_rows(_candle_aggregator.close_before(bucket, sector_ids))
+    merge_ohlcv(db, rollup_rows)
+    return len(rollup_rows)
 
 
-async def _generate_candle_for_sector(sector: Sector, timestamp: datetime) -> None:
+def _sector_price_fields(current_price: float, base_price: float, new_price: float) -> dict:
     """
-    Generate a new candle for a sector and save it to the database.
+    Compute the Sector price columns for a new price.
+    
+    Change is measured against the sector's current price, or the base
+    price when the sector has no price yet.
+    """
+    old_price = current_price if current_price > 0 else base_price
+    change = new_price - old_price
+    change_percent = (change / old_price * 100.0) if old_price > 0 else 0.0
+    return {
+        "currentPrice": new_price,
+        "change": change,
+        "changePercent": change_percent,
+    }
+
+
+def _tick_sectors(
+    db: Session,
+    sectors: List[SectorRecord],
+    bucket: datetime,
+    base_prices: np.ndarray,
+    metrics: Optional[TickMetrics] = None,
+) -> List[dict]:
+    """
+    Advance sectors by one tick and stage all of its writes.
+    
+    Folds the tick into each sector's open 5-minute OHLCV bar, upserts the
+    bar and its SectorCandle (value = close), rolls up bars closed by this
+    tick into 15m/1h/4h/1d, updates the Sector price fields and saves the
+    trend state of the sectors. The caller owns the transaction.
     
     Args:
-        sector: Sector model instance
-        timestamp: Timestamp for the new candle
+        db: Database session (not committed here)
+        sectors: Sectors to advance
+        bucket: Timestamp of the 5-minute bucket the tick belongs to
+        base_prices: Previous price of each sector
+        metrics: Tick metrics to record compute/write timings and rows in
+    
+    Returns:
+        Candle events (one dict per sector) for caching and publishing
+    """
+    sector_ids = [sector.id for sector in sectors]
+    
+    # Advance every sector in one vectorized step
+    new_prices = _tick_engine.step(sector_ids, base_prices, dt=min(TICK_SECONDS, CANDLE_SECONDS))
+    volumes = _tick_engine.sample_volumes(sector_ids, *_tick_volume_range())
+    bars, closed_bars = _candle_aggregator.update(bucket, sector_ids, base_prices, new_prices, volumes)
+    
+    events = []
+    candle_rows = []
+    bar_rows = []
+    sector_rows = []
+    bar_fields = zip(
+        bars["open"].tolist(),
+        bars["high"].tolist(),
+        bars["low"].tolist(),
+        bars["close"].tolist(),
+        bars["volume"].tolist(),
+    )
+    for sector, base_price, (open_, high, low, close, volume) in zip(sectors, base_prices.tolist(), bar_fields):
+        event = {
+            "sectorId": sector.id,
+            "timestamp": bucket,
+            "value": close,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+        }
+        events.append(event)
+        candle_rows.append({
+            "timestamp": bucket,
+            "sectorId": sector.id,
+            "value": close,
+        })
+        bar_rows.append({
+            "sectorId": sector.id,
+            "resolution": BASE_RESOLUTION,
+            "timestamp": bucket,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+        })
+        sector_rows.append({
+            "id": sector.id,
+            "volume": volume,
+            **_sector_price_fields(sector.currentPrice, base_price, close),
+        })
+    
+    rollup_rows = _rollup_rows(closed_bars)
+    if metrics is not None:
+        metrics.lap("compute")
+    
+    upsert_candles(db, candle_rows)
+    upsert_ohlcv(db, bar_rows)
+    merge_ohlcv(db, rollup_rows)
+    update_sector_prices(db, sector_rows)
+    saved = save_engine_state(db, _tick_engine, sector_ids, datetime.now(timezone.utc))
+    if metrics is not None:
+        metrics.lap("write")
+        metrics.rows_written += len(candle_rows) + len(bar_rows) + len(rollup_rows) + len(sector_rows) + saved
+    
+    return events
+
+
+def _rollup_rows(closed_bars: List[dict]) -> List[dict]:
+    """Map closed 5m bars onto the coarser bars they belong to."""
+    rows = []
+    for bar in closed_bars:
+        closed_at = to_epoch(bar["timestamp"])
+        for resolution in ROLLUP_RESOLUTIONS:
+            rows.append({
+                **bar,
+                "resolution": resolution,
+                "timestamp": from_epoch(int(bucket_end(closed_at, RESOLUTIONS[resolution]))),
+            })
+    return rows
+
+
+def _remember_events(events: List[dict]) -> None:
+    """Record committed candles in the last-price cache and the candle window."""
+    for event in events:
+        _price_cache.update(event["sectorId"], event["timestamp"], event["close"], sector_price=event["close"])
+    
+    if _candle_window is not None and events:
+        _candle_window.append(
+            events[0]["timestamp"],
+            [event["sectorId"] for event in events],
+            *(np.array([event[field] for event in events]) for field in ("open", "high", "low", "close", "volume")),
+        )
+
+
+async def _publish_events(events: List[dict]) -> None:
+    """
+    Publish committed candles and market updates to realtime subscribers.
+    
+    With a batched publisher the sector events of a tick are published
+    concurrently; otherwise one after another. Both send the
+    same per-sector messages.
     """
+    if _tick_publisher is not None:
+        await _tick_publisher.publish(events)
+        return
+    
+    for event in events:
+        await publish_event(event)
+
+
+def _tick_sector(sector: SectorRecord, timestamp: datetime) -> List[dict]:
+    """Blocking part of `_generate_candle_for_sector`; returns the committed events."""
     db = SessionLocal()
     try:
-        # Get base price
         base_price = _get_base_price(db, sector)
-        
-        # Generate new price
-        new_price = _generate_price_change(base_price, sector.id)
-        
-        # Check if candle already exists for this timestamp
-        existing = (
-            db.query(SectorCandle)
-            .filter(
-                SectorCandle.sectorId == sector.id,
-                SectorCandle.timestamp == timestamp
-            )
-            .first()
-        )
-        
-        if existing:
-            # Update existing candle
-            existing.value = new_price
-        else:
-            # Create new candle
-            candle = SectorCandle(
-                timestamp=timestamp,
-                sectorId=sector.id,
-                value=new_price,
-            )
-            db.add(candle)
-        
-        # Update sector's current price and metrics
-        old_price = sector.currentPrice if sector.currentPrice > 0 else base_price
-        change = new_price - old_price
-        change_percent = (change / old_price * 100.0) if old_price > 0 else 0.0
-        
-        sector.currentPrice = new_price
-        sector.change = change
-        sector.changePercent = change_percent
-        # Generate synthetic volume (random between 1000-10000)
-        sector.volume = random.randint(1000, 10000)
-        
+        _resume_open_bars(db, [sector.id])
+        events = _tick_sectors(db, [sector], timestamp, np.array([base_price]))
         db.commit()
         
-        # Publish Redis events
-        await publish_sector_candle(
-            sectorId=sector.id,
-            candle={
-                "timestamp": timestamp.isoformat(),
-                "value": new_price,
-            }
-        )
-        
-        await publish_market_update(
-            sectorId=sector.id,
-            indexValue=new_price,
-            timestamp=timestamp.isoformat(),
-        )
-        
-        print(f"Generated candle for sector {sector.id} ({sector.name}): {new_price:.2f} at {timestamp}")
-        
     except Exception as e:
         db.rollback()
+        _candle_aggregator.remove_sectors([sector.id])
         print(f"Error generating candle for sector {sector.id}: {e}")
         raise
     finally:
         db.close()
+    
+    _remember_events(events)
+    return events
+
+
+async def _generate_candle_for_sector(sector: Union[Sector, SectorRecord], timestamp: datetime) -> None:
+    """
+    Generate a new tick for a single sector and save it to the database.
+    
+    Args:
+        sector: Sector model instance or record; only its columns are read
+        timestamp: Timestamp of the candle bucket the tick belongs to
+    """
+    if not isinstance(sector, SectorRecord):
+        sector = SectorRecord.from_model(sector)
+    events = await _run_blocking(_tick_sector, sector, timestamp)
+    await _publish_events(events)
+    print(f"Generated candle for sector {sector.id} ({sector.name}): {events[0]['close']:.2f} at {timestamp}")
+
+
+def _refresh_shards(db: Session, sectors: List[SectorRecord], now: datetime) -> List[SectorRecord]:
+    """
+    Renew this worker's shard leases when due and return the sectors it owns.
+    
+    Trend state and the open 5m bar are saved with every tick, so a
+    released or lost shard leaves nothing behind in memory: newly acquired
+    sectors restore their trend state and resume their open bar from the
+    last tick on another worker, and a shard continues without a jump when
+    it moves. Leases are committed right away, independent of the tick.
+    """
+    if _lease_manager.refresh_due(now):
+        acquired, released, lost = _lease_manager.refresh(db, now)
+        db.commit()
+        
+        if acquired:
+            acquired_ids = [
+                sector.id for sector in sectors
+                if shard_of(sector.id, _lease_manager.shard_count) in acquired
+            ]
+            load_engine_state(db, _tick_engine, acquired_ids)
+            _price_cache.invalidate(acquired_ids)
+            _candle_aggregator.remove_sectors(acquired_ids)
+            if _candle_window is not None:
+                _candle_window.remove_sectors(acquired_ids)
+        if released or lost:
+            # Owned elsewhere from now on; the stored open bars are continued there
+            moved = [sid for sid in _candle_aggregator.sector_ids if not _lease_manager.owns(sid)]
+            _candle_aggregator.remove_sectors(moved)
+        if acquired or released or lost:
+            print(
+                f"Simulator shards: own {len(_lease_manager.owned)}/{_lease_manager.shard_count} "
+                f"(+{len(acquired)}, -{len(released)} released, -{len(lost)} lost)"
+            )
+    
+    return [sector for sector in sectors if _lease_manager.owns(sector.id)]
+
+
+def _release_shards() -> None:
+    """
+    Checkpoint trend state and give back all shard leases on shutdown.
+    
+    Open bars are already stored by every tick and are resumed by the
+    workers that take the shards over.
+    """
+    db = SessionLocal()
+    try:
+        owned_ids = [sid for sid in _tick_engine.sector_ids if _lease_manager.owns(sid)]
+        save_engine_state(db, _tick_engine, owned_ids, datetime.now(timezone.utc))
+        _lease_manager.release_all(db)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error releasing simulator shards: {e}")
+    finally:
+        db.close()
 
 
-async def _update_all_sectors() -> None:
-    """Generate new candles for all sectors."""
+def _tick_all_sectors(
+    now: Optional[datetime] = None,
+    metrics: Optional[TickMetrics] = None,
+) -> Optional[tuple[datetime, List[dict]]]:
+    """
+    Blocking part of `_update_all_sectors`.
+    
+    Args:
+        now: Time of the tick (default: now)
+        metrics: Tick metrics to record phase timings and rows in
+    
+    Returns:
+        Tuple of (bucket, committed events), or None without sectors
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    filled = {}
     db = SessionLocal()
     try:
-        sectors = db.query(Sector).all()
-        timestamp = _get_next_5min_timestamp()
+        sectors = load_sector_records(db)
+        if _lease_manager is not None:
+            sectors = _refresh_shards(db, sectors, now)
+        if not sectors:
+            return None
+        bucket = _get_next_5min_timestamp(now)
+        
+        # Base prices from the cached latest candles; only sectors that are
+        # new or were changed by another writer are read from the database
+        _price_cache.sync(db, [(sector.id, sector.currentPrice) for sector in sectors])
+        base_prices = np.empty(len(sectors))
+        for i, sector in enumerate(sectors):
+            cached_price = _price_cache.last_price(sector.id)
+            if cached_price is None:
+                cached_price = sector.start_price
+            base_prices[i] = cached_price
+        
+        # Forget state of sectors that were removed
+        current_ids = {sector.id for sector in sectors}
+        _tick_engine.remove_sectors([sid for sid in _tick_engine.sector_ids if sid not in current_ids])
+        _candle_aggregator.remove_sectors([sid for sid in _candle_aggregator.sector_ids if sid not in current_ids])
+        if _candle_window is not None:
+            _candle_window.remove_sectors([sid for sid in _candle_window.sector_ids if sid not in current_ids])
+        if metrics is not None:
+            metrics.lap("read")
+            metrics.bucket = bucket
+            metrics.sectors = len(sectors)
         
-        # Generate candles for all sectors concurrently
-        tasks = [_generate_candle_for_sector(sector, timestamp) for sector in sectors]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        # Fill whole buckets missed while the simulator was stalled or
+        # failing, in one batch, before ticking the current bucket. Bars
+        # left open before the stall are closed and rolled up first.
+        closed_rollups = _close_stale_bars(db, [sector.id for sector in sectors], bucket)
+        if metrics is not None:
+            metrics.rows_written += closed_rollups
+        missed, start_offsets = _missed_buckets([sector.id for sector in sectors], bucket)
+        if missed and (start_offsets < len(missed)).any():
+            written, filled = _write_paths(db, sectors, missed, base_prices, start_offsets, True)
+            for i, sector in enumerate(sectors):
+                if sector.id in filled:
+                    base_prices[i] = filled[sector.id]
+            print(f"Filled {written} candles in {len(missed)} missed buckets")
+            if metrics is not None:
+                metrics.filled_candles = written
+                metrics.rows_written += written
+        if metrics is not None:
+            metrics.lap("catchup")
         
+        # Load recent candles of new sectors and reload filled sectors, so
+        # the window holds every bar before this tick's
+        if _candle_window is not None:
+            reload = [sector.id for sector in sectors if sector.id not in _candle_window or sector.id in filled]
+            if reload:
+                _candle_window.load(db, reload, bucket)
+        
+        events = _tick_sectors(db, sectors, bucket, base_prices, metrics)
+        db.commit()
+        if metrics is not None:
+            metrics.lap("commit")
+        
+    except Exception:
+        db.rollback()
+        _price_cache.invalidate()
+        _candle_aggregator.clear()
+        if _candle_window is not None:
+            _candle_window.clear()
+        raise
     finally:
         db.close()
+    
+    if filled:
+        for sector_id, last_value in filled.items():
+            _price_cache.update(sector_id, missed[-1], last_value, sector_price=last_value)
+    _remember_events(events)
+    return bucket, events
 
 
-async def _backfill_day_of_data() -> None:
+async def _update_all_sectors(now: Optional[datetime] = None) -> None:
     """
-    Backfill a day of data (288 candles) if database is empty.
-    Only backfills if no candles exist for any sector.
+    Advance all sectors by one tick in one bulk transaction.
+    
+    Reads the sector list with one query (base prices come from the
+    last-price cache), advances all sectors in one vectorized step, then
+    writes every candle, OHLCV bar and sector price in a single commit
+    before publishing realtime events. Whole buckets missed since the
+    previous tick are filled in the same transaction. The database work
+    runs on the simulator's database thread.
+    
+    Timings, rows written and lateness of the tick are handed to the
+    registered metrics hooks.
+    
+    Args:
+        now: Time of the tick (default: now); a scheduled tick passes its
+            slot time, which lateness is measured against
     """
-    db = SessionLocal()
+    metrics = TickMetrics(scheduled_at=now)
     try:
-        # Check if any candles exist
-        candle_count = db.query(func.count(SectorCandle.timestamp)).scalar()
-        
-        if candle_count > 0:
-            print("Candles already exist, skipping backfill")
+        result = await _run_blocking(_tick_all_sectors, now, metrics)
+        if result is None:
             return
+        bucket, events = result
         
-        print("No candles found, backfilling 24 hours of data...")
+        # Publish Redis events once the tick is durable
+        await _publish_events(events)
+        metrics.lap("publish")
+    except Exception as e:
+        _emit_metrics(metrics.finish(e))
+        raise
+    _emit_metrics(metrics.finish())
+    
+    print(f"Generated ticks for {len(events)} sectors in bucket {bucket}")
+
+
+def _iter_backfill_rows(timestamps: List[datetime], sector_ids: List[str], paths: np.ndarray):
+    """Yield candle rows for every generated (non-NaN) point of a path array."""
+    for row, timestamp in enumerate(timestamps):
+        values = paths[row]
+        for col in np.flatnonzero(~np.isnan(values)).tolist():
+            yield {
+                "timestamp": timestamp,
+                "sectorId": sector_ids[col],
+                "value": float(values[col]),
+            }
+
+
+def _backfill_bar_arrays(paths: np.ndarray, base_prices: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Open/high/low arrays for backfilled 5m bars (one tick per bar).
+    
+    Each bar opens at the previous close, or the base price for the first
+    generated bar of a sector.
+    """
+    opens = np.vstack([base_prices[None, :], paths[:-1]])
+    opens = np.where(np.isnan(opens), base_prices[None, :], opens)
+    return opens, np.fmax(opens, paths), np.fmin(opens, paths)
+
+
+def _backfill_bar_rows(
+    timestamps: List[datetime],
+    sector_ids: List[str],
+    paths: np.ndarray,
+    volumes: np.ndarray,
+    base_prices: np.ndarray,
+):
+    """
+    Build 5m OHLCV rows, plus coarser rollups, for backfilled paths.
+    
+    Rollup rows are pre-aggregated per sector so each coarse bar appears
+    once and can be merged into bars that already exist. The last bar of
+    each sector is left out of the rollups and returned as its open bar,
+    to be rolled up when the simulator closes it.
+    
+    Returns:
+        Tuple of (5m row iterator, rollup row list, open bar list)
+    """
+    opens, highs, lows = _backfill_bar_arrays(paths, base_prices)
+    epochs = np.array([to_epoch(ts) for ts in timestamps], dtype=np.int64)
+    
+    def base_rows():
+        for row, timestamp in enumerate(timestamps):
+            for col in np.flatnonzero(~np.isnan(paths[row])).tolist():
+                yield {
+                    "sectorId": sector_ids[col],
+                    "resolution": BASE_RESOLUTION,
+                    "timestamp": timestamp,
+                    "open": float(opens[row, col]),
+                    "high": float(highs[row, col]),
+                    "low": float(lows[row, col]),
+                    "close": float(paths[row, col]),
+                    "volume": int(volumes[row, col]),
+                }
+    
+    rollups = []
+    open_bars = []
+    for col, sector_id in enumerate(sector_ids):
+        if np.isnan(paths[-1, col]):
+            continue
+        open_bars.append({
+            "sectorId": sector_id,
+            "timestamp": timestamps[-1],
+            "open": float(opens[-1, col]),
+            "high": float(highs[-1, col]),
+            "low": float(lows[-1, col]),
+            "close": float(paths[-1, col]),
+            "volume": int(volumes[-1, col]),
+        })
+        active = ~np.isnan(paths[:, col])
+        active[-1] = False
+        for resolution in ROLLUP_RESOLUTIONS:
+            for ts, open_, high, low, close, volume in zip(*(
+                values.tolist() for values in rollup_bars(
+                    epochs[active],
+                    opens[active, col],
+                    highs[active, col],
+                    lows[active, col],
+                    paths[active, col],
+                    volumes[active, col],
+                    RESOLUTIONS[resolution],
+                )
+            )):
+                rollups.append({
+                    "sectorId": sector_id,
+                    "resolution": resolution,
+                    "timestamp": from_epoch(ts),
+                    "open": open_,
+                    "high": high,
+                    "low": low,
+                    "close": close,
+                    "volume": volume,
+                })
+    
+    return base_rows(), rollups, open_bars
+
+
+def _write_paths(
+    db: Session,
+    sectors: List[SectorRecord],
+    timestamps: List[datetime],
+    base_prices: np.ndarray,
+    start_offsets: np.ndarray,
+    skip_existing: bool,
+) -> tuple[int, dict[str, float]]:
+    """
+    Simulate one tick per 5-minute bucket and stage all of its writes.
+    
+    Each sector stays idle until its start offset. Candles, OHLCV bars and
+    their rollups are bulk inserted and every sector that advanced is left
+    at the end of its path, with its last bar held open in the aggregator.
+    The caller owns the transaction.
+    
+    Args:
+        db: Database session (not committed here)
+        sectors: Sectors to simulate
+        timestamps: Bucket timestamps, one tick each
+        base_prices: Price each sector starts from
+        start_offsets: First bucket each sector is simulated for
+        skip_existing: Leave candles and bars that already exist untouched
+    
+    Returns:
+        Tuple of (candles written, last value of each sector that advanced)
+    """
+    steps = len(timestamps)
+    sector_ids = [sector.id for sector in sectors]
+    paths, volumes = _tick_engine.simulate_paths(
+        sector_ids, base_prices, steps, start_offsets, CANDLE_VOLUME_RANGE
+    )
+    written = insert_candles(
+        db,
+        _iter_backfill_rows(timestamps, sector_ids, paths),
+        skip_existing=skip_existing,
+    )
+    bar_rows, rollup_rows, open_bars = _backfill_bar_rows(timestamps, sector_ids, paths, volumes, base_prices)
+    insert_ohlcv(db, bar_rows, skip_existing=skip_existing)
+    for chunk in iter_chunks(rollup_rows):
+        merge_ohlcv(db, chunk)
+    _candle_aggregator.resume(open_bars)
+    
+    # Leave each sector at the end of its generated path
+    sector_rows = []
+    last_values = {}
+    for i, sector in enumerate(sectors):
+        if start_offsets[i] >= steps:
+            continue
+        previous = paths[-2, i] if start_offsets[i] <= steps - 2 else base_prices[i]
+        last_values[sector.id] = float(paths[-1, i])
+        sector_rows.append({
+            "id": sector.id,
+            "volume": int(volumes[-1, i]),
+            **_sector_price_fields(float(previous), float(previous), last_values[sector.id]),
+        })
+    update_sector_prices(db, sector_rows)
+    
+    return written, last_values
+
+
+def _missed_buckets(sector_ids: List[str], bucket: datetime) -> tuple[List[datetime], np.ndarray]:
+    """
+    Whole 5-minute buckets skipped since each sector's last candle.
+    
+    Looks back at most MAX_CATCHUP_BUCKETS before `bucket`. Sectors
+    without a cached candle are not filled.
+    
+    Returns:
+        Tuple of (missed bucket timestamps, first missed index per sector)
+    """
+    last_seen = [_price_cache.get(sector_id) for sector_id in sector_ids]
+    known = [entry[0] for entry in last_seen if entry is not None]
+    if not known:
+        return [], np.zeros(0, dtype=np.intp)
+    
+    step = timedelta(seconds=CANDLE_SECONDS)
+    first = max(
+        _round_to_5_minutes(min(known)) + step,
+        bucket - MAX_CATCHUP_BUCKETS * step,
+    )
+    timestamps = []
+    while first < bucket:
+        timestamps.append(first)
+        first += step
+    
+    start_offsets = np.array([
+        bisect.bisect_right(timestamps, entry[0]) if entry is not None else len(timestamps)
+        for entry in last_seen
+    ], dtype=np.intp)
+    return timestamps, start_offsets
+
+
+def _backfill_candles(days: int, only_gaps: bool) -> None:
+    """Blocking part of `_backfill_day_of_data`."""
+    db = SessionLocal()
+    try:
+        if not only_gaps:
+            # Check if any candles exist
+            if db.query(SectorCandle.timestamp).first() is not None:
+                print("Candles already exist, skipping backfill")
+                return
+            print(f"No candles found, backfilling {days * 24} hours of data...")
         
-        sectors = db.query(Sector).all()
+        sectors = load_sector_records(db)
         if not sectors:
             print("No sectors found, skipping backfill")
             return
         
-        # Generate 288 candles (24 hours * 12 per hour)
+        # 288 candles per day (24 hours * 12 per hour)
+        steps = days * CANDLES_PER_DAY
         now = datetime.now(timezone.utc)
-        start_time = _round_to_5_minutes(now - timedelta(days=1))
+        start_time = _round_to_5_minutes(now - timedelta(days=days))
+        timestamps = [start_time + timedelta(minutes=i * 5) for i in range(steps)]
         
-        for i in range(288):
-            timestamp = start_time + timedelta(minutes=i * 5)
-            
-            # Generate candles for all sectors
-            for sector in sectors:
-                try:
-                    await _generate_candle_for_sector(sector, timestamp)
-                except Exception as e:
-                    print(f"Error backfilling candle for sector {sector.id} at {timestamp}: {e}")
+        sector_ids = [sector.id for sector in sectors]
+        base_prices = np.array([sector.start_price for sector in sectors])
+        start_offsets = np.zeros(len(sectors), dtype=np.intp)
         
-        print(f"Backfilled {288} candles for {len(sectors)} sectors")
+        if only_gaps:
+            # Continue each sector from its latest candle inside the window
+            latest = load_latest_candles(db)
+            for i, sector_id in enumerate(sector_ids):
+                if sector_id in latest:
+                    last_timestamp, last_value = latest[sector_id]
+                    base_prices[i] = last_value
+                    start_offsets[i] = bisect.bisect_right(timestamps, last_timestamp)
+            if (start_offsets >= steps).all():
+                print("No candle gaps found, skipping backfill")
+                return
+        
+        advancing = [sector_id for sector_id, offset in zip(sector_ids, start_offsets.tolist()) if offset < steps]
+        _close_stale_bars(db, advancing, timestamps[-1])
+        written, last_values = _write_paths(db, sectors, timestamps, base_prices, start_offsets, only_gaps)
+        save_engine_state(db, _tick_engine, list(last_values), now)
+        db.commit()
         
+        for sector_id, last_value in last_values.items():
+            _price_cache.update(sector_id, timestamps[-1], last_value, sector_price=last_value)
+        if _candle_window is not None:
+            _candle_window.remove_sectors(list(last_values))
+        
+        print(f"Backfilled {written} candles for {len(last_values)} sectors")
+        
+    except Exception as e:
+        db.rollback()
+        _candle_aggregator.clear()
+        print(f"Error backfilling candles: {e}")
+    finally:
+        db.close()
+
+
+async def _backfill_day_of_data(days: int = 1, only_gaps: bool = False) -> None:
+    """
+    Backfill 5-minute candles (288 per day) for all sectors.
+    
+    Paths for every sector are generated as one array by the tick engine
+    (one tick per candle), written with their OHLCV bars and rollups using
+    chunked bulk inserts in a single transaction on the simulator's
+    database thread, and not published to realtime subscribers.
+    
+    Args:
+        days: Number of days of history to cover, ending now
+        only_gaps: If False, only backfill when no candles exist at all.
+            If True, continue every sector from its latest candle (or the
+            start of the window) and insert only the missing buckets.
+    """
+    await _run_blocking(_backfill_candles, days, only_gaps)
+
+
+def _restore_state() -> None:
+    """
+    Load the latest candle of every sector into the last-price cache and
+    restore persisted trend state, one query each.
+    
+    With sharding, trend state is restored as shards are acquired instead.
+    """
+    db = SessionLocal()
+    try:
+        ensure_time_indexes(db)
+        db.commit()
+        _price_cache.warm(db)
+        if _candle_window is not None:
+            loaded = _candle_window.load(db, [sector.id for sector in load_sector_records(db)])
+            print(f"Loaded {loaded} recent candles ({_candle_window.nbytes / 2**20:.1f} MB window)")
+        if _lease_manager is None:
+            restored = load_engine_state(db, _tick_engine)
+            print(f"Restored trend state of {restored} sectors")
     finally:
         db.close()
 
 
+def _enforce_retention(now: datetime) -> bool:
+    """
+    Blocking part of `_maybe_enforce_retention`.
+    
+    Returns:
+        Whether the retention pass completed
+    """
+    db = SessionLocal()
+    try:
+        stats = enforce_retention(db, RETENTION_DAYS, now)
+        if stats["partitions"] or stats["bars"]:
+            print(
+                f"Candle retention: compacted {stats['partitions']} partitions into "
+                f"{stats['compacted']} bars, dropped {stats['candles']} candles and {stats['bars']} bars"
+            )
+        return True
+    except Exception as e:
+        db.rollback()
+        print(f"Error enforcing candle retention: {e}")
+        return False
+    finally:
+        db.close()
+
+
+async def _maybe_enforce_retention(now: datetime) -> None:
+    """
+    Compact and drop expired candle partitions once per day partition.
+    
+    Runs between ticks on the simulator's database thread. A failed pass
+    is retried after the next tick. With sharding, only the worker owning
+    shard 0 runs it.
+    """
+    global _retention_partition
+    
+    if not ENABLE_RETENTION:
+        return
+    if _lease_manager is not None and 0 not in _lease_manager.owned:
+        return
+    partition = partition_end(now)
+    if partition == _retention_partition:
+        return
+    if await _run_blocking(_enforce_retention, now):
+        _retention_partition = partition
+
+
 async def _scheduler_loop() -> None:
     """
-    Main scheduler loop that runs every 5 minutes.
+    Main scheduler loop that ticks every TICK_SECONDS.
+    
+    Ticks run at slot boundaries of a monotonic `TickSchedule`, so delays
+    do not accumulate. A tick that overruns or fails moves on to the next
+    future slot; the next successful tick fills any whole buckets that
+    were missed in the meantime. Candle retention runs after the first
+    tick of every day.
     """
     print("Market simulator scheduler started")
     
-    # Backfill on startup if needed
-    await _backfill_day_of_data()
+    # Warm the last-price cache and restore trend state once; ticks keep
+    # both current afterwards
+    await _run_blocking(_restore_state)
+    
+    # Backfill on startup if needed, continuing from the restored state
+    await _backfill_day_of_data(
+        days=getattr(settings, "MARKET_SIMULATOR_BACKFILL_DAYS", 1),
+        only_gaps=getattr(settings, "MARKET_SIMULATOR_BACKFILL_GAPS", False),
+    )
     
-    # Calculate time until next 5-minute boundary
+    schedule = TickSchedule(TICK_SECONDS)
+    slot = schedule.current_slot() + 1
     while True:
+        # Wait until the slot starts, then advance all sectors by one tick
+        await schedule.sleep_until(slot)
         try:
-            now = datetime.now(timezone.utc)
-            next_run = _get_next_5min_timestamp()
-            wait_seconds = (next_run - now).total_seconds()
-            
-            # Wait until next 5-minute boundary
-            if wait_seconds > 0:
-                print(f"Market simulator: waiting {wait_seconds:.1f} seconds until {next_run}")
-                await asyncio.sleep(wait_seconds)
-            
-            # Generate candles for all sectors
-            print(f"Market simulator: generating candles at {datetime.now(timezone.utc)}")
-            await _update_all_sectors()
-            
-            # Small delay to avoid tight loop if timing is off
-            await asyncio.sleep(1)
-            
+            await _update_all_sectors(schedule.slot_time(slot))
         except Exception as e:
             print(f"Error in market simulator scheduler: {e}")
-            # Wait a bit before retrying
-            await asyncio.sleep(60)
+        await _maybe_enforce_retention(schedule.slot_time(slot))
+        
+        if schedule.resync():
+            print("Wall clock changed, re-anchored market simulator schedule")
+        next_slot = schedule.next_slot(slot)
+        if next_slot > slot + 1:
+            print(f"Market simulator tick overran, skipping {next_slot - slot - 1} tick(s)")
+        slot = next_slot
 
 
 _simulator_task: Optional[asyncio.Task] = None
@@ -320,6 +1128,8 @@ async def start_market_simulator() -> None:
         return
     
     print("Starting market simulator...")
+    if _metrics_exporter is not None:
+        _metrics_exporter.serve(int(settings.MARKET_SIMULATOR_METRICS_PORT))
     _simulator_task = asyncio.create_task(_scheduler_loop())
 
 
@@ -335,4 +1145,6 @@ async def stop_market_simulator() -> None:
         except asyncio.CancelledError:
             pass
         _simulator_task = None
+        if _lease_manager is not None:
+            await _run_blocking(_release_shards)
         print("Market simulator stopped")
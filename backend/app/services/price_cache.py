@@ -0,0 +1,141 @@
+"""
+In-memory last-candle cache for the market simulator.
+
+The simulator is normally the only writer of sector candles, so the value
+it wrote on the previous tick is the base price of the next one. This cache
+keeps that value per sector and only goes back to the database when it is
+cold, when sectors appear, or when something else has changed a price.
+"""
+
+import math
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.services.candle_persistence import load_latest_candles
+
+
+# Relative difference below which a stored price still counts as the one
+# the simulator wrote (prices can come back from the database or another
+# client rounded, e.g. to single precision or six decimals)
+PRICE_REL_TOLERANCE = 1e-6
+
+
+class LastPriceCache:
+    """
+    Last candle (timestamp, value) and last written price per sector ID.
+
+    Args:
+        rel_tol: Relative price difference tolerated before a sector is
+            considered changed by another writer
+    """
+
+    def __init__(self, rel_tol: float = PRICE_REL_TOLERANCE):
+        self.rel_tol = rel_tol
+        self._candles: dict[str, tuple[datetime, float]] = {}
+        self._written_prices: dict[str, float] = {}
+        self._known_sectors: set[str] = set()
+        self._warm = False
+
+    @property
+    def is_warm(self) -> bool:
+        return self._warm
+
+    def __len__(self) -> int:
+        return len(self._candles)
+
+    def warm(self, db: Session) -> None:
+        """Load the latest candle of every sector in one query."""
+        self._candles = load_latest_candles(db)
+        self._written_prices = {}
+        self._known_sectors = set(self._candles)
+        self._warm = True
+
+    def get(self, sector_id: str) -> Optional[tuple[datetime, float]]:
+        """Return the cached (timestamp, value) of a sector's last candle."""
+        return self._candles.get(sector_id)
+
+    def last_price(self, sector_id: str) -> Optional[float]:
+        """Return the cached last candle value of a sector."""
+        candle = self._candles.get(sector_id)
+        return candle[1] if candle else None
+
+    def update(self, sector_id: str, timestamp: datetime, value: float, sector_price: Optional[float] = None) -> None:
+        """
+        Record a candle written by the simulator.
+
+        Older timestamps (e.g. from a backfill) never replace a newer candle.
+
+        Args:
+            sector_id: Sector ID
+            timestamp: Candle timestamp
+            value: Candle value
+            sector_price: Sector.currentPrice written alongside the candle
+        """
+        cached = self._candles.get(sector_id)
+        if cached is None or timestamp >= cached[0]:
+            self._candles[sector_id] = (timestamp, value)
+        if sector_price is not None:
+            self._written_prices[sector_id] = sector_price
+        self._known_sectors.add(sector_id)
+
+    def invalidate(self, sector_ids: Optional[Iterable[str]] = None) -> None:
+        """
+        Drop cached entries so they are reloaded from the database.
+
+        Args:
+            sector_ids: Sectors to drop; None drops everything and marks the cache cold
+        """
+        if sector_ids is None:
+            self._candles.clear()
+            self._written_prices.clear()
+            self._known_sectors.clear()
+            self._warm = False
+            return
+
+        for sector_id in sector_ids:
+            self._candles.pop(sector_id, None)
+            self._written_prices.pop(sector_id, None)
+            self._known_sectors.discard(sector_id)
+
+    def sync(self, db: Session, sectors: Sequence[tuple[str, float]]) -> None:
+        """
+        Reconcile the cache with the current sector list before a tick.
+
+        Removed sectors are dropped. Sectors whose price differs from what the
+        simulator last wrote (beyond `rel_tol`, so a price rounded by the
+        database still matches) were changed by another writer and are reloaded,
+        together with newly added sectors, in a single query. In the steady
+        state this issues no query at all.
+
+        Args:
+            db: Database session
+            sectors: (sector_id, currentPrice) of every sector in the database
+        """
+        if not self._warm:
+            self.warm(db)
+
+        current_ids = {sector_id for sector_id, _ in sectors}
+        removed = self._known_sectors - current_ids
+        if removed:
+            self.invalidate(removed)
+
+        stale = [
+            sector_id
+            for sector_id, current_price in sectors
+            if sector_id in self._written_prices
+            and not self._matches_written(self._written_prices[sector_id], current_price)
+        ]
+        if stale:
+            self.invalidate(stale)
+
+        missing = [sector_id for sector_id in current_ids if sector_id not in self._known_sectors]
+        if missing:
+            self._candles.update(load_latest_candles(db, missing))
+            self._known_sectors.update(missing)
+
+    def _matches_written(self, written: float, current: Optional[float]) -> bool:
+        if current is None:
+            return False
+        return math.isclose(written, current, rel_tol=self.rel_tol, abs_tol=self.rel_tol)
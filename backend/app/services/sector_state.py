@@ -0,0 +1,55 @@
+"""
+Compact in-memory sector records for the market simulator.
+
+The simulator only needs a sector's ID, name and current price. Loading
+those columns into slotted records, instead of full ORM `Sector`
+instances, keeps per-sector memory small, avoids identity-map and
+dirty-tracking overhead and leaves no detached instances behind once the
+session closes. Price writes are one Core executemany UPDATE at the
+persistence boundary (see `update_sector_prices`).
+"""
+
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.sector import Sector
+
+
+class SectorRecord:
+    """Plain copy of the sector columns the simulator reads."""
+
+    __slots__ = ("id", "name", "currentPrice")
+
+    def __init__(self, id: str, name: str, currentPrice: float):
+        self.id = id
+        self.name = name
+        self.currentPrice = currentPrice
+
+    @classmethod
+    def from_model(cls, sector: Sector) -> "SectorRecord":
+        """Copy the simulator's columns out of an ORM instance."""
+        return cls(sector.id, sector.name, sector.currentPrice)
+
+    @property
+    def start_price(self) -> float:
+        """Price to start from when the sector has no candles yet."""
+        return self.currentPrice if self.currentPrice and self.currentPrice > 0 else 100.0
+
+    def __repr__(self) -> str:
+        return f"SectorRecord(id={self.id!r}, name={self.name!r}, currentPrice={self.currentPrice!r})"
+
+
+def load_sector_records(db: Session) -> List[SectorRecord]:
+    """
+    Load every sector as a `SectorRecord` with one Core query.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Sector records ordered by ID
+    """
+    rows = db.execute(select(Sector.id, Sector.name, Sector.currentPrice).order_by(Sector.id))
+    return [SectorRecord(sector_id, name, current_price) for sector_id, name, current_price in rows]
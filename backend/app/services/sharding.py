@@ -0,0 +1,185 @@
+"""
+Partitioning of sectors across market simulator workers.
+
+Sectors are hashed onto a fixed number of shards, and workers hold
+time-limited leases on shards in the database. On every refresh a worker
+renews its heartbeat, gives back shards above its fair share of the live
+workers and claims free or expired shards up to that share. A worker that
+dies stops renewing, and its shards are claimed by the others once their
+leases expire.
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.simulator_lease import SimulatorShardLease, SimulatorWorker
+from app.services.candle_persistence import as_utc, dialect_insert
+from app.services.random_streams import stable_key
+
+
+def shard_of(sector_id: str, shard_count: int) -> int:
+    """Shard a sector belongs to; stable across processes and restarts."""
+    return stable_key(sector_id) % shard_count
+
+
+class ShardLeaseManager:
+    """
+    Shard leases held by one simulator worker.
+
+    Args:
+        worker_id: Unique ID of this worker
+        shard_count: Number of shards sectors are hashed onto
+        lease_seconds: Lifetime of heartbeats and leases; refresh well
+            within it (e.g. every third of it)
+    """
+
+    def __init__(self, worker_id: str, shard_count: int, lease_seconds: float):
+        if shard_count < 1:
+            raise ValueError("shard_count must be at least 1")
+        self.worker_id = worker_id
+        self.shard_count = shard_count
+        self.lease = timedelta(seconds=lease_seconds)
+        self.owned: set[int] = set()
+        self._next_refresh: Optional[datetime] = None
+
+    def owns(self, sector_id: str) -> bool:
+        """Whether this worker currently simulates a sector."""
+        return shard_of(sector_id, self.shard_count) in self.owned
+
+    def refresh_due(self, now: datetime) -> bool:
+        """Whether a third of the lease has passed since the last refresh."""
+        return self._next_refresh is None or now >= self._next_refresh
+
+    def refresh(self, db: Session, now: datetime) -> tuple[set[int], set[int], set[int]]:
+        """
+        Heartbeat, renew leases and rebalance shards. The caller commits.
+
+        Args:
+            db: Database session (not committed here)
+            now: Current time
+
+        Returns:
+            Tuple of (shards acquired, shards given back, shards lost to
+            another worker after this worker's lease expired)
+        """
+        expires = now + self.lease
+        self._heartbeat(db, expires)
+        self._ensure_shards(db)
+
+        live_workers = db.execute(
+            select(SimulatorWorker.id).where(SimulatorWorker.expiresAt > now)
+        ).scalars().all()
+        fair_share = math.ceil(self.shard_count / max(1, len(live_workers)))
+
+        leases = db.execute(
+            select(SimulatorShardLease.shard, SimulatorShardLease.owner, SimulatorShardLease.expiresAt)
+        ).all()
+        held = sorted(
+            shard for shard, owner, expires_at in leases
+            if owner == self.worker_id and expires_at is not None and as_utc(expires_at) > now
+        )
+        free = [
+            shard for shard, owner, expires_at in leases
+            if shard < self.shard_count
+            and (owner is None or expires_at is None or as_utc(expires_at) <= now)
+        ]
+
+        # Give back shards above the fair share so new workers get some
+        keep, give_back = held[:fair_share], held[fair_share:]
+        if give_back:
+            db.execute(
+                update(SimulatorShardLease)
+                .where(
+                    SimulatorShardLease.shard.in_(give_back),
+                    SimulatorShardLease.owner == self.worker_id,
+                )
+                .values(owner=None, expiresAt=None)
+            )
+        if keep:
+            db.execute(
+                update(SimulatorShardLease)
+                .where(
+                    SimulatorShardLease.shard.in_(keep),
+                    SimulatorShardLease.owner == self.worker_id,
+                )
+                .values(expiresAt=expires)
+            )
+
+        # Claim free shards one by one; the conditional UPDATE makes a
+        # concurrent claim by another worker lose cleanly
+        owned = set(keep)
+        for shard in free:
+            if len(owned) >= fair_share:
+                break
+            result = db.execute(
+                update(SimulatorShardLease)
+                .where(
+                    SimulatorShardLease.shard == shard,
+                    or_(
+                        SimulatorShardLease.owner.is_(None),
+                        SimulatorShardLease.owner == self.worker_id,
+                        SimulatorShardLease.expiresAt.is_(None),
+                        SimulatorShardLease.expiresAt <= now,
+                    ),
+                )
+                .values(owner=self.worker_id, expiresAt=expires)
+            )
+            if result.rowcount:
+                owned.add(shard)
+
+        previous = self.owned
+        self.owned = owned
+        self._next_refresh = now + self.lease / 3
+        released = set(give_back) & previous
+        return owned - previous, released, previous - owned - released
+
+    def release_all(self, db: Session) -> set[int]:
+        """
+        Give back every shard and remove the heartbeat. The caller commits.
+
+        Returns:
+            Shards that were released
+        """
+        db.execute(
+            update(SimulatorShardLease)
+            .where(SimulatorShardLease.owner == self.worker_id)
+            .values(owner=None, expiresAt=None)
+        )
+        db.execute(delete(SimulatorWorker).where(SimulatorWorker.id == self.worker_id))
+        released, self.owned = self.owned, set()
+        self._next_refresh = None
+        return released
+
+    def _heartbeat(self, db: Session, expires: datetime) -> None:
+        table = SimulatorWorker.__table__
+        insert = dialect_insert(db)
+        if insert is not None:
+            stmt = insert(table).values(id=self.worker_id, expiresAt=expires)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c.id],
+                set_={"expiresAt": stmt.excluded.expiresAt},
+            ))
+        else:
+            db.execute(delete(table).where(table.c.id == self.worker_id))
+            db.execute(table.insert().values(id=self.worker_id, expiresAt=expires))
+
+        # Forget workers that stopped heartbeating long ago
+        db.execute(delete(table).where(and_(table.c.id != self.worker_id, table.c.expiresAt < expires - 10 * self.lease)))
+
+    def _ensure_shards(self, db: Session) -> None:
+        existing = set(db.execute(select(SimulatorShardLease.shard)).scalars().all())
+        missing = [{"shard": shard} for shard in range(self.shard_count) if shard not in existing]
+        if not missing:
+            return
+
+        table = SimulatorShardLease.__table__
+        insert = dialect_insert(db)
+        if insert is not None:
+            db.execute(insert(table).on_conflict_do_nothing(index_elements=[table.c.shard]), missing)
+        else:
+            db.execute(table.insert(), missing)
+
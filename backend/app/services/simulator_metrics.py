@@ -0,0 +1,211 @@
+"""
+Per-tick metrics for the market simulator.
+
+Every tick fills a `TickMetrics` record: wall time, per-phase timings,
+rows written, publish latency and how late the tick started relative to
+its scheduled slot. Records are handed to the registered metrics hooks,
+which are plain callables. Two are provided: `InMemoryMetrics` keeps
+recent records (e.g. for tests), and `PrometheusMetrics` aggregates them
+and renders the Prometheus text exposition format.
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+
+# Phases of a tick, in order
+PHASES = ("read", "catchup", "compute", "write", "commit", "publish")
+
+
+class TickMetrics:
+    """
+    Measurements of one simulator tick.
+
+    Phase timings are taken with `lap`, which charges the time since the
+    previous lap (or the start of the tick) to a phase.
+    """
+
+    def __init__(self, scheduled_at: Optional[datetime] = None):
+        self.started_at = datetime.now(timezone.utc)
+        self.scheduled_at = scheduled_at
+        self.bucket: Optional[datetime] = None
+        self.sectors = 0
+        self.rows_written = 0
+        self.filled_candles = 0
+        self.phases: dict[str, float] = {}
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+        self._last = self._start
+
+    @property
+    def lateness(self) -> float:
+        """Seconds the tick started after its scheduled slot (0 if unscheduled)."""
+        if self.scheduled_at is None:
+            return 0.0
+        return max(0.0, (self.started_at - self.scheduled_at).total_seconds())
+
+    @property
+    def publish_latency(self) -> float:
+        """Seconds spent publishing the tick's events."""
+        return self.phases.get("publish", 0.0)
+
+    def lap(self, phase: str) -> None:
+        """Charge the time since the previous lap to `phase`."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._last)
+        self._last = now
+
+    def finish(self, error: Optional[BaseException] = None) -> "TickMetrics":
+        """Record the total wall time (and the error, if the tick failed)."""
+        self.duration = time.perf_counter() - self._start
+        if error is not None:
+            self.error = type(error).__name__
+        return self
+
+    def as_dict(self) -> dict:
+        return {
+            "startedAt": self.started_at.isoformat(),
+            "bucket": self.bucket.isoformat() if self.bucket else None,
+            "sectors": self.sectors,
+            "rowsWritten": self.rows_written,
+            "filledCandles": self.filled_candles,
+            "duration": self.duration,
+            "lateness": self.lateness,
+            "publishLatency": self.publish_latency,
+            "phases": dict(self.phases),
+            "error": self.error,
+        }
+
+
+class InMemoryMetrics:
+    """Metrics hook that keeps the most recent tick records."""
+
+    def __init__(self, max_ticks: int = 1000):
+        self.ticks: deque[TickMetrics] = deque(maxlen=max_ticks)
+
+    def __call__(self, metrics: TickMetrics) -> None:
+        self.ticks.append(metrics)
+
+    def summary(self) -> dict:
+        """Count, mean and max tick duration plus mean phase timings."""
+        ticks = [tick for tick in self.ticks if tick.error is None]
+        if not ticks:
+            return {"ticks": 0, "errors": len(self.ticks)}
+        return {
+            "ticks": len(ticks),
+            "errors": len(self.ticks) - len(ticks),
+            "meanDuration": sum(tick.duration for tick in ticks) / len(ticks),
+            "maxDuration": max(tick.duration for tick in ticks),
+            "maxLateness": max(tick.lateness for tick in ticks),
+            "phases": {
+                phase: sum(tick.phases.get(phase, 0.0) for tick in ticks) / len(ticks)
+                for phase in PHASES
+            },
+        }
+
+
+class PrometheusMetrics:
+    """
+    Metrics hook that aggregates ticks into Prometheus counters and gauges.
+
+    `render` returns the text exposition format; `serve` exposes it over
+    HTTP on a background thread.
+    """
+
+    def __init__(self, prefix: str = "market_simulator"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._ticks = 0
+        self._errors = 0
+        self._rows = 0
+        self._filled = 0
+        self._duration_sum = 0.0
+        self._phase_sums = {phase: 0.0 for phase in PHASES}
+        self._last: Optional[TickMetrics] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def __call__(self, metrics: TickMetrics) -> None:
+        with self._lock:
+            self._ticks += 1
+            if metrics.error is not None:
+                self._errors += 1
+            self._rows += metrics.rows_written
+            self._filled += metrics.filled_candles
+            self._duration_sum += metrics.duration
+            for phase, seconds in metrics.phases.items():
+                self._phase_sums[phase] = self._phase_sums.get(phase, 0.0) + seconds
+            self._last = metrics
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        p = self.prefix
+        with self._lock:
+            lines = [
+                f"# HELP {p}_ticks_total Simulator ticks run.",
+                f"# TYPE {p}_ticks_total counter",
+                f"{p}_ticks_total {self._ticks}",
+                f"# HELP {p}_tick_errors_total Simulator ticks that failed.",
+                f"# TYPE {p}_tick_errors_total counter",
+                f"{p}_tick_errors_total {self._errors}",
+                f"# HELP {p}_rows_written_total Database rows written by ticks.",
+                f"# TYPE {p}_rows_written_total counter",
+                f"{p}_rows_written_total {self._rows}",
+                f"# HELP {p}_filled_candles_total Candles written to fill missed buckets.",
+                f"# TYPE {p}_filled_candles_total counter",
+                f"{p}_filled_candles_total {self._filled}",
+                f"# HELP {p}_tick_seconds_total Wall time spent in ticks.",
+                f"# TYPE {p}_tick_seconds_total counter",
+                f"{p}_tick_seconds_total {self._duration_sum}",
+                f"# HELP {p}_phase_seconds_total Wall time spent per tick phase.",
+                f"# TYPE {p}_phase_seconds_total counter",
+            ]
+            lines.extend(
+                f'{p}_phase_seconds_total{{phase="{phase}"}} {seconds}'
+                for phase, seconds in self._phase_sums.items()
+            )
+            last = self._last
+            if last is not None:
+                lines.extend([
+                    f"# HELP {p}_last_tick_seconds Wall time of the latest tick.",
+                    f"# TYPE {p}_last_tick_seconds gauge",
+                    f"{p}_last_tick_seconds {last.duration}",
+                    f"# HELP {p}_last_tick_lateness_seconds How late the latest tick started.",
+                    f"# TYPE {p}_last_tick_lateness_seconds gauge",
+                    f"{p}_last_tick_lateness_seconds {last.lateness}",
+                    f"# HELP {p}_last_publish_seconds Publish latency of the latest tick.",
+                    f"# TYPE {p}_last_publish_seconds gauge",
+                    f"{p}_last_publish_seconds {last.publish_latency}",
+                    f"# HELP {p}_sectors Sectors advanced by the latest tick.",
+                    f"# TYPE {p}_sectors gauge",
+                    f"{p}_sectors {last.sectors}",
+                ])
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> None:
+        """Serve `render()` at /metrics on a daemon thread (once)."""
+        if self._server is not None:
+            return
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="market-simulator-metrics").start()
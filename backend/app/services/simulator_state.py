@@ -0,0 +1,124 @@
+"""
+Persistence of market simulator trend state.
+
+The trend, wave phase, momentum and random-stream position of every
+sector are stored in `sector_sim_state`, so a sector keeps its dynamics
+when it moves to another simulator worker.
+"""
+
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.models.sector_sim_state import SectorSimState
+from app.services.candle_persistence import dialect_insert
+from app.services.tick_engine import SectorTickEngine
+
+
+def save_engine_state(
+    db: Session,
+    engine: SectorTickEngine,
+    sector_ids: Sequence[str],
+    now: datetime,
+) -> int:
+    """
+    Upsert the engine state of sectors in one statement.
+
+    Args:
+        db: Database session (not committed here)
+        engine: Tick engine holding the state
+        sector_ids: Sectors to save; sectors without state are skipped
+        now: Timestamp stored as updatedAt
+
+    Returns:
+        Number of sectors saved
+    """
+    state = engine.export_state(sector_ids)
+    rows = [
+        {
+            "sectorId": sector_id,
+            "trend": trend,
+            "wavePhase": wave_phase,
+            "momentum": momentum,
+            "ticks": ticks,
+            "updatedAt": now,
+        }
+        for sector_id, trend, wave_phase, momentum, ticks in zip(
+            state["sector_ids"],
+            state["trend"].tolist(),
+            state["wave_phase"].tolist(),
+            state["momentum"].tolist(),
+            state["ticks"].tolist(),
+        )
+    ]
+    if not rows:
+        return 0
+
+    table = SectorSimState.__table__
+    insert = dialect_insert(db)
+
+    if insert is not None:
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.sectorId],
+            set_={
+                "trend": stmt.excluded.trend,
+                "wavePhase": stmt.excluded.wavePhase,
+                "momentum": stmt.excluded.momentum,
+                "ticks": stmt.excluded.ticks,
+                "updatedAt": stmt.excluded.updatedAt,
+            },
+        )
+        db.execute(stmt, rows)
+        return len(rows)
+
+    db.execute(delete(table).where(table.c.sectorId.in_([row["sectorId"] for row in rows])))
+    db.execute(table.insert(), rows)
+    return len(rows)
+
+
+def load_engine_state(
+    db: Session,
+    engine: SectorTickEngine,
+    sector_ids: Optional[Iterable[str]] = None,
+) -> int:
+    """
+    Restore persisted state into the engine with one query.
+
+    Args:
+        db: Database session
+        engine: Tick engine to restore into
+        sector_ids: Sectors to restore (default: all persisted sectors)
+
+    Returns:
+        Number of sectors restored
+    """
+    query = select(
+        SectorSimState.sectorId,
+        SectorSimState.trend,
+        SectorSimState.wavePhase,
+        SectorSimState.momentum,
+        SectorSimState.ticks,
+    )
+    if sector_ids is not None:
+        sector_ids = list(sector_ids)
+        if not sector_ids:
+            return 0
+        query = query.where(SectorSimState.sectorId.in_(sector_ids))
+
+    rows = db.execute(query).all()
+    if not rows:
+        return 0
+
+    ids, trends, phases, momenta, ticks = zip(*rows)
+    engine.load_state(
+        list(ids),
+        np.array(trends, dtype=np.int8),
+        np.array(phases, dtype=np.float64),
+        np.array(momenta, dtype=np.float64),
+        np.array(ticks, dtype=np.uint64),
+    )
+    return len(rows)
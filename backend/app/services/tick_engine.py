@@ -0,0 +1,346 @@
+"""
+Vectorized price dynamics for the market simulator.
+
+Holds the trend, wave phase and momentum of every simulated sector in
+NumPy arrays so that a whole tick can be advanced in a single step,
+instead of one scalar `random`/`math` call chain per sector.
+
+Random draws come from per-sector counter-based streams (see
+`app.services.random_streams`), so a seeded engine produces the same
+series for a sector regardless of which other sectors share the batch.
+"""
+
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+
+from app.services.random_streams import counter_uniform, resolve_seed, sector_keys
+
+
+# Trend regimes, stored as small ints in the state arrays
+TREND_UP = 0
+TREND_DOWN = 1
+TREND_VOLATILE = 2
+TREND_NAMES = ("up", "down", "volatile")
+
+TWO_PI = 2 * math.pi
+
+# Tick length the dynamics constants are tuned for (one 5-minute candle);
+# shorter ticks scale them so per-candle statistics stay the same
+BASE_TICK_SECONDS = 5 * 60
+
+# Dynamics constants (percent-based, see `SectorTickEngine.step`)
+WAVE_STEP = 0.1
+WAVE_AMPLITUDE = 0.3
+TREND_WEIGHT = 0.2
+MOMENTUM_WEIGHT = 0.2
+RANDOM_WEIGHT = 0.3
+MOMENTUM_DECAY = 0.7
+MOMENTUM_GAIN = 0.3
+TREND_FLIP_PROBABILITY = 0.1
+MIN_PRICE = 0.01
+
+# Draw indices within a tick of a sector's random stream
+_DRAW_INIT_TREND = 0
+_DRAW_INIT_PHASE = 1
+_DRAW_SIGN = 2
+_DRAW_NOISE = 3
+_DRAW_FLIP = 4
+_DRAW_NEW_TREND = 5
+_DRAW_VOLUME = 6
+
+
+class SectorTickEngine:
+    """
+    Batched trend state for all simulated sectors.
+
+    Each sector owns one slot in the state arrays. Slots are allocated on
+    first use and can be released when a sector disappears. Besides the
+    dynamics state, every slot holds the key of the sector's random stream
+    and the number of ticks it has been advanced.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.seed = resolve_seed(seed)
+        self._index: dict[str, int] = {}
+        self.sector_ids: list[str] = []
+        self.trend = np.empty(0, dtype=np.int8)
+        self.wave_phase = np.empty(0, dtype=np.float64)
+        self.momentum = np.empty(0, dtype=np.float64)
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.ticks = np.empty(0, dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self.sector_ids)
+
+    def __contains__(self, sector_id: str) -> bool:
+        return sector_id in self._index
+
+    def ensure_sectors(
+        self,
+        sector_ids: Sequence[str],
+        trend_bias: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Make sure every sector has a state slot and return their indices.
+
+        New sectors start with a random (or the given) trend, a random wave
+        phase and zero momentum, like the scalar simulator did.
+
+        Args:
+            sector_ids: Sector IDs to look up
+            trend_bias: Optional initial trend for newly created slots
+
+        Returns:
+            Array of state indices, aligned with `sector_ids`
+        """
+        new_ids = [sid for sid in dict.fromkeys(sector_ids) if sid not in self._index]
+        if new_ids:
+            count = len(new_ids)
+            keys = sector_keys(self.seed, new_ids)
+            ticks = np.zeros(count, dtype=np.uint64)
+            if trend_bias in TREND_NAMES:
+                trends = np.full(count, TREND_NAMES.index(trend_bias), dtype=np.int8)
+            else:
+                trends = _draw_trend(counter_uniform(keys, ticks, _DRAW_INIT_TREND))
+            phases = counter_uniform(keys, ticks, _DRAW_INIT_PHASE) * TWO_PI
+
+            for sid in new_ids:
+                self._index[sid] = len(self.sector_ids)
+                self.sector_ids.append(sid)
+            self.trend = np.concatenate([self.trend, trends])
+            self.wave_phase = np.concatenate([self.wave_phase, phases])
+            self.momentum = np.concatenate([self.momentum, np.zeros(count)])
+            self.keys = np.concatenate([self.keys, keys])
+            self.ticks = np.concatenate([self.ticks, ticks])
+
+        return np.fromiter(
+            (self._index[sid] for sid in sector_ids),
+            dtype=np.intp,
+            count=len(sector_ids),
+        )
+
+    def remove_sectors(self, sector_ids: Sequence[str]) -> None:
+        """Drop the state of sectors that no longer exist."""
+        drop = {sid for sid in sector_ids if sid in self._index}
+        if not drop:
+            return
+
+        keep = np.array(
+            [i for i, sid in enumerate(self.sector_ids) if sid not in drop],
+            dtype=np.intp,
+        )
+        self.sector_ids = [self.sector_ids[i] for i in keep]
+        self._index = {sid: i for i, sid in enumerate(self.sector_ids)}
+        self.trend = self.trend[keep]
+        self.wave_phase = self.wave_phase[keep]
+        self.momentum = self.momentum[keep]
+        self.keys = self.keys[keep]
+        self.ticks = self.ticks[keep]
+
+    def get_state(self, sector_id: str) -> Optional[dict]:
+        """Return the trend state of one sector as a plain dict."""
+        idx = self._index.get(sector_id)
+        if idx is None:
+            return None
+        return {
+            "trend": TREND_NAMES[self.trend[idx]],
+            "wave_phase": float(self.wave_phase[idx]),
+            "momentum": float(self.momentum[idx]),
+        }
+
+    def export_state(self, sector_ids: Sequence[str]) -> dict[str, np.ndarray]:
+        """
+        Return the full state of sectors that have a slot, for persisting.
+
+        Returns:
+            Dict of "sector_ids" (list) and trend / wave_phase / momentum /
+            ticks arrays aligned with it
+        """
+        known = [sid for sid in sector_ids if sid in self._index]
+        idx = np.fromiter((self._index[sid] for sid in known), dtype=np.intp, count=len(known))
+        return {
+            "sector_ids": known,
+            "trend": self.trend[idx],
+            "wave_phase": self.wave_phase[idx],
+            "momentum": self.momentum[idx],
+            "ticks": self.ticks[idx],
+        }
+
+    def load_state(
+        self,
+        sector_ids: Sequence[str],
+        trend: np.ndarray,
+        wave_phase: np.ndarray,
+        momentum: np.ndarray,
+        ticks: np.ndarray,
+    ) -> None:
+        """
+        Restore persisted state, replacing any state the sectors already have.
+
+        The tick counters are restored too, so a seeded sector continues
+        its random stream where it left off.
+        """
+        idx = self.ensure_sectors(sector_ids)
+        self.trend[idx] = np.asarray(trend, dtype=np.int8)
+        self.wave_phase[idx] = np.asarray(wave_phase, dtype=np.float64)
+        self.momentum[idx] = np.asarray(momentum, dtype=np.float64)
+        self.ticks[idx] = np.asarray(ticks, dtype=np.uint64)
+
+    def step(
+        self,
+        sector_ids: Sequence[str],
+        base_prices: np.ndarray,
+        trend_bias: Optional[str] = None,
+        dt: float = BASE_TICK_SECONDS,
+    ) -> np.ndarray:
+        """
+        Advance the given sectors by one tick of `dt` seconds.
+
+        Per sector this is the same model as the original scalar simulator,
+        stated per 5-minute candle:
+        - Trend bias (up/down, or a random sign when volatile)
+        - Sine wave on a phase advancing by 0.1 rad per candle
+        - Momentum, decayed by 0.7 and fed 30% of the new change
+        - Uniform noise
+        - 10% chance of switching to a new random trend regime
+
+        Shorter ticks scale every term by s = dt / 300: drift terms (trend,
+        wave, momentum) and the wave step by s, noise terms by sqrt(s), the
+        momentum decay and flip probability as per-candle rates. A candle
+        made of 1/s ticks thus has the baseline drift, volatility and wave
+        period; with the default `dt` the model is exactly the original.
+
+        Args:
+            sector_ids: Sectors to advance
+            base_prices: Previous price of each sector, aligned with `sector_ids`
+            trend_bias: Optional initial trend for sectors seen for the first time
+            dt: Tick length in seconds (default: one 5-minute candle)
+
+        Returns:
+            Array of new prices, aligned with `sector_ids`
+        """
+        scale = dt / BASE_TICK_SECONDS
+        if scale <= 0:
+            raise ValueError("dt must be positive")
+        noise_scale = math.sqrt(scale)
+        if scale == 1:
+            decay, gain, flip_probability = MOMENTUM_DECAY, MOMENTUM_GAIN, TREND_FLIP_PROBABILITY
+        else:
+            decay = MOMENTUM_DECAY ** scale
+            gain = (1 - decay) * MOMENTUM_GAIN / (1 - MOMENTUM_DECAY) / scale
+            flip_probability = 1 - (1 - TREND_FLIP_PROBABILITY) ** scale
+
+        idx = self.ensure_sectors(sector_ids, trend_bias)
+        base_prices = np.asarray(base_prices, dtype=np.float64)
+        keys = self.keys[idx]
+        ticks = self.ticks[idx] + np.uint64(1)
+
+        trend = self.trend[idx]
+
+        # Trend direction; volatile sectors pick a random sign each tick,
+        # which is noise and scales like it
+        direction = np.where(trend == TREND_UP, scale, -scale)
+        volatile = trend == TREND_VOLATILE
+        sign = np.where(counter_uniform(keys, ticks, _DRAW_SIGN) < 0.5, -noise_scale, noise_scale)
+        direction[volatile] = sign[volatile]
+
+        # Wave phase for smooth oscillations
+        phase = self.wave_phase[idx] + WAVE_STEP * scale
+        phase = np.where(phase > TWO_PI, phase - TWO_PI, phase)
+        wave_influence = np.sin(phase) * WAVE_AMPLITUDE * scale
+
+        momentum = self.momentum[idx]
+        random_change = counter_uniform(keys, ticks, _DRAW_NOISE) - 0.5
+
+        change_percent = (
+            direction * TREND_WEIGHT +
+            wave_influence +
+            momentum * MOMENTUM_WEIGHT * scale +
+            random_change * RANDOM_WEIGHT * noise_scale
+        )
+
+        # Occasionally change trend
+        flip = counter_uniform(keys, ticks, _DRAW_FLIP) < flip_probability
+        trend = np.where(flip, _draw_trend(counter_uniform(keys, ticks, _DRAW_NEW_TREND)), trend)
+
+        self.wave_phase[idx] = phase
+        self.momentum[idx] = momentum * decay + change_percent * gain
+        self.trend[idx] = trend
+        self.ticks[idx] = ticks
+
+        new_prices = base_prices * (1 + change_percent / 100.0)
+        return np.maximum(MIN_PRICE, new_prices)
+
+    def sample_volumes(self, sector_ids: Sequence[str], low: int, high: int) -> np.ndarray:
+        """
+        Draw a synthetic volume per sector for its current tick.
+
+        Args:
+            sector_ids: Sectors to draw for (must already have a slot)
+            low: Smallest volume (inclusive)
+            high: Largest volume (inclusive)
+
+        Returns:
+            Int64 array aligned with `sector_ids`
+        """
+        idx = self.ensure_sectors(sector_ids)
+        draws = counter_uniform(self.keys[idx], self.ticks[idx], _DRAW_VOLUME)
+        return low + (draws * (high - low + 1)).astype(np.int64)
+
+    def simulate_paths(
+        self,
+        sector_ids: Sequence[str],
+        base_prices: np.ndarray,
+        steps: int,
+        start_offsets: Optional[np.ndarray] = None,
+        volume_range: tuple[int, int] = (1000, 10000),
+        dt: float = BASE_TICK_SECONDS,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Run `steps` consecutive ticks for many sectors at once.
+
+        Each row of the result is one tick of `step` applied to every
+        sector that has started. Sectors with a start offset stay idle
+        (NaN, zero volume) until that row, so their state only advances for
+        the ticks that are actually produced.
+
+        Args:
+            sector_ids: Sectors to simulate
+            base_prices: Price each sector starts from
+            steps: Number of ticks to generate
+            start_offsets: First row each sector is simulated for (default 0)
+            volume_range: Inclusive range of the volume drawn per tick
+            dt: Tick length in seconds (default: one 5-minute candle)
+
+        Returns:
+            Tuple of (prices, volumes), both of shape (steps, len(sector_ids))
+        """
+        prices = np.asarray(base_prices, dtype=np.float64).copy()
+        paths = np.full((steps, len(sector_ids)), np.nan)
+        volumes = np.zeros((steps, len(sector_ids)), dtype=np.int64)
+        ids = np.asarray(sector_ids, dtype=object)
+
+        if start_offsets is None:
+            start_offsets = np.zeros(len(sector_ids), dtype=np.intp)
+
+        for row in range(steps):
+            active = np.flatnonzero(start_offsets <= row)
+            if len(active) == 0:
+                continue
+            if len(active) == len(sector_ids):
+                active_ids = sector_ids
+                prices = self.step(sector_ids, prices, dt=dt)
+            else:
+                active_ids = ids[active].tolist()
+                prices[active] = self.step(active_ids, prices[active], dt=dt)
+            paths[row, active] = prices[active]
+            volumes[row, active] = self.sample_volumes(active_ids, *volume_range)
+
+        return paths, volumes
+
+
+def _draw_trend(draws: np.ndarray) -> np.ndarray:
+    """Map uniform draws to a uniformly chosen trend regime."""
+    return np.minimum(draws * len(TREND_NAMES), len(TREND_NAMES) - 1).astype(np.int8)
@@ -0,0 +1,284 @@
+"""
+Batched realtime publishing of simulator ticks.
+
+Publishing every sector event with its own awaited call costs two Redis
+round trips per sector per tick, one after another. `TickPublisher`
+still publishes the per-sector JSON messages through the existing
+`app.realtime.publish` functions, so channels and payloads stay exactly
+what consumers already read; that is 2 x N publish calls per tick, but
+issued concurrently for many sectors at a time, so their round trips
+overlap instead of adding up. They are not pipelined.
+
+Only the opt-in messages share one non-transactional pipeline: a single
+market snapshot message carrying every sector in a compact columnar
+payload, and per-sector messages in the compact binary encoding of
+`wire_format`.
+
+`InMemoryRedis` implements the subset of the `redis.asyncio` client API
+used here, so the publisher can run without a Redis server.
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, List, Optional, Union
+
+from app.realtime.publish import publish_market_update, publish_sector_candle
+from app.services import wire_format
+
+
+# Default channels of the binary per-sector messages (`{sector_id}` is
+# filled in per event) and of the market snapshot
+SECTOR_CANDLE_CHANNEL = "sector:{sector_id}:candles"
+MARKET_UPDATE_CHANNEL = "market:updates"
+MARKET_SNAPSHOT_CHANNEL = "market:snapshot"
+
+ENCODINGS = ("json", "binary")
+
+# Sector events published concurrently (not pipelined) through
+# `app.realtime.publish`
+PUBLISH_CONCURRENCY = 64
+
+
+def _dumps(payload: dict) -> str:
+    return json.dumps(payload, separators=(",", ":"))
+
+
+async def publish_event(event: dict) -> None:
+    """
+    Publish one committed candle and its market update the way the
+    realtime layer always has (`publish_sector_candle` and
+    `publish_market_update`).
+    """
+    timestamp = event["timestamp"].isoformat()
+    await publish_sector_candle(
+        sectorId=event["sectorId"],
+        candle={
+            "timestamp": timestamp,
+            "value": event["close"],
+            "open": event["open"],
+            "high": event["high"],
+            "low": event["low"],
+            "close": event["close"],
+            "volume": event["volume"],
+        }
+    )
+    await publish_market_update(
+        sectorId=event["sectorId"],
+        indexValue=event["close"],
+        timestamp=timestamp,
+    )
+
+
+class TickPublisher:
+    """
+    Publishes the events of a tick.
+
+    JSON per-sector messages go through `event_publisher`, two calls per
+    sector, concurrently for up to `concurrency` sectors at a time.
+    Binary per-sector messages and the market snapshot go through one
+    pipeline on `client`.
+
+    Args:
+        client: `redis.asyncio` client (or `InMemoryRedis`) for pipelined messages
+        per_sector: Publish the per-sector candle and market update messages
+        snapshot: Also publish one market snapshot message per tick
+        candle_channel: Per-sector candle channel template of binary messages
+        update_channel: Market update channel of binary messages
+        snapshot_channel: Market snapshot channel
+        encoding: "json" (default) or "binary" (see `wire_format`)
+        concurrency: Sectors published concurrently in JSON encoding
+        event_publisher: Coroutine function publishing one JSON sector
+            event (default: `publish_event`)
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        per_sector: bool = True,
+        snapshot: bool = True,
+        candle_channel: str = SECTOR_CANDLE_CHANNEL,
+        update_channel: str = MARKET_UPDATE_CHANNEL,
+        snapshot_channel: str = MARKET_SNAPSHOT_CHANNEL,
+        encoding: str = "json",
+        concurrency: int = PUBLISH_CONCURRENCY,
+        event_publisher: Callable[[dict], Awaitable[None]] = publish_event,
+    ):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding: {encoding}")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.client = client
+        self.per_sector = per_sector
+        self.snapshot = snapshot
+        self.candle_channel = candle_channel
+        self.update_channel = update_channel
+        self.snapshot_channel = snapshot_channel
+        self.encoding = encoding
+        self.concurrency = concurrency
+        self.event_publisher = event_publisher
+
+    def build_messages(self, events: List[dict]) -> List[tuple[str, Union[str, bytes]]]:
+        """
+        Build the pipelined (channel, message) pairs for the events of one tick.
+
+        JSON per-sector messages are not included; they are published
+        through `publish_event`.
+
+        Args:
+            events: Candle events with sectorId, timestamp and OHLCV fields
+
+        Returns:
+            List of (channel, message) pairs in publish order
+        """
+        if self.encoding == "binary":
+            return self._build_binary_messages(events)
+        if self.snapshot and events:
+            return [(self.snapshot_channel, _dumps(market_snapshot(events)))]
+        return []
+
+    def _build_binary_messages(self, events: List[dict]) -> List[tuple[str, bytes]]:
+        messages = []
+        if self.per_sector:
+            for event in events:
+                messages.append((
+                    self.candle_channel.format(sector_id=event["sectorId"]),
+                    wire_format.encode_candle(event),
+                ))
+                messages.append((
+                    self.update_channel,
+                    wire_format.encode_market_update(event["sectorId"], event["close"], event["timestamp"]),
+                ))
+        if self.snapshot and events:
+            messages.append((self.snapshot_channel, wire_format.encode_snapshot(events)))
+        return messages
+
+    async def publish(self, events: List[dict]) -> int:
+        """
+        Publish the events of one tick.
+
+        Args:
+            events: Candle events with sectorId, timestamp and OHLCV fields
+
+        Returns:
+            Number of messages sent
+        """
+        sent = 0
+        if self.per_sector and self.encoding == "json":
+            for start in range(0, len(events), self.concurrency):
+                await asyncio.gather(*(self.event_publisher(event) for event in events[start:start + self.concurrency]))
+            sent += 2 * len(events)
+
+        messages = self.build_messages(events)
+        if messages:
+            pipe = self.client.pipeline(transaction=False)
+            for channel, message in messages:
+                pipe.publish(channel, message)
+            await pipe.execute()
+        return sent + len(messages)
+
+
+def market_snapshot(events: List[dict]) -> dict:
+    """
+    Combine the events of one tick into a columnar snapshot payload.
+
+    Field names appear once instead of once per sector, so the payload
+    grows by a handful of numbers per sector.
+    """
+    return {
+        "type": "market_snapshot",
+        "timestamp": max(event["timestamp"] for event in events).isoformat(),
+        "sectorIds": [event["sectorId"] for event in events],
+        "open": [event["open"] for event in events],
+        "high": [event["high"] for event in events],
+        "low": [event["low"] for event in events],
+        "close": [event["close"] for event in events],
+        "volume": [event["volume"] for event in events],
+    }
+
+
+class InMemoryRedis:
+    """
+    In-process stand-in for the `redis.asyncio` publish API.
+
+    Records every published message and counts round trips, and delivers
+    messages to callbacks registered with `subscribe`.
+    """
+
+    def __init__(self):
+        self.published: List[tuple[str, Union[str, bytes]]] = []
+        self.round_trips = 0
+        self._subscribers: dict[str, List[Callable[[str, Union[str, bytes]], None]]] = defaultdict(list)
+
+    def subscribe(self, channel: str, callback: Callable[[str, Union[str, bytes]], None]) -> None:
+        """Call `callback(channel, message)` for every message on `channel`."""
+        self._subscribers[channel].append(callback)
+
+    def _deliver(self, channel: str, message: Union[str, bytes]) -> int:
+        self.published.append((channel, message))
+        callbacks = self._subscribers.get(channel, [])
+        for callback in callbacks:
+            callback(channel, message)
+        return len(callbacks)
+
+    async def publish(self, channel: str, message: Union[str, bytes]) -> int:
+        """Publish one message; returns the number of subscribers reached."""
+        self.round_trips += 1
+        return self._deliver(channel, message)
+
+    def pipeline(self, transaction: bool = True) -> "InMemoryPipeline":
+        """Start a command pipeline."""
+        return InMemoryPipeline(self)
+
+
+class InMemoryPipeline:
+    """Buffered commands of an `InMemoryRedis` pipeline."""
+
+    def __init__(self, client: InMemoryRedis):
+        self._client = client
+        self._commands: List[tuple[str, Union[str, bytes]]] = []
+
+    def publish(self, channel: str, message: Union[str, bytes]) -> "InMemoryPipeline":
+        """Queue a publish command."""
+        self._commands.append((channel, message))
+        return self
+
+    async def execute(self) -> List[int]:
+        """Send all queued commands in one round trip."""
+        self._client.round_trips += 1
+        commands, self._commands = self._commands, []
+        return [self._client._deliver(channel, message) for channel, message in commands]
+
+
+def create_tick_publisher(settings: Any) -> Optional[TickPublisher]:
+    """
+    Build the batched publisher configured in settings.
+
+    Batched publishing is enabled with MARKET_SIMULATOR_BATCH_PUBLISH and
+    needs REDIS_URL. Message kinds are set with the optional
+    MARKET_SIMULATOR_PUBLISH_{PER_SECTOR,SNAPSHOT} settings, the encoding
+    with MARKET_SIMULATOR_WIRE_FORMAT ("json" or "binary"), and channels of
+    the snapshot and binary messages with
+    MARKET_SIMULATOR_{CANDLE,UPDATE,SNAPSHOT}_CHANNEL.
+
+    Returns:
+        The publisher, or None when batching is disabled, Redis is not
+        configured or the `redis` package is not installed
+    """
+    url = getattr(settings, "REDIS_URL", None)
+    if not getattr(settings, "MARKET_SIMULATOR_BATCH_PUBLISH", False) or not url:
+        return None
+    try:
+        import redis.asyncio as redis_asyncio
+    except ImportError:
+        return None
+
+    return TickPublisher(
+        redis_asyncio.from_url(url),
+        per_sector=getattr(settings, "MARKET_SIMULATOR_PUBLISH_PER_SECTOR", True),
+        snapshot=getattr(settings, "MARKET_SIMULATOR_PUBLISH_SNAPSHOT", True),
+        candle_channel=getattr(settings, "MARKET_SIMULATOR_CANDLE_CHANNEL", SECTOR_CANDLE_CHANNEL),
+        update_channel=getattr(settings, "MARKET_SIMULATOR_UPDATE_CHANNEL", MARKET_UPDATE_CHANNEL),
+        snapshot_channel=getattr(settings, "MARKET_SIMULATOR_SNAPSHOT_CHANNEL", MARKET_SNAPSHOT_CHANNEL),
+        encoding=getattr(settings, "MARKET_SIMULATOR_WIRE_FORMAT", "json"),
+    )
@@ -0,0 +1,82 @@
+"""
+Drift-free tick schedule for the market simulator.
+
+Ticks are numbered slots at multiples of a fixed interval since the
+epoch. Deadlines are tracked on the monotonic clock, so they do not pile
+up a small delay per tick and are not disturbed by wall-clock steps.
+When a tick overruns, the schedule moves on to the next future slot
+instead of running the missed ones back to back.
+"""
+
+import asyncio
+import math
+import time
+from datetime import datetime, timezone
+from typing import Callable
+
+
+# Re-anchor on the wall clock once the two clocks disagree by this much
+MAX_CLOCK_SKEW_SECONDS = 1.0
+
+
+class TickSchedule:
+    """
+    Tick slots of a fixed interval, anchored to the wall clock once and
+    then advanced with the monotonic clock.
+
+    Args:
+        interval_seconds: Seconds between ticks (may be fractional)
+        wall_clock: Returns epoch seconds (default `time.time`)
+        monotonic_clock: Returns monotonic seconds (default `time.monotonic`)
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float,
+        wall_clock: Callable[[], float] = time.time,
+        monotonic_clock: Callable[[], float] = time.monotonic,
+    ):
+        if interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+        self.interval = float(interval_seconds)
+        self._wall_clock = wall_clock
+        self._monotonic_clock = monotonic_clock
+        self._anchor()
+
+    def _anchor(self) -> None:
+        self._wall_origin = self._wall_clock()
+        self._monotonic_origin = self._monotonic_clock()
+
+    def now(self) -> float:
+        """Current time in epoch seconds, advanced by the monotonic clock."""
+        return self._wall_origin + (self._monotonic_clock() - self._monotonic_origin)
+
+    def resync(self) -> bool:
+        """
+        Re-anchor when the wall clock was adjusted by more than MAX_CLOCK_SKEW_SECONDS.
+
+        Returns:
+            True if the schedule was re-anchored
+        """
+        if abs(self._wall_clock() - self.now()) <= MAX_CLOCK_SKEW_SECONDS:
+            return False
+        self._anchor()
+        return True
+
+    def current_slot(self) -> int:
+        """Index of the slot that started most recently."""
+        return math.floor(self.now() / self.interval)
+
+    def slot_time(self, slot: int) -> datetime:
+        """Start time of a slot."""
+        return datetime.fromtimestamp(slot * self.interval, tz=timezone.utc)
+
+    def next_slot(self, after: int) -> int:
+        """The slot to run after `after`: the following one, or the next future one if it already passed."""
+        return max(after + 1, self.current_slot() + 1)
+
+    async def sleep_until(self, slot: int) -> None:
+        """Sleep until a slot starts."""
+        delay = slot * self.interval - self.now()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,206 @@
+"""
+Compact binary encoding of candle and market events.
+
+JSON remains the default wire format. Dashboards that subscribe to every
+sector can use this encoding instead: timestamps are epoch milliseconds,
+prices are float64 and volumes are int64, all little-endian. Every
+message starts with a one-byte message type:
+
+- `CANDLE`: one OHLCV candle of one sector
+- `MARKET_UPDATE`: the index value of one sector
+- `SNAPSHOT`: one timestamp and columnar OHLCV for many sectors
+- `SERIES`: a run of candles of one sector (history, backfill); the
+  first timestamp is stored in full and the rest as uint32 deltas
+
+Sector IDs are length-prefixed UTF-8 strings.
+"""
+
+import struct
+from datetime import datetime
+from typing import List, Sequence
+
+import numpy as np
+
+from app.services.candle_aggregation import to_epoch
+
+
+CANDLE = 1
+MARKET_UPDATE = 2
+SNAPSHOT = 3
+SERIES = 4
+
+_HEADER = struct.Struct("<B")
+_ID_LENGTH = struct.Struct("<H")
+_CANDLE = struct.Struct("<q4dq")
+_MARKET_UPDATE = struct.Struct("<qd")
+_BATCH = struct.Struct("<qI")
+
+
+def epoch_ms(dt: datetime) -> int:
+    """Epoch milliseconds of a datetime (naive values are treated as UTC)."""
+    return to_epoch(dt) * 1000 + dt.microsecond // 1000
+
+
+def _pack_id(sector_id: str) -> bytes:
+    raw = sector_id.encode("utf-8")
+    return _ID_LENGTH.pack(len(raw)) + raw
+
+
+def _unpack_id(data: bytes, offset: int) -> tuple[str, int]:
+    (length,) = _ID_LENGTH.unpack_from(data, offset)
+    offset += _ID_LENGTH.size
+    return data[offset:offset + length].decode("utf-8"), offset + length
+
+
+def _unpack_array(data: bytes, offset: int, dtype: str, count: int) -> tuple[np.ndarray, int]:
+    array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+    return array, offset + array.nbytes
+
+
+def encode_candle(event: dict) -> bytes:
+    """Encode one candle event (sectorId, timestamp and OHLCV fields): 51 bytes plus the ID."""
+    return (
+        _HEADER.pack(CANDLE)
+        + _pack_id(event["sectorId"])
+        + _CANDLE.pack(
+            epoch_ms(event["timestamp"]),
+            event["open"],
+            event["high"],
+            event["low"],
+            event["close"],
+            event["volume"],
+        )
+    )
+
+
+def encode_market_update(sector_id: str, index_value: float, timestamp: datetime) -> bytes:
+    """Encode the index value of one sector."""
+    return (
+        _HEADER.pack(MARKET_UPDATE)
+        + _pack_id(sector_id)
+        + _MARKET_UPDATE.pack(epoch_ms(timestamp), index_value)
+    )
+
+
+def encode_snapshot(events: List[dict]) -> bytes:
+    """
+    Encode the events of one tick as a columnar snapshot.
+
+    Args:
+        events: Candle events with sectorId, timestamp and OHLCV fields
+
+    Returns:
+        Encoded message
+    """
+    timestamp = max(event["timestamp"] for event in events)
+    parts = [_HEADER.pack(SNAPSHOT), _BATCH.pack(epoch_ms(timestamp), len(events))]
+    parts.extend(_pack_id(event["sectorId"]) for event in events)
+    for field in ("open", "high", "low", "close"):
+        parts.append(np.array([event[field] for event in events], dtype="<f8").tobytes())
+    parts.append(np.array([event["volume"] for event in events], dtype="<i8").tobytes())
+    return b"".join(parts)
+
+
+def encode_series(
+    sector_id: str,
+    timestamps_ms: Sequence[int],
+    open_: Sequence[float],
+    high: Sequence[float],
+    low: Sequence[float],
+    close: Sequence[float],
+    volume: Sequence[int],
+) -> bytes:
+    """
+    Encode a run of candles of one sector with delta-encoded timestamps.
+
+    Args:
+        sector_id: Sector the candles belong to
+        timestamps_ms: Candle timestamps in epoch milliseconds, ascending
+        open_, high, low, close, volume: Candle fields aligned with `timestamps_ms`
+
+    Returns:
+        Encoded message (36 bytes per candle)
+    """
+    timestamps_ms = np.asarray(timestamps_ms, dtype=np.int64)
+    if len(timestamps_ms) == 0:
+        return _HEADER.pack(SERIES) + _pack_id(sector_id) + _BATCH.pack(0, 0)
+
+    deltas = np.diff(timestamps_ms)
+    if (deltas < 0).any() or (deltas > np.iinfo(np.uint32).max).any():
+        raise ValueError("Series timestamps must be ascending with gaps under 49 days")
+
+    parts = [
+        _HEADER.pack(SERIES),
+        _pack_id(sector_id),
+        _BATCH.pack(int(timestamps_ms[0]), len(timestamps_ms)),
+        deltas.astype("<u4").tobytes(),
+    ]
+    for values in (open_, high, low, close):
+        parts.append(np.asarray(values, dtype="<f8").tobytes())
+    parts.append(np.asarray(volume, dtype="<i8").tobytes())
+    return b"".join(parts)
+
+
+def decode(data: bytes) -> dict:
+    """
+    Decode any message produced by this module.
+
+    Timestamps are returned as epoch milliseconds, and the columns of
+    snapshot and series messages as NumPy arrays.
+    """
+    (kind,) = _HEADER.unpack_from(data, 0)
+    offset = _HEADER.size
+
+    if kind == CANDLE:
+        sector_id, offset = _unpack_id(data, offset)
+        timestamp, open_, high, low, close, volume = _CANDLE.unpack_from(data, offset)
+        return {
+            "type": "sector_candle",
+            "sectorId": sector_id,
+            "timestamp": timestamp,
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "volume": volume,
+        }
+
+    if kind == MARKET_UPDATE:
+        sector_id, offset = _unpack_id(data, offset)
+        timestamp, index_value = _MARKET_UPDATE.unpack_from(data, offset)
+        return {
+            "type": "market_update",
+            "sectorId": sector_id,
+            "timestamp": timestamp,
+            "indexValue": index_value,
+        }
+
+    if kind == SNAPSHOT:
+        timestamp, count = _BATCH.unpack_from(data, offset)
+        offset += _BATCH.size
+        sector_ids = []
+        for _ in range(count):
+            sector_id, offset = _unpack_id(data, offset)
+            sector_ids.append(sector_id)
+        message = {"type": "market_snapshot", "timestamp": timestamp, "sectorIds": sector_ids}
+        for field in ("open", "high", "low", "close"):
+            message[field], offset = _unpack_array(data, offset, "<f8", count)
+        message["volume"], offset = _unpack_array(data, offset, "<i8", count)
+        return message
+
+    if kind == SERIES:
+        sector_id, offset = _unpack_id(data, offset)
+        first, count = _BATCH.unpack_from(data, offset)
+        offset += _BATCH.size
+        deltas, offset = _unpack_array(data, offset, "<u4", max(count - 1, 0))
+        timestamps = np.empty(count, dtype=np.int64)
+        if count:
+            timestamps[0] = first
+            timestamps[1:] = first + np.cumsum(deltas, dtype=np.int64)
+        message = {"type": "candle_series", "sectorId": sector_id, "timestamp": timestamps}
+        for field in ("open", "high", "low", "close"):
+            message[field], offset = _unpack_array(data, offset, "<f8", count)
+        message["volume"], offset = _unpack_array(data, offset, "<i8", count)
+        return message
+
+    raise ValueError(f"Unknown message type: {kind}")
@@ -0,0 +1,7 @@
+"""
+Headless market simulation for generating long synthetic histories.
+"""
+
+from .offline import run_simulation
+
+__all__ = ["run_simulation"]
@@ -0,0 +1,211 @@
+"""
+CLI entrypoint for offline market simulation.
+
+Usage:
+    python -m app.simulate --days 90
+    python -m app.simulate --days 7 --start 2024-01-01 --force
+    python -m app.simulate --days 30 --tick-seconds 60 --seed 42
+    python -m app.simulate --output csv --path history.csv --sectors 1000 --days 90
+    python -m app.simulate --output parquet --path history.parquet --days 365
+
+Database output never runs past the current time unless an explicit
+--start range does and --force is given.
+"""
+
+import sys
+import argparse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+
+# Add backend directory to path
+backend_path = Path(__file__).parent.parent.parent
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+from app.seed.seed_data import SECTORS, build_sector_definitions
+from app.services.random_streams import stream_rng
+from app.simulate.offline import CANDLE_SECONDS, CsvWriter, ParquetWriter, candle_range, run_simulation
+
+
+def _database_sectors(db, default_start: datetime) -> tuple[list, np.ndarray, list]:
+    """
+    Sectors from the database, continuing from their latest candle.
+
+    Returns:
+        Tuple of (sector IDs, starting prices, start of each sector: its
+        latest candle, so the first simulated candle is the bucket after
+        it, or `default_start` for sectors without candles)
+    """
+    from app.services.candle_persistence import load_latest_candles
+    from app.services.sector_state import load_sector_records
+
+    sectors = load_sector_records(db)
+    latest = load_latest_candles(db)
+    base_prices = np.array([
+        latest[sector.id][1] if sector.id in latest else sector.start_price
+        for sector in sectors
+    ])
+    starts = [latest[sector.id][0] if sector.id in latest else default_start for sector in sectors]
+    return [sector.id for sector in sectors], base_prices, starts
+
+
+def _start_offsets(starts: list) -> tuple[datetime, np.ndarray]:
+    """Earliest start and the first candle of every sector counted from it."""
+    start = min(starts)
+    first_close, _ = candle_range(start, 0)
+    offsets = np.array([
+        (candle_range(sector_start, 0)[0] - first_close) // timedelta(seconds=CANDLE_SECONDS)
+        for sector_start in starts
+    ], dtype=np.intp)
+    return start, offsets
+
+
+def _synthetic_sectors(count: int, seed) -> tuple[list, np.ndarray]:
+    """Seeder sector definitions with the seeder's starting prices."""
+    sector_ids = [definition["id"] for definition in build_sector_definitions(count)]
+    base_prices = np.array([
+        stream_rng(seed, sector_id, "sector").uniform(100, 1000)
+        for sector_id in sector_ids
+    ])
+    return sector_ids, base_prices
+
+
+def main():
+    """Main entrypoint for offline simulation."""
+    parser = argparse.ArgumentParser(description="Simulate MAX market history on a virtual clock")
+    parser.add_argument(
+        "--days",
+        type=float,
+        default=30,
+        help="Days of history to simulate (default: 30)"
+    )
+    parser.add_argument(
+        "--start",
+        type=datetime.fromisoformat,
+        default=None,
+        help=(
+            "Start of the simulated range, ISO 8601 (default: db output continues every "
+            "sector after its latest candle, up to now; --days before now otherwise)"
+        )
+    )
+    parser.add_argument(
+        "--tick-seconds",
+        type=float,
+        default=CANDLE_SECONDS,
+        help=f"Virtual seconds between ticks, must divide {CANDLE_SECONDS} (default: {CANDLE_SECONDS})"
+    )
+    parser.add_argument(
+        "--output",
+        choices=["db", "csv", "parquet"],
+        default="db",
+        help="Where to write results (default: db)"
+    )
+    parser.add_argument(
+        "--path",
+        type=Path,
+        default=None,
+        help="Output file for csv/parquet output"
+    )
+    parser.add_argument(
+        "--sectors",
+        type=int,
+        default=len(SECTORS),
+        help=f"Number of synthetic sectors for csv/parquet output (default: {len(SECTORS)})"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help=(
+            "db output: replace candles and bars already stored in the simulated range, "
+            "and allow a --start range that runs past now"
+        )
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Random seed; the same seed reproduces the same history (default: random)"
+    )
+
+    args = parser.parse_args()
+    if args.output != "db" and args.path is None:
+        parser.error("--path is required for csv/parquet output")
+
+    start = args.start
+    if start is not None and start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    start_offsets = None
+    end = None
+
+    db = None
+    try:
+        if args.output == "db":
+            from app.core.db import SessionLocal
+            from app.simulate.offline import DatabaseWriter, clear_range, count_existing
+
+            db = SessionLocal()
+            now = datetime.now(timezone.utc)
+            sector_ids, base_prices, starts = _database_sectors(db, now - timedelta(days=args.days))
+            if not sector_ids:
+                print("No sectors found in database. Run `python -m app.seed` first.")
+                sys.exit(1)
+            if start is None:
+                # Continuations stop at now; later candles would sit ahead
+                # of the live simulator's ticks and hide them
+                start, start_offsets = _start_offsets(starts)
+                end = now
+            else:
+                first_close, candles = candle_range(start, args.days)
+                last_close = first_close + timedelta(seconds=(candles - 1) * CANDLE_SECONDS)
+                if last_close > now and not args.force:
+                    print(
+                        f"The simulated range ends at {last_close}, after the current time. "
+                        "Use --force to write future candles, or shorten --days."
+                    )
+                    sys.exit(1)
+                existing = count_existing(db, first_close, last_close)
+                if existing and not args.force:
+                    print(
+                        f"{existing} candles and bars already exist between {first_close} and {last_close}. "
+                        "Use --force to replace them, or omit --start to continue after the latest candles."
+                    )
+                    sys.exit(1)
+                if existing:
+                    print(f"Cleared {clear_range(db, first_close, last_close)} candles and bars in the simulated range")
+                    db.commit()
+            writer = DatabaseWriter(db)
+        else:
+            if start is None:
+                start = datetime.now(timezone.utc) - timedelta(days=args.days)
+            sector_ids, base_prices = _synthetic_sectors(args.sectors, args.seed)
+            writer = CsvWriter(args.path) if args.output == "csv" else ParquetWriter(args.path)
+
+        stats = run_simulation(
+            sector_ids,
+            base_prices,
+            start,
+            args.days,
+            writer,
+            tick_seconds=args.tick_seconds,
+            seed=args.seed,
+            start_offsets=start_offsets,
+            end=end,
+        )
+        print(
+            f"Simulated {stats['ticks']} ticks ({stats['candles']} candles) for "
+            f"{stats['sectors']} sectors in {stats['seconds']:.1f}s"
+        )
+    except Exception as e:
+        print(f"Error during simulation: {e}")
+        if db is not None:
+            db.rollback()
+        sys.exit(1)
+    finally:
+        if db is not None:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""
+Offline market simulation on a virtual clock.
+
+Runs the live simulator's tick dynamics (`SectorTickEngine`) as fast as
+the CPU allows instead of waiting for wall-clock ticks. Ticks are
+generated for all sectors at once in bounded chunks, folded into 5-minute
+OHLCV bars and handed to a writer: the database (candles, bars and
+rollups, like the live simulator) or CSV / Parquet files.
+
+Sectors may start at different candles of the virtual clock (e.g. each
+continuing after its own latest candle); every sector is simulated for
+the same number of candles, unless an end time cuts it short.
+"""
+
+import csv
+import math
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.models.sector_candle import SectorCandle
+from app.models.sector_ohlcv import SectorOHLCV
+
+from app.services.candle_aggregation import (
+    BASE_RESOLUTION,
+    RESOLUTIONS,
+    ROLLUP_RESOLUTIONS,
+    bucket_end,
+    from_epoch,
+    rollup_bars,
+    to_epoch,
+)
+from app.services.candle_persistence import (
+    BULK_CHUNK_ROWS,
+    insert_candles,
+    insert_ohlcv,
+    iter_chunks,
+    load_latest_ohlcv,
+    update_sector_prices,
+)
+from app.services.tick_engine import SectorTickEngine
+
+
+CANDLE_SECONDS = RESOLUTIONS[BASE_RESOLUTION]
+
+# Synthetic volume traded per 5-minute candle, as in the live simulator
+CANDLE_VOLUME_RANGE = (1000, 10000)
+
+# Ticks x sectors generated per chunk, bounds memory use
+CHUNK_CELLS = 5_000_000
+
+BAR_COLUMNS = ["timestamp", "sectorId", "open", "high", "low", "close", "volume"]
+
+DAY_SECONDS = RESOLUTIONS["1d"]
+
+# Sectors whose rollups are rebuilt together
+_ROLLUP_SECTORS = 500
+
+
+def ticks_per_candle(tick_seconds: float) -> int:
+    """Number of ticks in a 5-minute candle; the tick must divide the candle."""
+    ticks = round(CANDLE_SECONDS / tick_seconds)
+    if ticks < 1 or not math.isclose(ticks * tick_seconds, CANDLE_SECONDS):
+        raise ValueError(f"Tick interval must divide {CANDLE_SECONDS} seconds, got {tick_seconds}")
+    return ticks
+
+
+def candle_range(start: datetime, days: float) -> tuple[datetime, int]:
+    """
+    First candle timestamp and number of candles of a simulated range.
+
+    Candles are stamped with the boundary closing their bucket, so the
+    first one closes the 5-minute bucket `start` falls into.
+    """
+    first_close = from_epoch((to_epoch(start) // CANDLE_SECONDS + 1) * CANDLE_SECONDS)
+    return first_close, int(days * 24 * 60 * 60 // CANDLE_SECONDS)
+
+
+def count_existing(db: Session, first: datetime, last: datetime) -> int:
+    """Candles and 5m bars already stored with timestamps in [first, last]."""
+    candles = db.execute(
+        select(func.count()).select_from(SectorCandle)
+        .where(SectorCandle.timestamp >= first, SectorCandle.timestamp <= last)
+    ).scalar()
+    bars = db.execute(
+        select(func.count()).select_from(SectorOHLCV)
+        .where(
+            SectorOHLCV.resolution == BASE_RESOLUTION,
+            SectorOHLCV.timestamp >= first,
+            SectorOHLCV.timestamp <= last,
+        )
+    ).scalar()
+    return candles + bars
+
+
+def clear_range(db: Session, first: datetime, last: datetime) -> int:
+    """
+    Delete candles and 5m bars with timestamps in [first, last]. The caller commits.
+
+    Coarser bars are left in place; `DatabaseWriter` rebuilds every one
+    the simulated range touches.
+
+    Returns:
+        Number of rows deleted
+    """
+    deleted = db.execute(
+        delete(SectorCandle).where(SectorCandle.timestamp >= first, SectorCandle.timestamp <= last)
+    ).rowcount
+    deleted += db.execute(
+        delete(SectorOHLCV).where(
+            SectorOHLCV.resolution == BASE_RESOLUTION,
+            SectorOHLCV.timestamp >= first,
+            SectorOHLCV.timestamp <= last,
+        )
+    ).rowcount
+    return deleted
+
+
+def aggregate_ticks(
+    paths: np.ndarray,
+    volumes: np.ndarray,
+    base_prices: np.ndarray,
+    ticks: int,
+) -> dict[str, np.ndarray]:
+    """
+    Fold consecutive ticks into candles.
+
+    Args:
+        paths: Tick prices of shape (candles * ticks, sectors); NaN while
+            a sector is idle
+        volumes: Tick volumes aligned with `paths`
+        base_prices: Price of each sector before its first tick
+        ticks: Ticks per candle
+
+    Returns:
+        Dict of open/high/low/close/volume arrays of shape (candles, sectors),
+        NaN prices for idle candles
+    """
+    count, sectors = paths.shape[0] // ticks, paths.shape[1]
+    opens = np.vstack([base_prices[None, :], paths[:-1]])
+    opens = np.where(np.isnan(opens), base_prices[None, :], opens).reshape(count, ticks, sectors)
+    prices = paths.reshape(count, ticks, sectors)
+    open_ = opens[:, 0, :]
+    return {
+        "open": open_,
+        "high": np.maximum(prices.max(axis=1), open_),
+        "low": np.minimum(prices.min(axis=1), open_),
+        "close": prices[:, -1, :],
+        "volume": volumes.reshape(count, ticks, sectors).sum(axis=1),
+    }
+
+
+class DatabaseWriter:
+    """
+    Writes candles, 5m bars and their rollups, committing once per chunk.
+
+    The simulated range must not hold candles or bars yet (see
+    `count_existing` and `clear_range`). Rollups are rebuilt from the
+    stored 5m bars of every day a chunk touches, so coarse bars that also
+    cover bars outside the range stay consistent. The newest 5m bar of a
+    sector is left out of the rollups: like the live simulator's open bar,
+    it is rolled up once a later bar closes it.
+    """
+
+    def __init__(self, db: Session, batch_size: int = BULK_CHUNK_ROWS):
+        self.db = db
+        self.batch_size = batch_size
+
+    def write(self, sector_ids: List[str], timestamps: List[datetime], bars: dict[str, np.ndarray]) -> None:
+        def candle_rows():
+            closes = bars["close"].tolist()
+            for row, timestamp in enumerate(timestamps):
+                for col, sector_id in enumerate(sector_ids):
+                    if not math.isnan(closes[row][col]):
+                        yield {"timestamp": timestamp, "sectorId": sector_id, "value": closes[row][col]}
+
+        insert_candles(self.db, candle_rows(), self.batch_size, skip_existing=True)
+        insert_ohlcv(self.db, _bar_rows(sector_ids, timestamps, bars), self.batch_size, skip_existing=True)
+        for group in iter_chunks(range(len(sector_ids)), _ROLLUP_SECTORS):
+            self._rebuild_rollups([sector_ids[col] for col in group], timestamps, {
+                name: values[:, group] for name, values in bars.items()
+            })
+        self.db.commit()
+
+    def _rebuild_rollups(self, sector_ids: List[str], timestamps: List[datetime], bars: dict[str, np.ndarray]) -> None:
+        """
+        Replace the coarse bars of the days a chunk touches.
+
+        Days inside the chunk are rolled up from the chunk's bars; the
+        first and last day may also hold bars written before, so they are
+        rolled up from the stored 5m bars.
+        """
+        epochs = np.array([to_epoch(ts) for ts in timestamps], dtype=np.int64)
+        days = bucket_end(epochs, DAY_SECONDS)
+        edges = sorted({int(days[0]), int(days[-1])})
+        lowest, highest = from_epoch(edges[0] - DAY_SECONDS), from_epoch(edges[-1])
+
+        stored = self.db.execute(
+            select(
+                SectorOHLCV.sectorId,
+                SectorOHLCV.timestamp,
+                SectorOHLCV.open,
+                SectorOHLCV.high,
+                SectorOHLCV.low,
+                SectorOHLCV.close,
+                SectorOHLCV.volume,
+            )
+            .where(
+                SectorOHLCV.resolution == BASE_RESOLUTION,
+                SectorOHLCV.sectorId.in_(sector_ids),
+                or_(*(
+                    and_(SectorOHLCV.timestamp > from_epoch(day - DAY_SECONDS), SectorOHLCV.timestamp <= from_epoch(day))
+                    for day in edges
+                )),
+            )
+            .order_by(SectorOHLCV.sectorId, SectorOHLCV.timestamp)
+        ).all()
+        by_sector: dict[str, list] = {}
+        for sector_id, *bar in stored:
+            by_sector.setdefault(sector_id, []).append((to_epoch(bar[0]), *bar[1:]))
+        newest = {bar["sectorId"]: to_epoch(bar["timestamp"]) for bar in load_latest_ohlcv(self.db, BASE_RESOLUTION, sector_ids)}
+
+        self.db.execute(
+            delete(SectorOHLCV).where(
+                SectorOHLCV.resolution.in_(ROLLUP_RESOLUTIONS),
+                SectorOHLCV.sectorId.in_(sector_ids),
+                SectorOHLCV.timestamp > lowest,
+                SectorOHLCV.timestamp <= highest,
+            )
+        )
+
+        interior = ~np.isin(days, edges)
+        rollups = []
+        for col, sector_id in enumerate(sector_ids):
+            inside = interior & ~np.isnan(bars["close"][:, col])
+            series = np.array(by_sector.get(sector_id, []), dtype=np.float64).reshape(-1, 6)
+            combined = np.vstack([
+                series,
+                np.column_stack([epochs[inside]] + [bars[name][inside, col] for name in ("open", "high", "low", "close", "volume")]),
+            ])
+            combined = combined[np.argsort(combined[:, 0], kind="stable")]
+            combined = combined[combined[:, 0] != newest.get(sector_id, -1)]
+            for resolution in ROLLUP_RESOLUTIONS:
+                rolled = rollup_bars(
+                    combined[:, 0].astype(np.int64),
+                    combined[:, 1],
+                    combined[:, 2],
+                    combined[:, 3],
+                    combined[:, 4],
+                    combined[:, 5],
+                    RESOLUTIONS[resolution],
+                )
+                for ts, open_, high, low, close, volume in zip(*(values.tolist() for values in rolled)):
+                    rollups.append({
+                        "sectorId": sector_id,
+                        "resolution": resolution,
+                        "timestamp": from_epoch(ts),
+                        "open": open_,
+                        "high": high,
+                        "low": low,
+                        "close": close,
+                        "volume": volume,
+                    })
+        insert_ohlcv(self.db, rollups, self.batch_size)
+
+    def close(self, sector_ids: List[str], base_prices: np.ndarray, last_prices: np.ndarray) -> None:
+        """Leave every sector at its final simulated price."""
+        update_sector_prices(self.db, [
+            {
+                "id": sector_id,
+                "currentPrice": last,
+                "change": last - base,
+                "changePercent": (last - base) / base * 100.0 if base > 0 else 0.0,
+            }
+            for sector_id, base, last in zip(sector_ids, base_prices.tolist(), last_prices.tolist())
+        ])
+        self.db.commit()
+
+
+class CsvWriter:
+    """Writes 5m bars to one CSV file, one row per sector and candle."""
+
+    def __init__(self, path: Path):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(BAR_COLUMNS)
+
+    def write(self, sector_ids: List[str], timestamps: List[datetime], bars: dict[str, np.ndarray]) -> None:
+        for row in _bar_rows(sector_ids, timestamps, bars):
+            self._writer.writerow([
+                row["timestamp"].isoformat(),
+                row["sectorId"],
+                row["open"],
+                row["high"],
+                row["low"],
+                row["close"],
+                row["volume"],
+            ])
+
+    def close(self, sector_ids: List[str], base_prices: np.ndarray, last_prices: np.ndarray) -> None:
+        self._file.close()
+
+
+class ParquetWriter:
+    """Writes 5m bars to one Parquet file, one row group per chunk (needs pyarrow)."""
+
+    def __init__(self, path: Path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet output requires the pyarrow package") from e
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("timestamp", pa.timestamp("ms", tz="UTC")),
+            ("sectorId", pa.string()),
+            ("open", pa.float64()),
+            ("high", pa.float64()),
+            ("low", pa.float64()),
+            ("close", pa.float64()),
+            ("volume", pa.int64()),
+        ])
+        self._writer = pq.ParquetWriter(str(path), self._schema)
+
+    def write(self, sector_ids: List[str], timestamps: List[datetime], bars: dict[str, np.ndarray]) -> None:
+        count, sectors = bars["close"].shape
+        epochs_ms = np.array([to_epoch(ts) * 1000 for ts in timestamps], dtype=np.int64)
+        columns = {
+            "timestamp": np.repeat(epochs_ms, sectors),
+            "sectorId": np.tile(np.asarray(sector_ids, dtype=object), count),
+        }
+        for field in ("open", "high", "low", "close", "volume"):
+            columns[field] = bars[field].reshape(-1)
+        simulated = ~np.isnan(columns["close"])
+        columns = {name: values[simulated] for name, values in columns.items()}
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+
+    def close(self, sector_ids: List[str], base_prices: np.ndarray, last_prices: np.ndarray) -> None:
+        self._writer.close()
+
+
+def _bar_rows(sector_ids: List[str], timestamps: List[datetime], bars: dict[str, np.ndarray]):
+    """Yield 5m bar rows (row-major: candle, then sector), skipping idle candles."""
+    fields = {name: values.tolist() for name, values in bars.items()}
+    for row, timestamp in enumerate(timestamps):
+        for col, sector_id in enumerate(sector_ids):
+            if math.isnan(fields["close"][row][col]):
+                continue
+            yield {
+                "sectorId": sector_id,
+                "resolution": BASE_RESOLUTION,
+                "timestamp": timestamp,
+                "open": fields["open"][row][col],
+                "high": fields["high"][row][col],
+                "low": fields["low"][row][col],
+                "close": fields["close"][row][col],
+                "volume": fields["volume"][row][col],
+            }
+
+
+def run_simulation(
+    sector_ids: Sequence[str],
+    base_prices: np.ndarray,
+    start: datetime,
+    days: float,
+    writer,
+    tick_seconds: float = CANDLE_SECONDS,
+    seed: Optional[int] = None,
+    start_offsets: Optional[np.ndarray] = None,
+    end: Optional[datetime] = None,
+) -> dict:
+    """
+    Simulate `days` of market history starting at `start`.
+
+    The virtual clock starts at the 5-minute boundary at or before
+    `start` and advances one tick at a time; every tick uses the same
+    dynamics as a live simulator tick.
+
+    Args:
+        sector_ids: Sectors to simulate
+        base_prices: Starting price of each sector
+        start: Start of the simulated range
+        days: Length of the simulated range in days
+        writer: DatabaseWriter, CsvWriter or ParquetWriter
+        tick_seconds: Virtual seconds between ticks (must divide 5 minutes)
+        seed: Run seed; the same seed reproduces the same history
+        start_offsets: First candle of each sector, counted from `start`
+            (default: every sector starts at `start`); each sector is
+            simulated for `days` from its own start
+        end: Latest candle timestamp to simulate (default: no limit);
+            sectors stop at `end` even when that is before `days`
+
+    Returns:
+        Dict with tick, candle and timing statistics
+    """
+    sector_ids = list(sector_ids)
+    base_prices = np.asarray(base_prices, dtype=np.float64)
+    ticks = ticks_per_candle(tick_seconds)
+    first_close, candles = candle_range(start, days)
+    if start_offsets is None:
+        start_offsets = np.zeros(len(sector_ids), dtype=np.intp)
+    start_offsets = np.asarray(start_offsets, dtype=np.intp)
+    ends = start_offsets + candles
+    if end is not None:
+        last = (to_epoch(end) - to_epoch(first_close)) // CANDLE_SECONDS
+        ends = np.maximum(np.minimum(ends, last + 1), start_offsets)
+    total = int(ends.max()) if len(sector_ids) else 0
+    chunk_candles = max(1, CHUNK_CELLS // (ticks * max(1, len(sector_ids))))
+    volume_range = (
+        max(1, CANDLE_VOLUME_RANGE[0] // ticks),
+        max(1, CANDLE_VOLUME_RANGE[1] // ticks),
+    )
+
+    engine = SectorTickEngine(seed=seed)
+    prices = base_prices.copy()
+    started = time.perf_counter()
+
+    for offset in range(0, total, chunk_candles):
+        count = min(chunk_candles, total - offset)
+        active = np.flatnonzero((start_offsets < offset + count) & (ends > offset))
+        if not len(active):
+            continue
+        active_ids = [sector_ids[i] for i in active.tolist()]
+        local_starts = np.clip(start_offsets[active] - offset, 0, None)
+        paths, volumes = engine.simulate_paths(
+            active_ids,
+            prices[active],
+            count * ticks,
+            local_starts * ticks,
+            volume_range=volume_range,
+            dt=CANDLE_SECONDS / ticks,
+        )
+        # Sectors that reach their last candle stay idle for the rest of the chunk
+        finished = (np.arange(count * ticks) // ticks)[:, None] >= (ends[active] - offset)[None, :]
+        paths[finished] = np.nan
+        volumes[finished] = 0
+
+        bars = aggregate_ticks(paths, volumes, prices[active], ticks)
+        timestamps = [first_close + timedelta(seconds=(offset + i) * CANDLE_SECONDS) for i in range(count)]
+        writer.write(active_ids, timestamps, bars)
+
+        simulated = ~np.isnan(bars["close"])
+        last_rows = count - 1 - np.argmax(simulated[::-1], axis=0)
+        last_prices = bars["close"][last_rows, np.arange(len(active))]
+        prices[active] = np.where(simulated.any(axis=0), last_prices, prices[active])
+        print(f"Simulated {offset + count}/{total} candles up to {timestamps[-1]}")
+
+    advanced = np.flatnonzero(ends > start_offsets)
+    writer.close([sector_ids[i] for i in advanced.tolist()], base_prices[advanced], prices[advanced])
+    elapsed = time.perf_counter() - started
+    simulated_candles = int((ends - start_offsets).sum())
+    return {
+        "sectors": len(sector_ids),
+        "candles": simulated_candles,
+        "ticks": simulated_candles * ticks,
+        "seconds": elapsed,
+    }
@@ -0,0 +1,117 @@
+"""
+Shared fixtures for the Python backend tests.
+
+Every test gets a throwaway in-memory SQLite database with all model
+tables created. Run from the backend directory with `python -m pytest tests`.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend directory to path
+backend_path = Path(__file__).parent.parent
+if str(backend_path) not in sys.path:
+    sys.path.insert(0, str(backend_path))
+
+
+def make_engine():
+    """Fresh in-memory database with every table created."""
+    from app.models import (  # noqa: F401
+        agent,
+        discussion,
+        sector,
+        sector_candle,
+        sector_ohlcv,
+        sector_sim_state,
+        seed_checkpoint,
+        simulator_lease,
+    )
+    from app.models.base import Base
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@pytest.fixture
+def session_factory():
+    """Sessionmaker over a fresh in-memory database with every table created."""
+    engine = make_engine()
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    """Session on the test database."""
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def add_sectors(db, prices: dict) -> None:
+    """Insert sectors with the given current prices and commit."""
+    from app.models.sector import Sector
+
+    for sector_id, price in prices.items():
+        db.add(Sector(
+            id=sector_id,
+            name=sector_id.title(),
+            symbol=sector_id.upper(),
+            currentPrice=price,
+            change=0.0,
+            changePercent=0.0,
+            volume=0,
+        ))
+    db.commit()
+
+
+def stored_bars(session_factory, sector_id: str, resolution: str) -> list:
+    """Stored bars of a sector as (epoch, open, high, low, close, volume), oldest first."""
+    from app.models.sector_ohlcv import SectorOHLCV
+    from app.services.candle_aggregation import to_epoch
+
+    db = session_factory()
+    try:
+        return [
+            (to_epoch(bar.timestamp), bar.open, bar.high, bar.low, bar.close, bar.volume)
+            for bar in db.query(SectorOHLCV)
+            .filter(SectorOHLCV.sectorId == sector_id, SectorOHLCV.resolution == resolution)
+            .order_by(SectorOHLCV.timestamp)
+        ]
+    finally:
+        db.close()
+
+
+def assert_rollups_match_bars(session_factory, sector_id: str) -> None:
+    """Every stored rollup equals the rollup of the closed (all but the newest) 5m bars."""
+    from app.services.candle_aggregation import RESOLUTIONS, ROLLUP_RESOLUTIONS, rollup_bars
+
+    closed = np.array(stored_bars(session_factory, sector_id, "5m")[:-1])
+    assert len(closed), "no closed 5m bars"
+    for resolution in ROLLUP_RESOLUTIONS:
+        expected = rollup_bars(
+            closed[:, 0].astype(np.int64), *(closed[:, i] for i in range(1, 6)), RESOLUTIONS[resolution]
+        )
+        stored = np.array(stored_bars(session_factory, sector_id, resolution))
+        assert stored[:, 0].tolist() == expected[0].tolist(), resolution
+        for i in range(1, 6):
+            np.testing.assert_allclose(stored[:, i], expected[i], err_msg=resolution)
+
+
+@pytest.fixture
+def simulator(session_factory, monkeypatch):
+    """The market simulator module pointed at the test database, unsharded and seeded."""
+    from app.services import market_simulator
+
+    monkeypatch.setattr(market_simulator, "_lease_manager", None)
+    market_simulator.set_session_factory(session_factory)
+    market_simulator.set_simulator_seed(7)
+    yield market_simulator
+    market_simulator.set_simulator_seed(None)
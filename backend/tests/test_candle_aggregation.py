@@ -0,0 +1,96 @@
+"""
+Tests for OHLCV rollups: `rollup_bars` bucket boundaries and merging
+closed bars into stored bars in several steps with `merge_ohlcv`.
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.services.candle_aggregation import RESOLUTIONS, from_epoch, rollup_bars, to_epoch
+from conftest import stored_bars
+
+
+T0 = to_epoch(datetime(2030, 1, 1, tzinfo=timezone.utc))
+
+
+def _bars(count: int, seed: int = 1) -> tuple:
+    rng = np.random.default_rng(seed)
+    # 5m bars with a gap, so some buckets are partly empty
+    timestamps = T0 + 300 * np.r_[np.arange(1, count // 2 + 1), np.arange(count // 2 + 7, count + 7)]
+    open_ = rng.uniform(90, 110, count)
+    close = rng.uniform(90, 110, count)
+    high = np.maximum(open_, close) + rng.uniform(0, 5, count)
+    low = np.minimum(open_, close) - rng.uniform(0, 5, count)
+    volume = rng.integers(0, 1000, count)
+    return timestamps, open_, high, low, close, volume
+
+
+def _naive_rollup(bars: tuple, seconds: int) -> list:
+    buckets: dict = {}
+    for timestamp, open_, high, low, close, volume in zip(*bars):
+        key = -(-int(timestamp) // seconds) * seconds
+        if key not in buckets:
+            buckets[key] = [key, open_, high, low, close, int(volume)]
+            continue
+        bucket = buckets[key]
+        bucket[2], bucket[3] = max(bucket[2], high), min(bucket[3], low)
+        bucket[4] = close
+        bucket[5] += int(volume)
+    return [tuple(bucket) for bucket in buckets.values()]
+
+
+@pytest.mark.parametrize("resolution", ["15m", "1h", "4h", "1d"])
+def test_rollup_matches_bucket_by_bucket_aggregation(resolution):
+    bars = _bars(400)
+
+    rolled = rollup_bars(*bars, RESOLUTIONS[resolution])
+
+    assert list(zip(*(column.tolist() for column in rolled))) == _naive_rollup(bars, RESOLUTIONS[resolution])
+
+
+def test_bar_on_a_boundary_closes_that_bucket():
+    timestamps = np.array([T0 + 3600, T0 + 3900])
+
+    keys = rollup_bars(timestamps, *([np.ones(2)] * 4), np.ones(2, dtype=np.int64), RESOLUTIONS["1h"])[0]
+
+    assert keys.tolist() == [T0 + 3600, T0 + 7200]
+
+
+def test_rollup_of_no_bars():
+    keys, open_, *_, volume = rollup_bars(np.empty(0, dtype=np.int64), *([np.empty(0)] * 5), 900)
+
+    assert len(keys) == len(open_) == len(volume) == 0
+
+
+@pytest.mark.parametrize("upsert", [True, False])
+def test_merging_in_steps_matches_one_rollup(session_factory, db, monkeypatch, upsert):
+    from app.services.candle_persistence import merge_ohlcv
+
+    if not upsert:
+        monkeypatch.setattr("app.services.candle_persistence.dialect_insert", lambda db: None)
+    bars = _bars(100, seed=2)
+    seconds = RESOLUTIONS["1h"]
+
+    # Split inside a bucket, as the simulator merges bars as they close
+    for part in (slice(0, 37), slice(37, 80), slice(80, None)):
+        keys, open_, high, low, close, volume = rollup_bars(*(column[part] for column in bars), seconds)
+        merge_ohlcv(db, [
+            {
+                "sectorId": "tech",
+                "resolution": "1h",
+                "timestamp": from_epoch(key),
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+                "volume": v,
+            }
+            for key, o, h, l, c, v in zip(
+                keys.tolist(), open_.tolist(), high.tolist(), low.tolist(), close.tolist(), volume.tolist()
+            )
+        ])
+        db.commit()
+
+    assert stored_bars(session_factory, "tech", "1h") == _naive_rollup(bars, seconds)
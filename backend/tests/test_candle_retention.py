@@ -0,0 +1,87 @@
+"""
+Tests for candle retention: day partition bounds, compaction of expired
+raw candles, dropping expired rows and retrying failed passes.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from app.models.sector_candle import SectorCandle
+from app.models.sector_ohlcv import SectorOHLCV
+from app.services.candle_retention import RAW, enforce_retention, expired_partitions, partition_end
+from conftest import add_sectors
+
+
+DAY = timedelta(days=1)
+D0 = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def test_partition_end_uses_closing_boundaries():
+    assert partition_end(D0) == D0
+    assert partition_end(D0 + timedelta(seconds=1)) == D0 + DAY
+    assert partition_end(D0 + DAY - timedelta(seconds=1)) == D0 + DAY
+
+
+def test_expired_partitions_lie_entirely_before_the_cutoff():
+    oldest = D0 + timedelta(hours=6)
+
+    assert list(expired_partitions(oldest, D0 + 2 * DAY + timedelta(hours=23))) == [
+        (D0, D0 + DAY),
+        (D0 + DAY, D0 + 2 * DAY),
+    ]
+    assert list(expired_partitions(oldest, D0 + DAY - timedelta(seconds=1))) == []
+    assert list(expired_partitions(None, D0)) == []
+
+
+def test_enforce_retention_compacts_and_drops_whole_partitions(db):
+    add_sectors(db, {"tech": 100.0})
+    step = timedelta(minutes=5)
+    timestamps = [D0 + i * step for i in range(1, 3 * 288 + 1)]
+    db.add_all(SectorCandle(sectorId="tech", timestamp=ts, value=100.0 + i) for i, ts in enumerate(timestamps))
+    db.commit()
+
+    now = D0 + 3 * DAY + timedelta(hours=12)
+    stats = enforce_retention(db, {RAW: 2, "5m": 1, "1d": None}, now=now)
+
+    assert stats["partitions"] == 1
+    remaining = db.execute(select(func.min(SectorCandle.timestamp), func.count())).one()
+    assert remaining[0].replace(tzinfo=timezone.utc) == D0 + DAY + step
+    assert remaining[1] == 2 * 288 and stats["candles"] == 288
+
+    daily = db.execute(
+        select(SectorOHLCV.timestamp, SectorOHLCV.open, SectorOHLCV.close)
+        .where(SectorOHLCV.resolution == "1d")
+    ).all()
+    assert [(ts.replace(tzinfo=timezone.utc), open_, close) for ts, open_, close in daily] == [(D0 + DAY, 100.0, 387.0)]
+    assert db.execute(select(func.count()).where(SectorOHLCV.resolution == "5m")).scalar() == 0
+
+
+def test_failed_retention_pass_is_retried_within_the_partition(simulator, db, monkeypatch):
+    add_sectors(db, {"tech": 100.0})
+    db.add_all(SectorCandle(sectorId="tech", timestamp=D0 + i * timedelta(minutes=5), value=100.0) for i in range(1, 289))
+    db.commit()
+    monkeypatch.setattr(simulator, "_retention_partition", None)
+    monkeypatch.setattr(simulator, "RETENTION_DAYS", {RAW: 1})
+
+    calls = []
+
+    def locked_once(session, retention_days, now):
+        calls.append(now)
+        if len(calls) == 1:
+            raise OperationalError("DELETE", {}, Exception("lock timeout"))
+        return enforce_retention(session, retention_days, now)
+
+    monkeypatch.setattr(simulator, "enforce_retention", locked_once)
+    now = D0 + 2 * DAY + timedelta(hours=1)
+    asyncio.run(simulator._maybe_enforce_retention(now))
+    assert db.execute(select(func.count()).select_from(SectorCandle)).scalar() == 288
+
+    # The next tick of the same partition retries; later ticks skip it
+    asyncio.run(simulator._maybe_enforce_retention(now + timedelta(minutes=1)))
+    asyncio.run(simulator._maybe_enforce_retention(now + timedelta(minutes=2)))
+    assert len(calls) == 2
+    db.expire_all()
+    assert db.execute(select(func.count()).select_from(SectorCandle)).scalar() == 0
@@ -0,0 +1,90 @@
+"""
+Tests for the in-memory candle window: ring buffer wrap-around, open bar
+rewrites, loading from stored bars and row reuse.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.models.sector_ohlcv import SectorOHLCV
+from app.services.candle_aggregation import to_epoch
+from app.services.candle_window import CandleWindow
+
+
+T0 = datetime(2030, 1, 1, tzinfo=timezone.utc)
+STEP = timedelta(minutes=5)
+
+
+def _append(window: CandleWindow, i: int, sector_ids: list, price: float = None) -> None:
+    close = np.full(len(sector_ids), float(i) if price is None else price)
+    window.append(T0 + i * STEP, sector_ids, close, close + 1, close - 1, close, np.full(len(sector_ids), i))
+
+
+def _epochs(start: int, stop: int) -> list:
+    return [to_epoch(T0 + i * STEP) for i in range(start, stop)]
+
+
+def test_wraps_around_keeping_the_newest_bars(db):
+    window = CandleWindow(capacity=4)
+    window.load(db, ["tech"])
+
+    for i in range(7):
+        _append(window, i, ["tech"])
+
+    bars = window.last("tech")
+    assert bars["timestamp"].tolist() == _epochs(3, 7)
+    assert bars["close"].tolist() == [3.0, 4.0, 5.0, 6.0]
+    assert bars["volume"].tolist() == [3, 4, 5, 6]
+    assert window.last("tech", 2)["close"].tolist() == [5.0, 6.0]
+
+
+def test_open_bar_is_replaced_and_older_bars_ignored(db):
+    window = CandleWindow(capacity=3)
+    window.load(db, ["tech", "energy"])
+    for i in range(4):
+        _append(window, i, ["tech", "energy"])
+
+    _append(window, 3, ["tech"], price=9.5)
+    _append(window, 1, ["energy"], price=-1.0)
+    _append(window, 4, ["unloaded"])
+
+    assert window.last("tech")["close"].tolist() == [1.0, 2.0, 9.5]
+    assert window.last("energy")["close"].tolist() == [1.0, 2.0, 3.0]
+    assert "unloaded" not in window
+
+
+def test_load_keeps_the_newest_stored_bars(db):
+    for i in range(6):
+        db.add(SectorOHLCV(
+            sectorId="tech", resolution="5m", timestamp=T0 + i * STEP,
+            open=i, high=i + 1, low=i - 1, close=i, volume=i,
+        ))
+    db.commit()
+    window = CandleWindow(capacity=4)
+
+    assert window.load(db, ["tech", "energy"]) == 4
+
+    assert window.last("tech")["timestamp"].tolist() == _epochs(2, 6)
+    assert window.last("energy")["timestamp"].tolist() == []
+    _append(window, 6, ["tech"])
+    assert window.last("tech")["timestamp"].tolist() == _epochs(3, 7)
+
+
+def test_rows_survive_growth_and_are_reused(db):
+    window = CandleWindow(capacity=2)
+    sector_ids = [f"s{i}" for i in range(100)]
+    window.load(db, sector_ids[:10])
+    _append(window, 0, sector_ids[:10])
+
+    window.load(db, sector_ids[10:])
+    _append(window, 1, sector_ids)
+
+    assert len(window) == 100
+    assert window.last("s3")["timestamp"].tolist() == _epochs(0, 2)
+    assert window.last("s50")["timestamp"].tolist() == _epochs(1, 2)
+
+    window.remove_sectors(["s3"])
+    window.load(db, ["new"])
+    assert window.last("s3") is None
+    assert window.last("new")["timestamp"].tolist() == []
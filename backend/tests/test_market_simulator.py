@@ -0,0 +1,105 @@
+"""
+Tests for the market simulator's bulk ticks: open bars, catch-up fills
+and the rollups derived from them.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.candle_aggregation import to_epoch
+from conftest import add_sectors, assert_rollups_match_bars, stored_bars
+
+
+T0 = datetime(2030, 1, 1, 0, 1, tzinfo=timezone.utc)
+
+
+def test_restart_mid_bucket_continues_the_stored_open_bar(simulator, session_factory, db):
+    add_sectors(db, {"tech": 100.0, "energy": 50.0})
+    simulator._tick_all_sectors(T0)
+    simulator._tick_all_sectors(T0 + timedelta(minutes=1))
+    before = stored_bars(session_factory, "tech", "5m")[-1]
+
+    # A restart drops everything held in memory
+    simulator.set_session_factory(session_factory)
+    simulator._tick_all_sectors(T0 + timedelta(minutes=2))
+    after = stored_bars(session_factory, "tech", "5m")
+
+    assert len(after) == 1
+    timestamp, open_, high, low, close, volume = after[0]
+    assert (timestamp, open_) == before[:2]
+    assert high >= before[2] and low <= before[3]
+    assert volume > before[5]
+
+    # Closing the resumed bar rolls it up once
+    simulator._tick_all_sectors(T0 + timedelta(minutes=5))
+    for sector_id in ("tech", "energy"):
+        assert_rollups_match_bars(session_factory, sector_id)
+    assert stored_bars(session_factory, "tech", "15m")[0][1] == pytest.approx(before[1])
+
+
+def test_stall_across_bucket_boundary_rolls_up_bars_in_order(simulator, session_factory, db):
+    add_sectors(db, {"tech": 100.0, "energy": 50.0})
+    simulator._tick_all_sectors(T0)
+    simulator._tick_all_sectors(T0 + timedelta(minutes=1))
+    pre_stall = stored_bars(session_factory, "tech", "5m")[-1]
+
+    # Stalled from 00:02 to 00:23: buckets 00:10 to 00:20 are filled in
+    simulator._tick_all_sectors(T0 + timedelta(minutes=22))
+    simulator._tick_all_sectors(T0 + timedelta(minutes=30))
+
+    bucket = to_epoch(T0 + timedelta(minutes=4))
+    assert [bar[0] for bar in stored_bars(session_factory, "tech", "5m")] == list(range(bucket, bucket + 7 * 300, 300))
+    for sector_id in ("tech", "energy"):
+        assert_rollups_match_bars(session_factory, sector_id)
+    assert stored_bars(session_factory, "tech", "15m")[0][1] == pytest.approx(pre_stall[1])
+
+
+def test_shard_handoff_mid_bucket_continues_the_open_bar(simulator, session_factory, db, monkeypatch):
+    from app.services.candle_aggregation import OpenCandleAggregator
+    from app.services.sharding import ShardLeaseManager
+
+    add_sectors(db, {"tech": 100.0, "energy": 50.0})
+    monkeypatch.setattr(simulator, "_lease_manager", ShardLeaseManager("a", shard_count=1, lease_seconds=30))
+    simulator._tick_all_sectors(T0)
+    simulator._tick_all_sectors(T0 + timedelta(minutes=1))
+    before = stored_bars(session_factory, "tech", "5m")[-1]
+    simulator._release_shards()
+
+    # Worker b starts with nothing in memory and acquires the shard
+    monkeypatch.setattr(simulator, "_lease_manager", ShardLeaseManager("b", shard_count=1, lease_seconds=30))
+    monkeypatch.setattr(simulator, "_candle_aggregator", OpenCandleAggregator())
+    simulator._tick_all_sectors(T0 + timedelta(minutes=2))
+    simulator._tick_all_sectors(T0 + timedelta(minutes=5))
+
+    bars = stored_bars(session_factory, "tech", "5m")
+    assert len(bars) == 2
+    assert bars[0][:2] == before[:2] and bars[0][5] > before[5]
+    for sector_id in ("tech", "energy"):
+        assert_rollups_match_bars(session_factory, sector_id)
+
+
+def test_startup_gap_backfill_continues_the_restored_trend_state(simulator, session_factory, db, monkeypatch):
+    import asyncio
+
+    from app.models.sector_candle import SectorCandle
+
+    add_sectors(db, {"tech": 100.0, "energy": 50.0})
+    simulator._tick_all_sectors(datetime.now(timezone.utc) - timedelta(hours=2))
+    persisted = int(simulator._tick_engine.export_state(["tech"])["ticks"][0])
+
+    # Restart with a gap backfill; stop once the first tick is due
+    simulator.set_session_factory(session_factory)
+    simulator.set_simulator_seed(7)
+    monkeypatch.setattr(simulator.settings, "MARKET_SIMULATOR_BACKFILL_GAPS", True, raising=False)
+
+    async def stop(self, slot):
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(simulator.TickSchedule, "sleep_until", stop)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(simulator._scheduler_loop())
+
+    filled = db.query(SectorCandle).filter(SectorCandle.sectorId == "tech").count() - 1
+    assert filled >= 20
+    assert int(simulator._tick_engine.export_state(["tech"])["ticks"][0]) == persisted + filled
@@ -0,0 +1,96 @@
+"""
+Tests for offline simulation into the database: continuing after the
+latest candles, overlapping ranges, rollups and live ticks afterwards.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.models.sector_candle import SectorCandle
+from app.services.candle_aggregation import to_epoch
+from app.simulate.__main__ import _database_sectors, _start_offsets
+from app.simulate.offline import DatabaseWriter, candle_range, clear_range, count_existing, run_simulation
+from conftest import add_sectors, assert_rollups_match_bars, stored_bars
+
+
+T0 = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def _continue(db, days: float, seed: int, end=None) -> None:
+    sector_ids, base_prices, starts = _database_sectors(db, T0)
+    start, offsets = _start_offsets(starts)
+    run_simulation(
+        sector_ids, base_prices, start, days, DatabaseWriter(db), seed=seed, start_offsets=offsets, end=end
+    )
+
+
+@pytest.mark.parametrize("chunk_cells", [None, 70])
+def test_continues_every_sector_after_its_latest_candle(session_factory, db, monkeypatch, chunk_cells):
+    if chunk_cells:
+        monkeypatch.setattr("app.simulate.offline.CHUNK_CELLS", chunk_cells)
+    add_sectors(db, {"tech": 100.0, "energy": 50.0})
+    run_simulation(["tech"], np.array([100.0]), T0 + timedelta(hours=13), 0.5, DatabaseWriter(db), seed=1)
+    run_simulation(["energy"], np.array([50.0]), T0 + timedelta(hours=15), 0.5, DatabaseWriter(db), seed=1)
+    latest = {sector_id: stored_bars(session_factory, sector_id, "5m")[-1] for sector_id in ("tech", "energy")}
+
+    _continue(db, 0.5, seed=2)
+
+    for sector_id in ("tech", "energy"):
+        bars = stored_bars(session_factory, sector_id, "5m")
+        epochs = [bar[0] for bar in bars]
+        assert len(bars) == 2 * 144
+        assert np.all(np.diff(epochs) == 300)
+        continued = epochs.index(latest[sector_id][0]) + 1
+        assert bars[continued][1] == pytest.approx(latest[sector_id][4])
+        assert_rollups_match_bars(session_factory, sector_id)
+
+
+def test_overlapping_range_is_detected_and_cleared(session_factory, db):
+    add_sectors(db, {"tech": 100.0})
+    run_simulation(["tech"], np.array([100.0]), T0, 1, DatabaseWriter(db), seed=1)
+
+    # Overwrite six hours in the middle of the day
+    first, candles = candle_range(T0 + timedelta(hours=9, minutes=2), 0.25)
+    last = first + timedelta(minutes=5 * (candles - 1))
+    assert count_existing(db, first, last) == 2 * candles
+    assert clear_range(db, first, last) == 2 * candles
+    db.commit()
+    assert count_existing(db, first, last) == 0
+
+    run_simulation(["tech"], np.array([100.0]), T0 + timedelta(hours=9, minutes=2), 0.25, DatabaseWriter(db), seed=2)
+    assert db.query(SectorCandle).count() == 288
+    assert len(stored_bars(session_factory, "tech", "5m")) == 288
+    assert_rollups_match_bars(session_factory, "tech")
+
+
+def test_live_simulator_keeps_ticking_after_a_continuation_up_to_now(simulator, session_factory, db):
+    add_sectors(db, {"tech": 100.0, "energy": 50.0})
+    run_simulation(["tech", "energy"], np.array([100.0, 50.0]), T0 - timedelta(days=1), 0.5, DatabaseWriter(db), seed=1)
+
+    # A default one-day continuation at 00:01 fills the gap up to now only
+    now = T0 + timedelta(minutes=1)
+    _continue(db, 1, seed=2, end=now)
+    for sector_id in ("tech", "energy"):
+        assert stored_bars(session_factory, sector_id, "5m")[-1][0] == to_epoch(T0)
+
+    live = [now + timedelta(minutes=minutes) for minutes in (0, 1, 5, 6, 10)]
+    for tick in live[:3]:
+        simulator._tick_all_sectors(tick)
+    # A continuation while the simulator runs has nothing left to fill
+    _continue(db, 1, seed=3, end=live[2])
+    for tick in live[3:]:
+        simulator._tick_all_sectors(tick)
+
+    for sector_id in ("tech", "energy"):
+        bars = stored_bars(session_factory, sector_id, "5m")
+        epochs = [bar[0] for bar in bars]
+        assert len(bars) == 2 * 144 + 3
+        assert np.all(np.diff(epochs) == 300)
+        assert epochs[-1] == to_epoch(T0 + timedelta(minutes=15))
+        # Live bars open at the previous close and keep moving
+        for previous, bar in zip(bars[-4:-1], bars[-3:]):
+            assert bar[1] == pytest.approx(previous[4])
+        assert len({bar[4] for bar in bars[-3:]}) == 3
+        assert_rollups_match_bars(session_factory, sector_id)
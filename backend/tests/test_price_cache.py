@@ -0,0 +1,39 @@
+"""
+Tests for the last-price cache: reconciling it with sector prices changed
+by other writers.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from app.models.sector_candle import SectorCandle
+from app.services.price_cache import LastPriceCache
+from conftest import add_sectors
+
+
+T0 = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+
+def _cache(db) -> LastPriceCache:
+    add_sectors(db, {"tech": 100.0})
+    db.add(SectorCandle(sectorId="tech", timestamp=T0, value=50.0))
+    db.commit()
+    cache = LastPriceCache()
+    cache.warm(db)
+    cache.update("tech", T0 + timedelta(seconds=30), 101.123456789, sector_price=101.123456789)
+    return cache
+
+
+def test_rounded_written_price_keeps_the_cached_candle(db):
+    cache = _cache(db)
+
+    cache.sync(db, [("tech", round(101.123456789, 6))])
+
+    assert cache.last_price("tech") == 101.123456789
+
+
+def test_changed_price_reloads_the_sector(db):
+    cache = _cache(db)
+
+    cache.sync(db, [("tech", 90.0)])
+
+    assert cache.last_price("tech") == 50.0
@@ -0,0 +1,129 @@
+"""
+Tests for seeding: the same seed reproduces the same dataset with any
+number of workers and after an interrupted run is resumed, seeded
+history bars match the bars rebuilt from the candles, and appending
+older history leaves stored bars alone.
+"""
+
+import pytest
+from sqlalchemy import DateTime, func, select
+from sqlalchemy.orm import sessionmaker
+
+import app.seed.seed_data as seed_data
+from app.models.base import Base
+from app.models.sector_candle import SectorCandle
+from app.models.sector_ohlcv import SectorOHLCV
+from app.seed.seed_data import run_seed
+from app.services.candle_aggregation import RESOLUTIONS, bucket_end, from_epoch, to_epoch
+from app.services.candle_history import rebuild_history
+from app.services.candle_persistence import as_utc
+from conftest import make_engine
+
+
+TABLES = ("sectors", "agents", "discussions", "discussion_messages", "discussion_agents", "sector_candles", "sector_ohlcv")
+
+# Small batches so an interrupted run has committed some sectors
+SEED_ARGS = dict(sectors=4, agents_per_sector=2, discussions_per_sector=2, days=1, points_per_day=24, batch_size=24, seed=11)
+
+
+def _contents(db) -> dict:
+    """Rows of every seeded table without wall-clock columns, in a stable order."""
+    contents = {}
+    for name in TABLES:
+        table = Base.metadata.tables[name]
+        columns = [column for column in table.columns if not isinstance(column.type, DateTime)]
+        contents[name] = db.execute(select(*columns).order_by(*columns)).all()
+    return contents
+
+
+def _seeded(**kwargs) -> dict:
+    engine = make_engine()
+    db = sessionmaker(bind=engine)()
+    try:
+        run_seed(db, **{**SEED_ARGS, **kwargs})
+        return _contents(db)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def expected():
+    return _seeded()
+
+
+def test_workers_reproduce_the_in_process_dataset(expected):
+    assert _seeded(workers=2) == expected
+    assert all(expected[name] for name in TABLES)
+
+
+def test_resumed_run_reproduces_the_uninterrupted_dataset(db, monkeypatch, expected):
+    generate = seed_data.iter_sector_candle_rows
+    calls = []
+
+    def interrupted(*args, **kwargs):
+        calls.append(args[0])
+        if len(calls) == 3:
+            raise RuntimeError("interrupted")
+        return generate(*args, **kwargs)
+
+    monkeypatch.setattr(seed_data, "iter_sector_candle_rows", interrupted)
+    with pytest.raises(RuntimeError):
+        run_seed(db, **SEED_ARGS)
+    db.rollback()
+    assert 0 < len(_contents(db)["sector_candles"]) < len(expected["sector_candles"])
+    monkeypatch.setattr(seed_data, "iter_sector_candle_rows", generate)
+
+    run_seed(db, **SEED_ARGS)
+
+    assert _contents(db) == expected
+
+
+def test_seeded_bars_match_bars_rebuilt_from_the_candles(db, expected):
+    run_seed(db, **SEED_ARGS)
+    rebuild_history(db)
+    assert _contents(db)["sector_ohlcv"] == expected["sector_ohlcv"]
+
+
+def test_append_keeps_stored_live_and_compacted_bars(db):
+    def bars() -> dict:
+        return {
+            (bar.sectorId, bar.resolution, as_utc(bar.timestamp)): (bar.open, bar.high, bar.low, bar.close, bar.volume)
+            for bar in db.query(SectorOHLCV)
+        }
+
+    run_seed(db, force=True, sectors=2, days=2, seed=1)
+    earliest = {
+        sector_id: to_epoch(as_utc(timestamp))
+        for sector_id, timestamp in db.execute(
+            select(SectorCandle.sectorId, func.min(SectorCandle.timestamp)).group_by(SectorCandle.sectorId)
+        )
+    }
+
+    # A live bar with volume and a 1d bar whose raw candles were compacted away
+    live = db.query(SectorOHLCV).filter_by(sectorId="tech", resolution="5m").order_by(SectorOHLCV.timestamp.desc()).first()
+    live.volume, live.high = 12345, live.high + 10
+    compacted_day = from_epoch(int(bucket_end(earliest["tech"] - 36 * 60 * 60, RESOLUTIONS["1d"])))
+    db.add(SectorOHLCV(
+        sectorId="tech", resolution="1d", timestamp=compacted_day, open=1.0, high=2.0, low=0.5, close=1.5, volume=777
+    ))
+    db.commit()
+    before = bars()
+
+    run_seed(db, sectors=2, days=2, seed=1, append_days=2)
+    db.expire_all()
+    after = bars()
+
+    def boundary(sector_id: str, resolution: str):
+        return from_epoch(int(bucket_end(earliest[sector_id], RESOLUTIONS[resolution])))
+
+    assert after[("tech", "1d", compacted_day)] == (1.0, 2.0, 0.5, 1.5, 777)
+    for key, bar in before.items():
+        if key[2] == boundary(key[0], key[1]):
+            # The bucket holding the old earliest candle now opens with the appended history
+            assert after[key][3:] == bar[3:]
+        else:
+            assert after[key] == bar, key
+    new_5m = [key for key in after if key not in before and key[:2] == ("tech", "5m")]
+    assert len(new_5m) >= 2 * 288 - 1
+    assert max(key[2] for key in new_5m) < boundary("tech", "5m")
@@ -0,0 +1,72 @@
+"""
+Tests for the metrics recorded by simulator ticks.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services.simulator_metrics import PHASES, InMemoryMetrics
+from app.services.tick_publisher import InMemoryRedis, TickPublisher
+from conftest import add_sectors
+
+
+@pytest.fixture
+def metrics(simulator):
+    """InMemoryMetrics registered as a hook, with events kept in memory."""
+    recorded = InMemoryMetrics()
+    published = []
+
+    async def collect(event):
+        published.append(event)
+
+    previous = simulator._tick_publisher
+    simulator.set_tick_publisher(TickPublisher(InMemoryRedis(), event_publisher=collect))
+    simulator.add_metrics_hook(recorded)
+    yield recorded
+    simulator.remove_metrics_hook(recorded)
+    simulator.set_tick_publisher(previous)
+
+
+def test_tick_records_phases_rows_and_lateness(simulator, metrics, db):
+    add_sectors(db, {"tech": 100.0, "energy": 50.0})
+    now = datetime.now(timezone.utc)
+
+    asyncio.run(simulator._update_all_sectors(now - timedelta(minutes=15)))
+    asyncio.run(simulator._update_all_sectors(now - timedelta(seconds=2)))
+
+    stalled, tick = metrics.ticks
+    assert tick.error is None
+    assert set(tick.phases) == set(PHASES)
+    assert all(seconds >= 0 for seconds in tick.phases.values())
+    assert tick.duration >= sum(tick.phases.values()) - 1e-6
+    assert tick.sectors == 2
+    assert tick.bucket == simulator._get_next_5min_timestamp(now - timedelta(seconds=2))
+    assert 2 <= tick.lateness < 60
+    assert 15 * 60 <= stalled.lateness < 16 * 60
+
+    # The second tick fills the buckets skipped since the first one
+    missed = (tick.bucket - stalled.bucket) // timedelta(minutes=5) - 1
+    assert missed >= 2
+    assert tick.filled_candles == 2 * missed
+    assert tick.rows_written > tick.filled_candles
+
+    summary = metrics.summary()
+    assert summary["ticks"] == 2 and summary["errors"] == 0
+    assert summary["maxLateness"] == stalled.lateness
+
+
+def test_failed_tick_is_recorded(simulator, metrics, monkeypatch):
+    def fail(now, tick_metrics):
+        tick_metrics.lap("read")
+        raise RuntimeError("database down")
+
+    monkeypatch.setattr(simulator, "_tick_all_sectors", fail)
+    with pytest.raises(RuntimeError):
+        asyncio.run(simulator._update_all_sectors(datetime.now(timezone.utc)))
+
+    (tick,) = metrics.ticks
+    assert tick.error == "RuntimeError"
+    assert set(tick.phases) == {"read"}
+    assert metrics.summary() == {"ticks": 0, "errors": 1}
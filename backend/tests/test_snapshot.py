@@ -0,0 +1,60 @@
+"""
+Tests for seed snapshots: a dump loads back into an identical dataset,
+and a forced load replaces what the database holds for its sectors.
+"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.sector import Sector
+from app.seed.seed_data import run_seed
+from app.seed.snapshot import dump_snapshot, load_snapshot
+from conftest import make_engine
+
+
+TABLES = ("sectors", "agents", "discussions", "discussion_messages", "discussion_agents", "sector_candles", "sector_ohlcv")
+
+
+def _contents(db) -> dict:
+    return {table: db.execute(text(f"SELECT * FROM {table} ORDER BY 1, 2")).all() for table in TABLES}
+
+
+@pytest.fixture
+def snapshot(db, tmp_path):
+    run_seed(db, sectors=3, agents_per_sector=2, discussions_per_sector=2, days=1, seed=3)
+    path = tmp_path / "seed.npz"
+    dump_snapshot(db, path)
+    return path
+
+
+def test_snapshot_round_trip(db, snapshot):
+    engine = make_engine()
+    other = sessionmaker(bind=engine)()
+    try:
+        counts = load_snapshot(other, snapshot)
+
+        expected = _contents(db)
+        assert _contents(other) == expected
+        assert all(counts[table] == len(expected[table]) for table in TABLES)
+        assert expected["sector_candles"] and expected["sector_ohlcv"]
+    finally:
+        other.close()
+        engine.dispose()
+
+
+def test_forced_load_replaces_sector_rows(db, snapshot):
+    expected = _contents(db)
+    with pytest.raises(ValueError):
+        load_snapshot(db, snapshot)
+
+    sector = db.query(Sector).order_by(Sector.id).first()
+    sector.name = "Stale"
+    sector.currentPrice = -1.0
+    db.execute(text("DELETE FROM sector_ohlcv WHERE rowid IN (SELECT rowid FROM sector_ohlcv LIMIT 5)"))
+    db.commit()
+
+    load_snapshot(db, snapshot, force=True)
+
+    db.expire_all()
+    assert _contents(db) == expected
@@ -0,0 +1,109 @@
+"""
+Tests for batched tick publishing against the in-process Redis stand-in.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services import tick_publisher, wire_format
+from app.services.tick_publisher import InMemoryRedis, TickPublisher
+
+
+TIMESTAMP = datetime(2030, 1, 1, 0, 5, tzinfo=timezone.utc)
+
+
+def _events(count: int) -> list:
+    return [
+        {
+            "sectorId": f"s{i}",
+            "timestamp": TIMESTAMP,
+            "value": 100.0 + i,
+            "open": 99.0 + i,
+            "high": 101.5 + i,
+            "low": 98.5 + i,
+            "close": 100.0 + i,
+            "volume": 1000 + i,
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def realtime(monkeypatch):
+    """Calls made to the realtime publish functions, in order."""
+    calls = []
+
+    async def publish_sector_candle(sectorId, candle):
+        calls.append(("candle", sectorId, candle))
+
+    async def publish_market_update(sectorId, indexValue, timestamp):
+        calls.append(("update", sectorId, indexValue, timestamp))
+
+    monkeypatch.setattr(tick_publisher, "publish_sector_candle", publish_sector_candle)
+    monkeypatch.setattr(tick_publisher, "publish_market_update", publish_market_update)
+    return calls
+
+
+def test_json_events_use_the_realtime_channels_and_one_snapshot_round_trip(realtime):
+    redis = InMemoryRedis()
+    events = _events(3)
+
+    sent = asyncio.run(TickPublisher(redis, concurrency=2).publish(events))
+
+    assert sent == 7
+    assert sorted(realtime, key=lambda call: (call[1], call[0])) == [
+        call
+        for i in range(3)
+        for call in (
+            ("candle", f"s{i}", {
+                "timestamp": TIMESTAMP.isoformat(),
+                "value": 100.0 + i,
+                "open": 99.0 + i,
+                "high": 101.5 + i,
+                "low": 98.5 + i,
+                "close": 100.0 + i,
+                "volume": 1000 + i,
+            }),
+            ("update", f"s{i}", 100.0 + i, TIMESTAMP.isoformat()),
+        )
+    ]
+    assert redis.round_trips == 1
+    assert [channel for channel, _ in redis.published] == ["market:snapshot"]
+    assert json.loads(redis.published[0][1]) == {
+        "type": "market_snapshot",
+        "timestamp": TIMESTAMP.isoformat(),
+        "sectorIds": ["s0", "s1", "s2"],
+        "open": [99.0, 100.0, 101.0],
+        "high": [101.5, 102.5, 103.5],
+        "low": [98.5, 99.5, 100.5],
+        "close": [100.0, 101.0, 102.0],
+        "volume": [1000, 1001, 1002],
+    }
+
+
+def test_unbatched_publishing_sends_the_same_sector_messages(realtime):
+    events = _events(2)
+    asyncio.run(TickPublisher(InMemoryRedis(), snapshot=False).publish(events))
+    batched = list(realtime)
+    realtime.clear()
+
+    for event in events:
+        asyncio.run(tick_publisher.publish_event(event))
+    assert sorted(realtime, key=repr) == sorted(batched, key=repr)
+
+
+def test_binary_messages_go_out_in_one_pipeline(realtime):
+    redis = InMemoryRedis()
+    events = _events(4)
+
+    sent = asyncio.run(TickPublisher(redis, encoding="binary").publish(events))
+
+    assert sent == 9 and redis.round_trips == 1 and realtime == []
+    assert redis.published[:2] == [
+        ("sector:s0:candles", wire_format.encode_candle(events[0])),
+        ("market:updates", wire_format.encode_market_update("s0", 100.0, TIMESTAMP)),
+    ]
+    assert redis.published[-1] == ("market:snapshot", wire_format.encode_snapshot(events))
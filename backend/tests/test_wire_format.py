@@ -0,0 +1,88 @@
+"""
+Tests for the binary wire format: every message type decodes back to
+what was encoded.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.services.wire_format import (
+    decode,
+    encode_candle,
+    encode_market_update,
+    encode_series,
+    encode_snapshot,
+    epoch_ms,
+)
+
+
+T0 = datetime(2030, 1, 1, 9, 30, 15, 250000, tzinfo=timezone.utc)
+
+
+def _event(sector_id: str, timestamp: datetime, price: float, volume: int) -> dict:
+    return {
+        "sectorId": sector_id,
+        "timestamp": timestamp,
+        "open": price,
+        "high": price + 1.5,
+        "low": price - 0.25,
+        "close": price + 0.125,
+        "volume": volume,
+    }
+
+
+def test_candle_round_trip():
+    event = _event("énergie", T0, 101.0625, 2**40)
+
+    message = decode(encode_candle(event))
+
+    assert message == {**event, "type": "sector_candle", "timestamp": epoch_ms(T0)}
+    assert epoch_ms(T0) % 1000 == 250
+
+
+def test_market_update_round_trip():
+    message = decode(encode_market_update("tech", 1234.5, T0))
+
+    assert message == {"type": "market_update", "sectorId": "tech", "timestamp": epoch_ms(T0), "indexValue": 1234.5}
+
+
+def test_snapshot_round_trip():
+    events = [_event("tech", T0, 100.0, 7), _event("energy", T0 + timedelta(seconds=1), 50.5, 0)]
+
+    message = decode(encode_snapshot(events))
+
+    assert message["type"] == "market_snapshot"
+    assert message["timestamp"] == epoch_ms(T0 + timedelta(seconds=1))
+    assert message["sectorIds"] == ["tech", "energy"]
+    for field in ("open", "high", "low", "close", "volume"):
+        assert message[field].tolist() == [event[field] for event in events]
+
+
+@pytest.mark.parametrize("count", [0, 1, 5])
+def test_series_round_trip(count):
+    timestamps = epoch_ms(T0) + 300_000 * np.arange(count, dtype=np.int64)
+    rng = np.random.default_rng(1)
+    close = rng.uniform(10, 200, count)
+    volume = rng.integers(0, 10**9, count)
+
+    message = decode(encode_series("tech", timestamps, close - 1, close + 2, close - 3, close, volume))
+
+    assert message["type"] == "candle_series"
+    assert message["sectorId"] == "tech"
+    assert message["timestamp"].tolist() == timestamps.tolist()
+    assert message["open"].tolist() == (close - 1).tolist()
+    assert message["low"].tolist() == (close - 3).tolist()
+    assert message["close"].tolist() == close.tolist()
+    assert message["volume"].tolist() == volume.tolist()
+
+
+def test_series_rejects_unordered_timestamps():
+    with pytest.raises(ValueError):
+        encode_series("tech", [2000, 1000], [1, 1], [1, 1], [1, 1], [1, 1], [0, 0])
+
+
+def test_unknown_message_type():
+    with pytest.raises(ValueError):
+        decode(b"\xff")